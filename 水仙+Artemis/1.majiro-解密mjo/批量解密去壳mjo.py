@@ -1,9 +1,13 @@
+import argparse
 import os
-import subprocess
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from majiro_artemis.batch import Throughput, run_batch
+from majiro_artemis.cache import MANIFEST_NAME, BuildCache
+from majiro_artemis.mjcrypt import MjoFormatError, decrypt_file
+
 # 配置区域（根据实际情况修改）===========================================
-MJCRYPT_PATH = r"C:\Users\Administrator\Desktop\水仙\1.majiro-解密mjo\mjcrypt.exe"
 SOURCE_DIR = r"C:\Users\Administrator\Desktop\水仙\1.majiro-解密mjo\原始mjo文件"
 DEST_DIR = r"C:\Users\Administrator\Desktop\水仙\1.majiro-解密mjo\解密mjo文件"
 # ======================================================================
@@ -12,7 +16,8 @@ def print_colored(text, color_code):
     """带颜色的命令行输出"""
     sys.stdout.write(f"\033[{color_code}m{text}\033[0m\n")
 
-def process_files():
+def process_files(jobs=1, rebuild=False):
+    """批量解密，jobs > 1 时使用进程池并行（结果仍按文件顺序输出）"""
     # 创建目标目录
     os.makedirs(DEST_DIR, exist_ok=True)
     
@@ -23,46 +28,47 @@ def process_files():
         print_colored(f"错误：源目录不存在 {SOURCE_DIR}", 31)
         return
 
+    # 跳过内容未变化的文件
+    cache = BuildCache(os.path.join(DEST_DIR, MANIFEST_NAME), rebuild=rebuild)
+    skipped = [f for f in files
+               if cache.fresh("decrypt", [os.path.join(SOURCE_DIR, f)], [os.path.join(DEST_DIR, f"decrypted_{f}")])]
+    files = [f for f in files if f not in skipped]
+
     total = len(files)
     success = 0
     failures = []
+    throughput = Throughput()
 
-    print_colored(f"▶ 开始批量处理，共发现 {total} 个.mjo文件", 36)
+    print_colored(f"▶ 开始批量处理，共发现 {total + len(skipped)} 个.mjo文件，"
+                  f"{len(skipped)} 个未变化已跳过（并行进程数 {jobs}）", 36)
     print("=" * 60)
 
-    for idx, filename in enumerate(files, 1):
-        src_path = os.path.join(SOURCE_DIR, filename)
-        dest_path = os.path.join(DEST_DIR, f"decrypted_{filename}")
-
+    tasks = [(os.path.join(SOURCE_DIR, f), os.path.join(DEST_DIR, f"decrypted_{f}")) for f in files]
+    for idx, (filename, result) in enumerate(zip(files, run_batch(decrypt_file, tasks, jobs)), 1):
         # 显示进度
         progress = f"[{idx}/{total}]".ljust(10)
         print(f"{progress} 正在处理: {filename}...", end='', flush=True)
 
-        try:
-            # 执行解密命令
-            result = subprocess.run(
-                [MJCRYPT_PATH, src_path, dest_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-
-            if result.returncode == 0:
-                print_colored(" [成功]", 32)
-                success += 1
-            else:
-                error_msg = result.stderr.strip() or "未知错误"
-                print_colored(f" [失败] {error_msg}", 31)
-                failures.append((filename, error_msg))
+        # 解密在 run_batch 中完成（进程内执行，不再调用 mjcrypt.exe）
+        if result.error is None:
+            print_colored(" [成功]", 32)
+            success += 1
+            throughput.add(os.path.getsize(result.args[0]))
+            cache.record("decrypt", result.args[:1], result.args[1:])
+        elif isinstance(result.error, MjoFormatError):
+            print_colored(f" [失败] {result.error}", 31)
+            failures.append((filename, str(result.error)))
+        else:
+            print_colored(f" [异常] {str(result.error)}", 31)
+            failures.append((filename, str(result.error)))
 
-        except Exception as e:
-            print_colored(f" [异常] {str(e)}", 31)
-            failures.append((filename, str(e)))
+    cache.save()
 
     # 打印汇总报告
     print("\n" + "=" * 60)
     print_colored(f"处理完成：{success} 成功 / {len(failures)} 失败", 36 if failures else 32)
+    print_colored(f"吞吐量：{throughput.summary()}", 36)
+    print_colored(cache.report(), 36)
     
     if failures:
         print_colored("\n失败详情：", 33)
@@ -70,5 +76,9 @@ def process_files():
             print(f"{i}. {file}: {err}")
 
 if __name__ == "__main__":
-    process_files()
+    parser = argparse.ArgumentParser(description="批量解密去壳 mjo")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数，0 表示使用全部 CPU 核心")
+    parser.add_argument("--rebuild", action="store_true", help="忽略增量缓存，全部重新解密")
+    args = parser.parse_args()
+    process_files(args.jobs, args.rebuild)
     input("\n按 Enter 键退出...")
\ No newline at end of file
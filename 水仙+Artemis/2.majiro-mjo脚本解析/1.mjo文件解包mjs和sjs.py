@@ -1,20 +1,28 @@
+import argparse
 import os
-import shutil
-import subprocess
-import msvcrt
+import struct
+import sys
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from majiro_artemis.batch import Throughput, run_batch
+from majiro_artemis.cache import MANIFEST_NAME, BuildCache
+from majiro_artemis.mjcrypt import MjoFormatError
+from majiro_artemis.mjdisasm import disassemble_file
+
 # ==== 配置部分 ====
-mjdisasm_path = r"C:\Users\Administrator\Desktop\水仙\2.majiro-mjo脚本解析\mjdisasm.exe"
 input_dir = r"C:\Users\Administrator\Desktop\水仙\2.majiro-mjo脚本解析\mjo"
 temp_file_dir = r"C:\Users\Administrator\Desktop\水仙\2.majiro-mjo脚本解析\temp"
-mjdisasm_work_dir = os.path.dirname(mjdisasm_path)
 
 # ==== 辅助函数 ====
 def press_any_key(prompt="按任意键继续..."):
     print(f"\n{prompt}", end='', flush=True)
-    msvcrt.getch()
-    print()
+    try:
+        import msvcrt
+        msvcrt.getch()
+        print()
+    except ImportError:
+        input()
 
 def print_header(title):
     border = "=" * 60
@@ -27,17 +35,17 @@ def print_debug(info, indent=1, bullet=""):
     print(f"{prefix}{info}")
 
     # ==== 主函数 ====
-def disasm_mjo_files():
+def disasm_mjo_files(jobs=1, rebuild=False):
     print_header("Majiro 水仙10周年脚本处理 by qianmo")
     print_debug("当前配置：", 0)
-    print_debug(f"mjdisasm 路径：{mjdisasm_path}")
     print_debug(f"输入目录：{input_dir}")
     print_debug(f"临时目录：{temp_file_dir}")
-    print_debug(f"工作目录：{mjdisasm_work_dir}")
+    print_debug(f"并行进程数：{jobs}")
     
     # 初始化记录器
     result_log = {
         'success': [],
+        'skipped': [],
         'failed': defaultdict(list)
     }
 
@@ -47,66 +55,51 @@ def disasm_mjo_files():
     os.makedirs(temp_file_dir, exist_ok=True)
     print_debug(f"创建临时目录：{temp_file_dir}")
 
+    throughput = Throughput()
+    # .sjs 会被下一步原地转码，只用 .mjs 校验输出是否完好
+    cache = BuildCache(os.path.join(temp_file_dir, MANIFEST_NAME), rebuild=rebuild)
+    mjs_of = lambda f: os.path.join(temp_file_dir, os.path.splitext(f)[0] + ".mjs")
     try:
         mjo_files = [f for f in os.listdir(input_dir) if f.lower().endswith(".mjo")]
         total_files = len(mjo_files)
-        
-        for idx, filename in enumerate(mjo_files, 1):
-            file_counter = f"[{idx}/{total_files}]"
-            input_path = os.path.join(input_dir, filename)
-            base_name = os.path.splitext(filename)[0]
+
+        # 跳过内容未变化的文件
+        for f in mjo_files:
+            if cache.fresh("disasm", [os.path.join(input_dir, f)], [mjs_of(f)]):
+                result_log['skipped'].append(f)
+        mjo_files = [f for f in mjo_files if f not in result_log['skipped']]
+        if result_log['skipped']:
+            print_debug(f"{len(result_log['skipped'])} 个文件未变化，已跳过", 0, "⏭")
+
+        # 进程内反汇编，直接写出到临时目录（不再调用 mjdisasm.exe）
+        tasks = [(os.path.join(input_dir, f), temp_file_dir) for f in mjo_files]
+        results = run_batch(disassemble_file, tasks, jobs)
+        for idx, (filename, result) in enumerate(zip(mjo_files, results), 1):
+            file_counter = f"[{idx}/{len(mjo_files)}]"
+            input_path = result.args[0]
 
             print_header(f"处理文件 {file_counter}：{filename}")
             print_debug(f"完整路径：{input_path}")
 
-            try:
-                # 执行反汇编
-                print_debug("执行命令：")
-                cmd_str = f'"{mjdisasm_path}" "{input_path}"'
-                print_debug(cmd_str, 2, "▶")
-
-                result = subprocess.run(
-                    [mjdisasm_path, input_path],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                    encoding='shift_jis'
-                )
-
-                # 记录命令输出
-                if result.stdout.strip():
-                    print_debug("命令输出：", 2, "↳")
-                    print_debug(result.stdout.strip(), 3)
-
-                # 移动生成文件
-                moved_files = []
-                for ext in [".sjs", ".mjs"]:
-                    src = os.path.join(mjdisasm_work_dir, base_name + ext)
-                    dest = os.path.join(temp_file_dir, base_name + ext)
-
-                    if os.path.exists(src):
-                        shutil.move(src, dest)
-                        moved_files.append(dest)
-                    else:
-                        print_debug(f"未生成 {ext} 文件", 2, "⚠")
-
-                # 处理结果
-                if len(moved_files) == 2:
-                    result_log['success'].append(filename)
-                    print_debug("✓ 成功生成并移动文件", 2, "✔")
-                else:
-                    raise Exception(f"缺少生成文件，仅找到 {len(moved_files)}/2 个文件")
-
-            except subprocess.CalledProcessError as e:
-                error_msg = f"[{e.returncode}] {e.stderr.strip() or '未知错误'}"
+            if result.error is None:
+                mjs_path, sjs_path = result.value
+                result_log['success'].append(filename)
+                throughput.add(os.path.getsize(input_path))
+                cache.record("disasm", [input_path], [mjs_path])
+                print_debug(f"生成：{os.path.basename(mjs_path)}, {os.path.basename(sjs_path)}", 2, "↳")
+                print_debug("✓ 成功生成文件", 2, "✔")
+            elif isinstance(result.error, (MjoFormatError, struct.error)):
+                error_msg = str(result.error)
                 result_log['failed'][filename].append(error_msg)
                 print_debug(f"✘ 反汇编失败：{error_msg}", 2, "❗")
-            except Exception as e:
-                error_msg = str(e)
+            else:
+                error_msg = str(result.error)
                 result_log['failed'][filename].append(error_msg)
                 print_debug(f"⚠ 处理异常：{error_msg}", 2, "❌")
 
     finally:
+        cache.save()
+
         # 生成最终报告
         print_header("最终处理报告")
         
@@ -125,12 +118,19 @@ def disasm_mjo_files():
         # 统计信息
         print_debug("\n处理摘要：", 0, "📊")
         print_debug(f"总文件数：{total_files} 个", 1)
-        print_debug(f"成功率：{len(result_log['success'])/total_files:.1%}", 1)
+        print_debug(f"未变化跳过：{len(result_log['skipped'])} 个", 1)
+        print_debug(f"成功率：{(len(result_log['success']) + len(result_log['skipped']))/total_files:.1%}", 1)
+        print_debug(cache.report(), 1)
         print_debug(f"输出目录：{temp_file_dir}", 1)
+        print_debug(f"吞吐量：{throughput.summary()}", 1)
 
 # ==== 执行 ====
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="mjo 文件解包 mjs 和 sjs")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数，0 表示使用全部 CPU 核心")
+    parser.add_argument("--rebuild", action="store_true", help="忽略增量缓存，全部重新反汇编")
+    args = parser.parse_args()
     try:
-        disasm_mjo_files()
+        disasm_mjo_files(args.jobs, args.rebuild)
     finally:
         press_any_key("按任意键退出程序...")
\ No newline at end of file
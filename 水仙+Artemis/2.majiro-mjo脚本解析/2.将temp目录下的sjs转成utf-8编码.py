@@ -1,7 +1,11 @@
+import argparse
 import os
-import msvcrt
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from majiro_artemis.transcode import SKIPPED, transcode_directory
+
 # ==== 配置路径 ====
 temp_dir = r"C:\Users\Administrator\Desktop\水仙\2.majiro-mjo脚本解析\temp"
 
@@ -9,7 +13,11 @@ temp_dir = r"C:\Users\Administrator\Desktop\水仙\2.majiro-mjo脚本解析\temp
 def press_any_key(prompt="按任意键开始转换..."):
     """等待用户按键"""
     print(f"\n{prompt}", end='', flush=True)
-    msvcrt.getch()
+    try:
+        import msvcrt
+        msvcrt.getch()
+    except ImportError:
+        input()
     print("\n" + "=" * 50)
 
 def print_debug(info, level=1):
@@ -22,45 +30,30 @@ def print_debug(info, level=1):
     print(f"{prefixes.get(level, '')}{info}")
 
 # ==== 转码函数 ====
-def convert_sjs_to_utf8(directory):
+def convert_sjs_to_utf8(directory, jobs=0):
     start_time = datetime.now()
     print_debug(f"🔍 开始扫描目录：{directory}", 1)
     
     total_files = 0
     converted = 0
+    skipped = 0
     failed_files = []
 
-    # 遍历目录
-    for filename in os.listdir(directory):
-        if not filename.lower().endswith(".sjs"):
-            continue
-            
+    # 分块转码、原子替换，已是 UTF-8 的文件直接跳过（可重复运行）
+    for result in transcode_directory(directory, jobs):
         total_files += 1
-        file_path = os.path.join(directory, filename)
-        
+        filename = os.path.basename(result.path)
         print_debug(f"处理文件 [{total_files}]: {filename}", 2)
-        print_debug(f"完整路径：{file_path}", 2)
-
-        try:
-            # 读取原始文件
-            with open(file_path, "r", encoding="shift_jis") as f:
-                content = f.read()
-                print_debug(f"读取成功，文件大小：{len(content)} 字符", 2)
 
-            # 写入转换后内容
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(content)
-                print_debug("转换写入成功", 2)
-                converted += 1
-
-        except UnicodeDecodeError as e:
-            error_msg = f"编码解析失败：{str(e)}"
-            print_debug(error_msg, 3)
-            failed_files.append((filename, error_msg))
-        except Exception as e:
-            error_msg = f"未知错误：{str(e)}"
-            print_debug(error_msg, 3)
-            failed_files.append((filename, error_msg))
+        if result.error is not None:
+            print_debug(result.error, 3)
+            failed_files.append((filename, result.error))
+        elif result.status == SKIPPED:
+            print_debug("已是 UTF-8，跳过", 2)
+            skipped += 1
+        else:
+            print_debug(f"转换写入成功（源编码 {result.status}）", 2)
+            converted += 1
 
     # 生成报告
     print("\n" + "=" * 50)
@@ -68,6 +61,7 @@ def convert_sjs_to_utf8(directory):
     print_debug(f"📊 统计：", 1)
     print_debug(f"扫描文件总数：{total_files} 个", 1)
     print_debug(f"成功转换：{converted} 个", 1)
+    print_debug(f"已是 UTF-8 跳过：{skipped} 个", 1)
     print_debug(f"失败文件：{len(failed_files)} 个", 1)
     
     if failed_files:
@@ -77,6 +71,10 @@ def convert_sjs_to_utf8(directory):
 
 # ==== 执行 ====
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="temp 目录下的 .sjs 转为 UTF-8")
+    parser.add_argument("--jobs", type=int, default=0, help="并行线程数，0 表示使用全部 CPU 核心")
+    args = parser.parse_args()
+
     print("\n=== SJS 文件编码转换工具 ===")
     print_debug(f"目标目录：{temp_dir}", 1)
     print_debug(f"操作类型：Shift-JIS → UTF-8", 1)
@@ -84,7 +82,7 @@ if __name__ == "__main__":
     press_any_key()
     
     try:
-        convert_sjs_to_utf8(temp_dir)
+        convert_sjs_to_utf8(temp_dir, args.jobs)
     except FileNotFoundError:
         print_debug(f"错误：目录不存在 {temp_dir}", 3)
     except Exception as e:
@@ -1,7 +1,11 @@
 import os
-import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from majiro_artemis.cache import MANIFEST_NAME, BuildCache
+from majiro_artemis.merge import parse_sjs, process_mjs
+
 # 配置信息 ============================================================
 CONFIG = {
     "title": "Majiro 水仙10周年脚本处理 by qianmo",
@@ -41,32 +45,6 @@ def wait_any_key(prompt="任意按键开始合并mjs和sjs文件"):
         input(prompt + " (按 Enter 继续)")
 
 # 核心功能 ============================================================
-def parse_sjs(sjs_path):
-    """解析.sjs文件为字典（保留原始转义字符）"""
-    res_dict = {}
-    with open(sjs_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            match = re.match(r'<(\d+)>\s*(.*)', line.strip())
-            if match:
-                num, content = match.groups()
-                res_dict[num] = content
-    return res_dict
-
-def process_mjs(mjs_path, sjs_data, output_dir):
-    """处理单个.mjs文件"""
-    output_path = Path(output_dir) / (mjs_path.stem + ".txt")
-    
-    with open(mjs_path, 'r', encoding='utf-8') as infile, \
-         open(output_path, 'w', encoding='utf-8') as outfile:
-        
-        for line in infile:
-            modified_line = re.sub(
-                r'#res<(\d+)>',
-                lambda m: f'#res<{sjs_data.get(m.group(1), m.group(1))}>',
-                line
-            )
-            outfile.write(modified_line)
-
 def main():
     # 初始化目录
     input_dir = Path(CONFIG['temp_dir'])
@@ -75,7 +53,9 @@ def main():
 
     # 处理文件
     processed = 0
+    skipped = 0
     errors = 0
+    cache = BuildCache(str(output_dir / MANIFEST_NAME))
     
     for mjs_path in input_dir.glob("*.mjs"):
         sjs_path = mjs_path.with_suffix(".sjs")
@@ -85,18 +65,29 @@ def main():
             errors += 1
             continue
 
+        # mjs、sjs 和输出都未变化时跳过
+        inputs = [str(mjs_path), str(sjs_path)]
+        output_path = str(output_dir / (mjs_path.stem + ".txt"))
+        if cache.fresh("merge", inputs, [output_path]):
+            skipped += 1
+            continue
+
         try:
             sjs_data = parse_sjs(sjs_path)
             process_mjs(mjs_path, sjs_data, output_dir)
+            cache.record("merge", inputs, [output_path])
             print(f"✓ 已处理：{mjs_path.name}")
             processed += 1
         except Exception as e:
             print(f"✗ 处理失败：{mjs_path.name} - {str(e)}")
             errors += 1
 
+    cache.save()
+
     # 显示统计信息
     print('\n' + '=' * 80)
-    print(f"处理完成：成功 {processed} 个，失败 {errors} 个")
+    print(f"处理完成：成功 {processed} 个，未变化跳过 {skipped} 个，失败 {errors} 个")
+    print(cache.report())
     print('=' * 80)
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+"""
+map_line 微基准：startswith/正则链（旧实现） vs 哈希键分派表（当前实现）
+
+在 备份文件/10周年完美脚本 语料的全部行上分别运行两种实现，
+校验输出一致后输出各自的 行/秒。
+
+用法:
+    python benchmarks/bench_map_line.py [语料目录] [--repeat 5]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Callable, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+from majiro_artemis import converter
+
+DEFAULT_CORPUS = os.path.join(HERE, "..", "..", "备份文件", "10周年完美脚本")
+
+legacy_pending_voice: Optional[str] = None
+
+
+def legacy_map_line(line: str) -> Optional[str]:
+    """旧实现：逐个 startswith 判断 + 未编译的 re.search（原样保留，仅作对照）"""
+    global legacy_pending_voice
+    line = line.strip()
+
+    # 处理文本命令
+    if line.startswith("#res："):
+        text = line.replace("#res：", "").strip(" >")
+        if legacy_pending_voice:  # 如果有语音 ID，合并到文本命令中
+            mapped = f'''
+        --------有语音区域对话-----------
+        {{"text"}},
+        text = {{
+            pagebreak = true,
+            vo = {{{{"vo", ch="li", file="{legacy_pending_voice}"}},}},
+            ja = {{{{"{text}"}},}},
+        }}'''
+            legacy_pending_voice = None
+            return mapped
+        return f'''
+        --------没有语音区域对话-----------
+        {{"text"}},
+        text = {{
+            pagebreak = true,
+            ja = {{{{"{text}"}},}},
+        }}'''
+
+    # 处理背景/立绘命令
+    if line.startswith("call<$a4eb1e4c"):
+        m = re.search(r"\('([^']+)'", line)
+        if m:
+            return f'''
+        {{"bg", id=1, lv=5, file="{m.group(1)}", time=800, path=":bg/", sync=0}},
+        {{"ex", time=500, func="wait"}}'''
+
+    #----------------------------新增的特殊处理指令
+    # 处理特殊旁白syscall<$90d5298a> ('n001')
+    if line.startswith("syscall<$90d5298a"):
+        m = re.search(r"\('([^']+)'", line)
+        if m:
+            return f'''
+        -----特殊旁白,默认通道1播放------  
+        {{"se",id=1,file="voice/{m.group(1)}",loop=0, time=500, vol=200}}'''
+
+
+    # 处理音频停止命令：call<$5f271e74, 0>
+    if line.startswith("call<$5f271e74"):
+        return '''
+        -----se停止区域------
+        {"se", stop=1, id=1, time=1000},
+        {"se", stop=1, id=2, time=1000},
+        {"se", stop=1, id=3, time=1000},
+        {"se", stop=1, id=4, time=1000},
+        -------------'''
+
+    # 处理bgm停止命令：syscall<$cf35f0e3> (800)
+    if line.startswith("syscall<$cf35f0e3"):
+        return '''
+        -------bgm停止区域------
+        {"bgm", stop=1, id=0, time=3000},
+        {"se", stop=1, id=5, time=1000},
+        -------------'''
+    
+    #----------------------------
+
+    # 处理背景音乐（BGM）通道5-持续播放命令
+    if line.startswith("call<$d334ba75"):
+        m = re.search(r"\('([^']+)'", line)
+        if m:
+            return f'''
+        -----BGM播放区域，默认通道5播放------
+        {{"bgm",id=0,file="{m.group(1)}",loop=1, time=500, vol=200}}'''
+
+    # 处理音效（SE）命令
+    if line.startswith("syscall<$f62e3ca7"):
+        m = re.search(r"\('([^']+)'", line)
+        if m:
+            return f'''
+        -----SE播放区域,默认通道1播放------  
+        {{"se",id=1,file="{m.group(1)}",loop=0, time=500, vol=200}}'''
+
+    # 处理语音命令（缓存语音 ID，等待与下一条文本合并）
+    if line.startswith("call<$812afdf0"):
+        m = re.search(r"\('([^']+)'", line)
+        if m:
+            legacy_pending_voice = m.group(1)
+        return None
+
+    # 处理暂停命令
+    if line.startswith("pause"):
+        return '''
+        {"ex", time=400, func="wait"}'''
+
+    # 处理清屏命令
+    if line.startswith("cls"):
+        return '''
+        --{"msgoff"}, 
+        --{"cgdel",id=-1},
+        --{"fg", mode=-2}'''
+    # 处理退出命令
+    if line.startswith("exit"):
+        return ''''''
+    # 未匹配的命令返回 None
+    return None
+
+
+def load_lines(corpus: str) -> List[str]:
+    lines: List[str] = []
+    for root, _, files in os.walk(corpus):
+        for name in sorted(files):
+            if name.endswith(".txt"):
+                with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                    lines.extend(f.readlines())
+    return lines
+
+
+def fresh_legacy() -> Callable[[str], Optional[str]]:
+    """清空旧实现的全局语音状态后返回 legacy_map_line"""
+    global legacy_pending_voice
+    legacy_pending_voice = None
+    return legacy_map_line
+
+
+def fresh_current() -> Callable[[str], Optional[str]]:
+    """每轮使用新的 Converter（与按文件转换时一致）"""
+    return converter.Converter().map_line
+
+
+def bench(make_func: Callable[[], Callable[[str], Optional[str]]], lines: List[str], repeat: int) -> float:
+    """返回最快一轮的耗时（秒）；make_func 每轮返回一个状态已清空的映射函数"""
+    best = float("inf")
+    for _ in range(repeat):
+        func = make_func()
+        start = time.perf_counter()
+        for line in lines:
+            func(line)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="map_line 微基准")
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS, help="语料目录（*.txt）")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一轮")
+    args = parser.parse_args(argv)
+
+    lines = load_lines(args.corpus)
+    if not lines:
+        print(f"语料目录中没有 .txt 文件: {args.corpus}")
+        return 1
+
+    # 先校验两种实现输出一致
+    legacy_func, current_func = fresh_legacy(), fresh_current()
+    expected = [legacy_func(line) for line in lines]
+    actual = [current_func(line) for line in lines]
+    if expected != actual:
+        print("✗ 输出不一致")
+        return 1
+
+    legacy = bench(fresh_legacy, lines, args.repeat)
+    current = bench(fresh_current, lines, args.repeat)
+    print(f"语料: {len(lines)} 行")
+    print(f"旧实现（startswith 链）: {len(lines) / legacy:,.0f} 行/秒")
+    print(f"分派表实现:             {len(lines) / current:,.0f} 行/秒")
+    print(f"加速比: {legacy / current:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
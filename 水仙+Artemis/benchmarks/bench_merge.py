@@ -0,0 +1,133 @@
+"""
+#res 合并基准：逐行 re.match/re.sub（旧实现） vs 资源表 + 整体 split/join（当前实现）
+
+从语料中最大的合并脚本还原出 .mjs（#res<N> 引用）和 .sjs（<N> 文本），
+在临时目录中分别用两种实现完成 解析 .sjs + 合并写出 .txt，
+校验输出一致后输出各自的耗时和 MB/s。
+
+用法:
+    python benchmarks/bench_merge.py [语料目录] [--repeat 5]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+from majiro_artemis import merge
+
+DEFAULT_CORPUS = os.path.join(HERE, "..", "..", "备份文件", "10周年完美脚本")
+
+# 合并后的文本行：#res：文本>
+MERGED_TEXT = re.compile(r"#res：(.*)>")
+
+
+def legacy_parse_sjs(sjs_path):
+    """旧实现（原样保留，仅作对照）"""
+    res_dict = {}
+    with open(sjs_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = re.match(r'<(\d+)>\s*(.*)', line.strip())
+            if match:
+                num, content = match.groups()
+                res_dict[num] = content
+    return res_dict
+
+
+def legacy_process_mjs(mjs_path, sjs_data, output_dir):
+    """旧实现（原样保留，仅作对照）"""
+    output_path = Path(output_dir) / (mjs_path.stem + ".txt")
+
+    with open(mjs_path, 'r', encoding='utf-8') as infile, \
+         open(output_path, 'w', encoding='utf-8') as outfile:
+
+        for line in infile:
+            modified_line = re.sub(
+                r'#res<(\d+)>',
+                lambda m: f'#res<{sjs_data.get(m.group(1), m.group(1))}>',
+                line
+            )
+            outfile.write(modified_line)
+
+
+def largest_script(corpus: str) -> str:
+    paths = [os.path.join(root, name) for root, _, files in os.walk(corpus)
+             for name in files if name.endswith(".txt")]
+    return max(paths, key=os.path.getsize)
+
+
+def split_script(text: str) -> Tuple[str, str]:
+    """把合并后的脚本还原为 (.mjs 文本, .sjs 文本)"""
+    resources = []
+
+    def to_ref(m: "re.Match[str]") -> str:
+        resources.append(m.group(1))
+        return f"#res<{len(resources) - 1}>"
+
+    mjs_text = MERGED_TEXT.sub(to_ref, text)
+    sjs_text = "".join(f"<{i}> {content}\n" for i, content in enumerate(resources))
+    return mjs_text, sjs_text
+
+
+def bench(run: Callable[[], None], repeat: int) -> float:
+    """返回最快一轮的耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="#res 合并基准")
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS, help="语料目录（*.txt）")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一轮")
+    args = parser.parse_args(argv)
+
+    source = largest_script(args.corpus)
+    with open(source, "r", encoding="utf-8") as f:
+        mjs_text, sjs_text = split_script(f.read())
+
+    with tempfile.TemporaryDirectory() as work:
+        mjs_path = Path(work) / "script.mjs"
+        sjs_path = Path(work) / "script.sjs"
+        legacy_dir = Path(work) / "legacy"
+        current_dir = Path(work) / "current"
+        legacy_dir.mkdir()
+        current_dir.mkdir()
+        mjs_path.write_text(mjs_text, encoding="utf-8")
+        sjs_path.write_text(sjs_text, encoding="utf-8")
+
+        def run_legacy() -> None:
+            legacy_process_mjs(mjs_path, legacy_parse_sjs(sjs_path), legacy_dir)
+
+        def run_current() -> None:
+            merge.process_mjs(mjs_path, merge.parse_sjs(sjs_path), current_dir)
+
+        run_legacy()
+        run_current()
+        output_name = mjs_path.stem + ".txt"
+        if (legacy_dir / output_name).read_bytes() != (current_dir / output_name).read_bytes():
+            print("✗ 输出不一致")
+            return 1
+
+        legacy = bench(run_legacy, args.repeat)
+        current = bench(run_current, args.repeat)
+
+    size_mb = (len(mjs_text.encode("utf-8")) + len(sjs_text.encode("utf-8"))) / 1048576
+    print(f"脚本: {source}（{size_mb:.2f} MB，{sjs_text.count(chr(10))} 条资源）")
+    print(f"旧实现（逐行 re.sub）: {legacy * 1000:.1f} ms，{size_mb / legacy:.1f} MB/s")
+    print(f"资源表 + split/join:   {current * 1000:.1f} ms，{size_mb / current:.1f} MB/s")
+    print(f"加速比: {legacy / current:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+语料基准套件：在 备份文件/10周年完美脚本 上逐阶段计时
+
+阶段:
+    parse_blocks            合并脚本 .txt → 块
+    convert_blocks          -parsed_blocks.txt 的各行 → AST 命令（map_line）
+    build_ast               AST 命令 → Lua 文本
+    replace_bgm_in_content  对 AST 文本做 BGM 文件名替换（附加补充脚本/bgm_replacer.py）
+
+旧版流程的基线（已不在转换流程中，只在 --stage 指定时运行，不参与性能回退比较）:
+    legacy_remove_blank_lines  对生成的 .ast 文件去除空白行（读 + 写）
+
+每个阶段在独立的子进程中运行（取最快一轮），输出 行/秒、MB/秒 和该进程的峰值 RSS；
+行数和字节数均按该阶段的输入统计（build_ast 按输出的 AST 统计）。
+结果可保存为 JSON，并与之前保存的结果比较，耗时超过阈值即视为性能回退。
+
+用法:
+    python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.15
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "附加补充脚本"))
+
+DEFAULT_CORPUS = os.path.join(ROOT, "..", "备份文件", "10周年完美脚本")
+DEFAULT_BGM_LIST = os.path.join(ROOT, "附加补充脚本", "other-list.txt")
+
+STAGES = ["parse_blocks", "convert_blocks", "build_ast", "replace_bgm_in_content"]
+LEGACY_STAGES = ["legacy_remove_blank_lines"]
+
+try:
+    import resource
+except ImportError:  # Windows 上没有 resource 模块，不统计峰值 RSS
+    resource = None
+
+
+def remove_blank_lines(file_path: str) -> None:
+    """
+    移除文件中的所有空白行（旧版转换流程的后处理，仅供 legacy_remove_blank_lines 阶段计时）
+
+    现在生成的 AST 不含空白行，majiro_artemis 中已不再有这一步。
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    # 过滤掉空白行
+    non_blank_lines = [line for line in lines if line.strip()]
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.writelines(non_blank_lines)
+
+
+def corpus_files(corpus: str) -> List[str]:
+    return sorted(os.path.join(root, name) for root, _, files in os.walk(corpus)
+                  for name in files if name.endswith(".txt"))
+
+
+def peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS 以字节为单位
+
+
+def text_size(texts: List[str]) -> Tuple[int, int]:
+    """(行数, UTF-8 字节数)"""
+    return sum(t.count("\n") + 1 for t in texts), sum(len(t.encode("utf-8")) for t in texts)
+
+
+def best_of(run: Callable[[], Any], repeat: int) -> float:
+    """返回最快一轮的耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_stage(stage: str, corpus: str, repeat: int, bgm_list: str) -> Dict[str, Any]:
+    """在子进程中准备输入并计时单个阶段"""
+    from majiro_artemis.blocks import format_blocks, parse_blocks
+    from majiro_artemis.converter import build_ast, convert_blocks
+
+    paths = corpus_files(corpus)
+    if stage == "parse_blocks":
+        texts = [open(p, encoding="utf-8").read() for p in paths]
+        lines, nbytes = text_size(texts)
+        seconds = best_of(lambda: [parse_blocks(p) for p in paths], repeat)
+        return _result(seconds, lines, nbytes)
+
+    block_texts = [format_blocks(parse_blocks(p)) for p in paths]
+    if stage == "convert_blocks":
+        lines, nbytes = text_size(block_texts)
+        seconds = best_of(lambda: [convert_blocks(io.StringIO(t)) for t in block_texts], repeat)
+        return _result(seconds, lines, nbytes)
+
+    converted = [convert_blocks(io.StringIO(t)) for t in block_texts]
+    if stage == "build_ast":
+        lines, nbytes = text_size([build_ast(blocks) for blocks in converted])
+        seconds = best_of(lambda: [build_ast(blocks) for blocks in converted], repeat)
+        return _result(seconds, lines, nbytes)
+
+    ast_texts = [build_ast(blocks) for blocks in converted]
+    lines, nbytes = text_size(ast_texts)
+    if stage == "legacy_remove_blank_lines":
+        with tempfile.TemporaryDirectory() as work:
+            ast_paths = [os.path.join(work, f"{i}.ast") for i in range(len(ast_texts))]
+            best = float("inf")
+            for _ in range(repeat):
+                # 每轮先写回原始内容，只计 remove_blank_lines 本身
+                for path, text in zip(ast_paths, ast_texts):
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write(text)
+                start = time.perf_counter()
+                for path in ast_paths:
+                    remove_blank_lines(path)
+                best = min(best, time.perf_counter() - start)
+        return _result(best, lines, nbytes)
+
+    if stage == "replace_bgm_in_content":
+        from bgm_replacer import replace_bgm_in_content
+        from majiro_artemis.assets import load_mapping
+        # 不用 bgm_replacer.load_bgm_mapping()：它会把加载结果打印到结果表中，且加载失败时返回空映射
+        mapping = load_mapping(bgm_list)
+        seconds = best_of(lambda: [replace_bgm_in_content(t, mapping) for t in ast_texts], repeat)
+        return _result(seconds, lines, nbytes)
+
+    raise ValueError(f"未知阶段: {stage}")
+
+
+def _result(seconds: float, lines: int, nbytes: int) -> Dict[str, Any]:
+    seconds = max(seconds, 1e-9)
+    return {
+        "seconds": seconds,
+        "lines": lines,
+        "bytes": nbytes,
+        "lines_per_s": lines / seconds,
+        "mb_per_s": nbytes / 1048576 / seconds,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """返回耗时比基准慢超过 threshold（比例）的阶段说明（旧版流程的基线不比较）"""
+    regressions = []
+    for stage, result in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or stage in LEGACY_STAGES:
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{stage}: {base['seconds'] * 1000:.1f} ms → {result['seconds'] * 1000:.1f} ms"
+                               f"（慢 {ratio - 1:.0%}，阈值 {threshold:.0%}）")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="语料基准套件")
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS, help="语料目录（*.txt）")
+    parser.add_argument("--stage", action="append", choices=STAGES + LEGACY_STAGES,
+                        help="只运行指定阶段（可重复）；旧版流程的基线只在这里指定时运行")
+    parser.add_argument("--repeat", type=int, default=5, help="每个阶段重复次数，取最快一轮")
+    parser.add_argument("--bgm-list", default=DEFAULT_BGM_LIST, help="BGM 映射表（other-list.txt）")
+    parser.add_argument("--save", help="把结果保存为 JSON")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--threshold", type=float, default=0.15, help="回退阈值（比例），默认 0.15 即慢 15%%")
+    args = parser.parse_args(argv)
+
+    paths = corpus_files(args.corpus)
+    if not paths:
+        print(f"语料目录中没有 .txt 文件: {args.corpus}")
+        return 1
+
+    results: Dict[str, Any] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {"files": len(paths), "bytes": sum(os.path.getsize(p) for p in paths)},
+        "repeat": args.repeat,
+        "stages": {},
+    }
+    print(f"语料: {len(paths)} 个文件，{results['corpus']['bytes'] / 1048576:.2f} MB")
+    print(f"{'阶段':<28}{'耗时 ms':>10}{'行/秒':>14}{'MB/秒':>10}{'峰值 RSS MB':>14}")
+
+    # 每个阶段使用全新的进程，峰值 RSS 互不影响
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for stage in args.stage or STAGES:
+            result = pool.apply(run_stage, (stage, args.corpus, args.repeat, args.bgm_list))
+            results["stages"][stage] = result
+            rss = f"{result['peak_rss_kb'] / 1024:.1f}" if result["peak_rss_kb"] is not None else "-"
+            print(f"{stage:<28}{result['seconds'] * 1000:>10.1f}{result['lines_per_s']:>14,.0f}"
+                  f"{result['mb_per_s']:>10.2f}{rss:>14}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n✗ 性能回退（相对 {args.baseline}）:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n✓ 无性能回退（相对 {args.baseline}，阈值 {args.threshold:.0%}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""
+Majiro → Artemis 转换工具库
+
+各阶段脚本（1.解密、2.解析、3.转换）共用的纯 Python 实现，
+不依赖 mjcrypt.exe / mjdisasm.exe，可在 Linux 上直接运行。
+"""
+
+# 转换器版本：任一阶段的输出格式发生变化时递增，使增量构建缓存失效
+CONVERTER_VERSION = "1"
@@ -0,0 +1,226 @@
+"""
+跨脚本的资源引用索引（背景、语音、音效、BGM → 脚本和块）
+
+转换时 Converter 顺带记录每处资源引用（bg/vo/se/bgm 的原文件名和所在块），
+pipeline 和 extract ast 在写出 .ast 的同时把它们合并进输出目录下的索引文件，
+增量跳过的脚本沿用索引中已有的记录。加载后同时提供两种视图：
+    正向: 脚本 → 各类型引用的资源（scene）
+    反向: 资源 → [(脚本, 块编号)]（where）
+并可与素材目录比较，列出没有被任何脚本使用的素材（unused）和脚本引用了但
+素材目录中不存在的文件（missing）。
+
+索引文件格式（小端）:
+    魔数 "MJAX"(4) + 版本 u32 + 脚本数 u32 + 字符串表字节数 u32 + 记录数 u32
+    + 字符串表（UTF-8，以 \\0 分隔：先是脚本名，后是资源名）
+    + 记录数 × (资源类型 u32, 资源名编号 u32, 脚本编号 u32, 块编号 u32)
+记录按 (资源类型, 资源名, 脚本, 块) 排序，同一资源的引用在文件中连续存放。
+
+用法:
+    python -m majiro_artemis.assetindex 转录的Artemis引擎脚本 stats
+    python -m majiro_artemis.assetindex 转录的Artemis引擎脚本 where 03pi
+    python -m majiro_artemis.assetindex 转录的Artemis引擎脚本 scene 1+2合集/nar1_00.ast
+    python -m majiro_artemis.assetindex 转录的Artemis引擎脚本 unused bg 素材/bg
+    python -m majiro_artemis.assetindex 转录的Artemis引擎脚本 missing vo 素材/voice
+"""
+
+import argparse
+import os
+import struct
+import sys
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .assets import ASSET_KINDS, normalize_name
+
+INDEX_NAME = ".mjassets"
+INDEX_MAGIC = b"MJAX"
+INDEX_VERSION = 1
+_HEADER = struct.Struct("<4sIIII")
+
+# Converter.refs 的元素: (资源类型, 原文件名, 块编号)
+Ref = Tuple[str, str, str]
+
+
+def asset_key(name: str) -> str:
+    """引用名或素材文件名 → 比较用的键：voice/N001.ogg → n001"""
+    return normalize_name(name.rpartition("/")[2])
+
+
+def list_assets(directory: str) -> Set[str]:
+    """素材目录（递归）中所有文件的比较键"""
+    return {asset_key(name) for _, _, files in os.walk(directory) for name in files}
+
+
+class AssetIndex:
+    """
+    资源引用索引
+
+    典型用法:
+        index = AssetIndex.load(os.path.join(output_dir, INDEX_NAME))
+        index.add("1+2合集/nar1_00.ast", converter.refs)
+        index.save(os.path.join(output_dir, INDEX_NAME))
+        for script, block in index.where("bgm", "03pi"): ...
+    """
+
+    def __init__(self):
+        self.scripts: Dict[str, Set[Ref]] = {}  # 正向: 脚本 → 引用
+        self._inverted: Optional[Dict[Tuple[str, str], List[Tuple[str, str]]]] = None
+
+    def add(self, script: str, refs: Iterable[Ref]) -> None:
+        """设置（替换）一个脚本的全部引用"""
+        self.scripts[script] = set(refs)
+        self._inverted = None
+
+    def retain(self, scripts: Iterable[str]) -> None:
+        """只保留给出的脚本（删除输入中已不存在的脚本）"""
+        keep = set(scripts)
+        for script in list(self.scripts):
+            if script not in keep:
+                del self.scripts[script]
+        self._inverted = None
+
+    def __contains__(self, script: str) -> bool:
+        return script in self.scripts
+
+    @property
+    def inverted(self) -> Dict[Tuple[str, str], List[Tuple[str, str]]]:
+        """反向: (资源类型, 引用名) → [(脚本, 块编号)]，按需构建"""
+        if self._inverted is None:
+            inverted = defaultdict(list)
+            for script in sorted(self.scripts):
+                for kind, name, block in sorted(self.scripts[script], key=lambda ref: ref[2]):
+                    inverted[kind, name].append((script, block))
+            self._inverted = dict(inverted)
+        return self._inverted
+
+    def where(self, name: str, kind: Optional[str] = None) -> List[Tuple[str, str, str, str]]:
+        """引用某个资源的位置 [(资源类型, 引用名, 脚本, 块编号)]；按比较键匹配，不区分大小写和扩展名"""
+        key = asset_key(name)
+        return [(ref_kind, ref_name, script, block)
+                for (ref_kind, ref_name), places in sorted(self.inverted.items())
+                if (kind is None or ref_kind == kind) and asset_key(ref_name) == key
+                for script, block in places]
+
+    def scene(self, script: str) -> Dict[str, List[str]]:
+        """某个脚本按类型列出引用的资源（去重、排序）"""
+        by_kind = defaultdict(set)
+        for kind, name, _ in self.scripts.get(script, ()):
+            by_kind[kind].add(name)
+        return {kind: sorted(by_kind[kind]) for kind in ASSET_KINDS if kind in by_kind}
+
+    def referenced(self, kind: str) -> Set[str]:
+        """某类资源被引用的比较键"""
+        return {asset_key(name) for ref_kind, name in self.inverted if ref_kind == kind}
+
+    def unused(self, kind: str, available: Set[str]) -> List[str]:
+        """素材中没有被任何脚本引用的（比较键）"""
+        return sorted(available - self.referenced(kind))
+
+    def missing(self, kind: str, available: Set[str]) -> List[str]:
+        """脚本引用了但素材中不存在的（比较键）"""
+        return sorted(self.referenced(kind) - available)
+
+    def save(self, path: str) -> None:
+        """原子写出索引文件"""
+        scripts = sorted(self.scripts)
+        names = sorted({name for refs in self.scripts.values() for _, name, _ in refs})
+        script_ids = {script: i for i, script in enumerate(scripts)}
+        name_ids = {name: len(scripts) + i for i, name in enumerate(names)}
+        kind_ids = {kind: i for i, kind in enumerate(ASSET_KINDS)}
+        rows = sorted((kind_ids[kind], name_ids[name], script_ids[script], int(block))
+                      for script, refs in self.scripts.items() for kind, name, block in refs)
+        body = array("I", [value for row in rows for value in row])
+        if sys.byteorder != "little":
+            body.byteswap()
+        strings = "\0".join(scripts + names).encode("utf-8")
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(scripts), len(strings), len(rows)))
+            f.write(strings)
+            body.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "AssetIndex":
+        """读取索引文件；文件不存在或格式不符时返回空索引"""
+        index = cls()
+        try:
+            with open(path, "rb") as f:
+                header = f.read(_HEADER.size)
+                if len(header) != _HEADER.size:
+                    return index
+                magic, version, script_count, string_size, count = _HEADER.unpack(header)
+                if (magic, version) != (INDEX_MAGIC, INDEX_VERSION):
+                    return index
+                strings = f.read(string_size).decode("utf-8").split("\0") if string_size else []
+                body = array("I")
+                body.fromfile(f, count * 4)
+        except (OSError, EOFError, UnicodeDecodeError):
+            return index
+        if sys.byteorder != "little":
+            body.byteswap()
+        scripts = {script: set() for script in strings[:script_count]}  # 包括没有任何引用的脚本
+        for i in range(0, len(body), 4):
+            kind, name, script, block = body[i:i + 4]
+            scripts[strings[script]].add((ASSET_KINDS[kind], strings[name], f"{block:05d}"))
+        index.scripts = scripts
+        return index
+
+
+def index_path(output_dir: str) -> str:
+    return os.path.join(output_dir, INDEX_NAME)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="跨脚本的资源引用索引查询")
+    parser.add_argument("index", help="索引文件，或包含 .mjassets 的 AST 输出目录")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="各类资源的数量和引用次数")
+    where = commands.add_parser("where", help="列出引用某个资源的脚本和块")
+    where.add_argument("name")
+    where.add_argument("--kind", choices=ASSET_KINDS)
+    scene = commands.add_parser("scene", help="列出某个脚本引用的资源")
+    scene.add_argument("script", help="相对于输出目录的 .ast 路径")
+    for command in ("unused", "missing"):
+        sub = commands.add_parser(command, help="没有被引用的素材" if command == "unused"
+                                  else "被引用但素材目录中不存在的文件")
+        sub.add_argument("kind", choices=ASSET_KINDS)
+        sub.add_argument("directory", help="素材目录（递归）")
+    args = parser.parse_args(argv)
+
+    path = index_path(args.index) if os.path.isdir(args.index) else args.index
+    if not os.path.exists(path):
+        print(f"索引文件不存在: {path}（先用 pipeline 或 extract ast 转换一次）")
+        return 1
+    index = AssetIndex.load(path)
+
+    if args.command == "stats":
+        print(f"{len(index.scripts)} 个脚本")
+        for kind in ASSET_KINDS:
+            places = [len(v) for (k, _), v in index.inverted.items() if k == kind]
+            print(f"  {kind:<4}{len(places):>7} 个资源{sum(places):>9} 处引用")
+    elif args.command == "where":
+        found = index.where(args.name, args.kind)
+        for kind, name, script, block in found:
+            print(f"{kind}\t{name}\t{script}\tBlock {block}")
+        if not found:
+            print(f"没有脚本引用: {args.name}")
+            return 1
+    elif args.command == "scene":
+        if args.script not in index:
+            print(f"索引中没有该脚本: {args.script}")
+            return 1
+        for kind, names in index.scene(args.script).items():
+            print(f"{kind}（{len(names)}）: {' '.join(names)}")
+    else:
+        available = list_assets(args.directory)
+        names = (index.unused if args.command == "unused" else index.missing)(args.kind, available)
+        print("\n".join(names))
+        print(f"总计: {len(names)} 个")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+AST 资源文件名替换（bgm / se / vo / bg）
+
+映射表的格式与 附加补充脚本/other-list.txt 相同，每行 "新名称 -> 原文件名"，例如:
+    bgm48  -> 03pi
+原文件名在加载时统一规范化（小写、去掉 .ogg 等扩展名），替换时每处引用只需
+规范化一次、查一次字典。所有已加载的资源类型合并为一个预编译的正则分支，
+一遍扫描即可替换 {"bgm",...,file="..."}、{"se",...}、{"vo",...}、{"bg",...}
+中的文件名（可读格式和紧凑格式均适用）。
+
+整个目录在进程池中并行处理，只写回内容有变化的文件，先写临时文件再原子替换。
+
+用法:
+    python -m majiro_artemis.assets 转录的Artemis引擎脚本 --map bgm=附加补充脚本/other-list.txt [--jobs 0]
+"""
+
+import argparse
+import os
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .batch import run_batch
+from .metrics import Metrics, measure
+
+ASSET_KINDS = ("bgm", "se", "vo", "bg")
+
+# 规范化时去掉的扩展名（映射表和脚本中可能带也可能不带）
+ASSET_EXTENSIONS = (".ogg", ".wav", ".png")
+
+# 资源类型 → {规范化后的原文件名: 新名称}
+Tables = Dict[str, Dict[str, str]]
+
+
+def normalize_name(name: str) -> str:
+    """03PI.ogg → 03pi"""
+    name = name.strip().lower()
+    for ext in ASSET_EXTENSIONS:
+        if name.endswith(ext):
+            return name[:-len(ext)]
+    return name
+
+
+def load_mapping(path: str) -> Dict[str, str]:
+    """读取 "新名称 -> 原文件名" 格式的映射表；同一原文件名出现多次时以最后一行为准"""
+    mapping = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            target, sep, source = line.partition(" -> ")
+            if sep and target.strip() and source.strip():
+                mapping[normalize_name(source)] = target.strip()
+    return mapping
+
+
+def parse_map_spec(spec: str) -> Tuple[str, str]:
+    """命令行的 --map bgm=other-list.txt → ("bgm", "other-list.txt")"""
+    kind, sep, path = spec.partition("=")
+    if not sep or kind not in ASSET_KINDS:
+        raise ValueError(f"映射表参数应为 类型=文件（类型为 {'/'.join(ASSET_KINDS)}）: {spec}")
+    return kind, path
+
+
+class RenameResult(NamedTuple):
+    path: str
+    changed: bool
+    missing: List[Tuple[str, str]]  # 没有映射的 (资源类型, 文件名)
+
+
+class AssetRenamer:
+    """
+    按资源类型替换文件名
+
+    典型用法:
+        renamer = AssetRenamer({"bgm": load_mapping("other-list.txt")})
+        content, missing = renamer.replace(content)
+    """
+
+    def __init__(self, tables: Tables):
+        unknown = set(tables) - set(ASSET_KINDS)
+        if unknown:
+            raise ValueError(f"未知的资源类型: {', '.join(sorted(unknown))}")
+        self.tables = tables
+        # 已经是新名称的引用视为已替换，重复运行时不会被当作缺少映射
+        self.targets = {kind: {name.lower() for name in table.values()} for kind, table in tables.items()}
+        # 只匹配有映射表的类型；长的类型名在前，避免 "bg" 抢先匹配 "bgm"
+        kinds = "|".join(sorted(tables, key=len, reverse=True)) or "(?!)"
+        self.pattern = re.compile(r'(\{"(' + kinds + r')"[^{}]*?\bfile=")([^"]+)"')
+
+    def lookup(self, kind: str, name: str) -> Optional[str]:
+        """返回替换后的文件名（保留 voice/ 之类的目录前缀）；该类型没有映射时返回 None"""
+        table = self.tables.get(kind)
+        if table is None:
+            return name
+        directory, sep, base = name.rpartition("/")
+        key = normalize_name(base)
+        target = table.get(key)
+        if target is None:
+            return name if key in self.targets[kind] else None
+        return directory + sep + target
+
+    def replace(self, content: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """一遍扫描替换内容中的所有文件名，返回 (新内容, 没有映射的 (资源类型, 文件名))"""
+        missing: List[Tuple[str, str]] = []
+        lookup = self.lookup
+
+        def substitute(m: "re.Match[str]") -> str:
+            name = m.group(3)
+            target = lookup(m.group(2), name)
+            if target is None:
+                missing.append((m.group(2), name))
+                return m.group(0)
+            return m.group(1) + target + '"'
+
+        return self.pattern.sub(substitute, content), missing
+
+
+def write_atomic(path: str, content: str) -> None:
+    """先写同目录的临时文件再替换，中途出错不会留下半截文件"""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def rename_file(path: str, renamer: AssetRenamer, metrics: Optional[Metrics] = None) -> RenameResult:
+    """替换单个文件中的资源名，内容有变化时才写回（保留原有换行符）"""
+    with measure(metrics, "bgm", path) as record:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            content = f.read()
+        record["bytes_in"] = record["bytes_out"] = content
+        new_content, missing = renamer.replace(content)
+        changed = new_content != content
+        if changed:
+            write_atomic(path, new_content)
+            record["bytes_out"] = new_content
+    return RenameResult(path, changed, missing)
+
+
+def measure_rename(path: str, renamer: AssetRenamer) -> Tuple[RenameResult, Metrics]:
+    """带指标收集的 rename_file()，供进程池调用"""
+    metrics = Metrics()
+    return rename_file(path, renamer, metrics), metrics
+
+
+def find_ast_files(root_dir: str) -> List[str]:
+    """递归查找所有 .ast 文件（按路径排序）"""
+    return sorted(os.path.join(root, name) for root, _, files in os.walk(root_dir)
+                  for name in files if name.endswith(".ast"))
+
+
+def rename_tree(paths: Iterable[str], renamer: AssetRenamer, jobs: int = 0,
+                metrics: Optional[Metrics] = None) -> Iterator[Tuple[str, Optional[RenameResult], Optional[BaseException]]]:
+    """
+    并行处理多个文件，按输入顺序产出 (路径, 结果, 异常)
+
+    给出 metrics 时记录每个文件的 bgm 阶段耗时。
+    """
+    if metrics is None:
+        for result in run_batch(rename_file, [(path, renamer) for path in paths], jobs):
+            yield result.args[0], result.value, result.error
+        return
+    for result in run_batch(measure_rename, [(path, renamer) for path in paths], jobs):
+        if result.error is not None:
+            yield result.args[0], None, result.error
+            continue
+        value, file_metrics = result.value
+        metrics.merge(file_metrics)
+        yield result.args[0], value, None
+
+
+def write_not_found(path: str, kind: str, names: Iterable[str]) -> None:
+    """输出没有映射的文件名列表（bgm_not_found.txt 的格式）"""
+    names = sorted(set(names))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"未找到{kind.upper()}映射的文件名:\n")
+        f.write("=" * 50 + "\n")
+        for name in names:
+            f.write(f"{name}\n")
+        f.write(f"\n总计: {len(names)} 个文件名")
+
+
+def write_failed(path: str, failed: Iterable[str]) -> None:
+    """输出处理失败的文件列表（bgm_failed_files.txt 的格式）"""
+    failed = list(failed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("处理失败的文件:\n")
+        f.write("=" * 50 + "\n")
+        for file_path in failed:
+            f.write(f"{file_path}\n")
+        f.write(f"\n总计: {len(failed)} 个文件")
+
+
+def write_reports(report_dir: str, missing: Dict[str, Iterable[str]], failed: List[str],
+                  failed_name: str = "rename_failed_files.txt") -> List[str]:
+    """按资源类型写出 <类型>_not_found.txt，有失败时写出失败列表；返回写出的文件"""
+    written = []
+    if failed or any(missing.values()):
+        os.makedirs(report_dir, exist_ok=True)
+    for kind, names in missing.items():
+        if names:
+            path = os.path.join(report_dir, f"{kind}_not_found.txt")
+            write_not_found(path, kind, names)
+            written.append(path)
+    if failed:
+        path = os.path.join(report_dir, failed_name)
+        write_failed(path, failed)
+        written.append(path)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="AST 资源文件名替换（bgm/se/vo/bg）")
+    parser.add_argument("directory", help=".ast 所在目录（递归处理）")
+    parser.add_argument("--map", action="append", required=True, metavar="类型=文件",
+                        help="资源类型和映射表，可重复，例如 --map bgm=other-list.txt")
+    parser.add_argument("--jobs", type=int, default=0, help="并行进程数，0 表示使用全部 CPU 核心")
+    parser.add_argument("--report-dir", default=".", help="<类型>_not_found.txt 等报告的输出目录")
+    parser.add_argument("--metrics", help="把每个文件的耗时和字节数写入该 JSON 文件")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = [parse_map_spec(spec) for spec in args.map]
+    except ValueError as e:
+        parser.error(str(e))
+    renamer = AssetRenamer({kind: load_mapping(path) for kind, path in specs})
+    print("已加载映射: " + "，".join(f"{kind} {len(table)} 条" for kind, table in renamer.tables.items()))
+
+    paths = find_ast_files(args.directory)
+    metrics = Metrics() if args.metrics else None
+    missing: Dict[str, set] = {kind: set() for kind in renamer.tables}
+    failed = []
+    updated = 0
+    for path, result, error in rename_tree(paths, renamer, args.jobs, metrics):
+        if error is not None:
+            failed.append(path)
+            print(f"✗ {path}: {error}")
+            continue
+        updated += result.changed
+        for kind, name in result.missing:
+            missing[kind].add(name)
+
+    print(f"处理完成：{len(paths)} 个文件，更新 {updated} 个，失败 {len(failed)} 个")
+    for kind, names in missing.items():
+        if names:
+            print(f"  {kind}: {len(names)} 个文件名没有映射")
+    for path in write_reports(args.report_dir, missing, failed):
+        print(f"报告已保存: {path}")
+    if metrics is not None:
+        print(metrics.summary())
+        metrics.write(args.metrics)
+        print(f"指标已保存: {args.metrics}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
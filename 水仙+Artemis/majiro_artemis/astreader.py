@@ -0,0 +1,367 @@
+"""
+Artemis AST 读取与链接完整性检查
+
+解析 build_ast() 生成的 Lua 表子集（可读格式和紧凑格式均可）:
+    名称 = 值；值为字符串、数字、true/false/nil 或表 { 值, 名称 = 值, ... }；-- 行注释
+字符串按原样保留（不处理转义）。ast 表之前可以用 local 名称 = 值 定义共享的命令
+（见 intern 模块），之后的值可以直接引用这些名称。
+
+AstReader.blocks() 按文件中的顺序逐个产出完整解析的块，供其他工具使用；
+AstReader.links() 只取出各块的 linknext/linkback/line，不展开命令。
+check_text()/check_file() 在一遍扫描中检查:
+    - 块编号不重复且按顺序排列
+    - 每个 linknext/linkback 指向存在的块（linknext = "" 表示没有下一块）
+    - label 表中的每一项都指向存在的块
+语法错误（例如台词中未转义的引号）会连同行号一起报告。
+
+blocks() 中命令表（{"bg", id=1, ...} 这类不含嵌套表的表）用一个正则整体匹配，
+只有 text = {...} 等嵌套表才逐项解析；links() 用一个限定嵌套深度的正则整体匹配
+一个块，同时取出链接字段，不符合时才退回逐项解析（并给出语法错误的位置），
+整个输出目录的检查在一秒左右完成。
+
+用法:
+    python -m majiro_artemis.astreader 转录的Artemis引擎脚本 [--jobs 0]
+"""
+
+import argparse
+import itertools
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .batch import run_batch
+
+_SKIP = re.compile(r"(?:\s+|--[^\n]*)*")
+_NAME = re.compile(r"[A-Za-z_]\w*")
+_FIELD_KEY = re.compile(r"([A-Za-z_]\w*)\s*=(?!=)")
+_LOCAL = re.compile(r"local\s+([A-Za-z_]\w*)\s*=(?!=)")
+_STRING = re.compile(r'"((?:[^"\\\n]|\\.)*)"')
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_SCALAR = r'"(?:[^"\\\n]|\\.)*"|-?\d+(?:\.\d+)?|true|false|nil'
+# 不含嵌套表的表（命令），整体匹配后再用 _FLAT_ITEM 取出各项
+_FLAT_TABLE = re.compile(r"\{(?:\s*(?:[A-Za-z_]\w*\s*=\s*)?(?:" + _SCALAR + r")\s*,)*"
+                         r"\s*(?:(?:[A-Za-z_]\w*\s*=\s*)?(?:" + _SCALAR + r")\s*)?\}")
+_FLAT_ITEM = re.compile(r'(?:([A-Za-z_]\w*)\s*=\s*)?("(?:[^"\\\n]|\\.)*"|-?\d+(?:\.\d+)?|true|false|nil)')
+_CONSTANTS = {"true": True, "false": False, "nil": None}
+
+# links() 用的块结构正则：空白和注释、各项都是原子的，不会回溯。
+# Python 3.11 起 re 支持原子组 (?>...)；之前的版本用等价但较慢的写法：
+# 先在前瞻中捕获，再用反向引用整体消耗，(?=(?P<a>X))(?P=a) 匹配后不会再退回 X 的一部分
+_ATOMIC_NAMES = itertools.count()
+
+
+def _atomic(pattern: str) -> str:
+    if sys.version_info >= (3, 11):
+        return f"(?>{pattern})"
+    name = f"_a{next(_ATOMIC_NAMES)}"
+    return f"(?=(?P<{name}>{pattern}))(?P={name})"
+
+
+def _ws() -> str:
+    return _atomic(r"\s*(?:--[^\n]*\s*)*")
+
+
+# 名称包括 true/false/nil 和共享的命令
+_SCALAR_VALUE = r'(?:"[^"\\\n]*(?:\\.[^"\\\n]*)*"|-?\d+(?:\.\d+)?|[A-Za-z_]\w*)'
+
+
+def _table_pattern(value: str, special: str = "") -> str:
+    """{ 项, 项, ... } 的正则；项为 [名称 =] value，special 为优先尝试的具名项（以 | 结尾）"""
+    item = _atomic(special + r"(?:[A-Za-z_]\w*" + _ws() + "=" + _ws() + r")?" + value)
+    return r"\{" + _ws() + _atomic(r"(?:" + item + _ws() + r"(?:," + _ws() + r"|(?=\})))*") + r"\}"
+
+
+def _nested_value(depth: int) -> str:
+    value = _SCALAR_VALUE
+    for _ in range(depth):
+        value = r"(?:" + _SCALAR_VALUE + "|" + _table_pattern(value) + ")"
+    return value
+
+
+# 块 → text = { vo = { {"vo", ...}, } }，最多嵌套 3 层
+_BLOCK_SHAPE = re.compile(_table_pattern(_nested_value(3), "".join(
+    name + _ws() + "=" + _ws() + pattern + "|" for name, pattern in (
+        ("linknext", r'"(?P<linknext>[^"\\\n]*)"'),
+        ("linkback", r'"(?P<linkback>[^"\\\n]*)"'),
+        ("line", r"(?P<line>\d+)"),
+    ))))
+_LINK_FIELDS = ("linknext", "linkback", "line")
+_BLOCK_NAME = re.compile(r"block_(\d+)")
+
+
+class Table(NamedTuple):
+    items: List[Any]  # 数组部分
+    fields: Dict[str, Any]  # 具名字段（重复的名称以最后一个为准）
+
+
+class Block(NamedTuple):
+    name: str  # block_00012
+    table: Table
+    line: int  # 块在文件中的起始行号
+
+
+class AstSyntaxError(ValueError):
+    def __init__(self, message: str, line: int):
+        super().__init__(f"第 {line} 行: {message}")
+        self.message = message
+        self.line = line
+
+
+class Issue(NamedTuple):
+    path: str
+    line: int
+    message: str
+
+
+def _scalar(token: str) -> Any:
+    if token[0] == '"':
+        return token[1:-1]
+    if token in _CONSTANTS:
+        return _CONSTANTS[token]
+    return float(token) if "." in token else int(token)
+
+
+class AstReader:
+    """
+    逐块读取 AST 文本
+
+    典型用法:
+        reader = AstReader(text)
+        for block in reader.blocks():
+            print(block.name, block.table.fields.get("linknext"))
+        print(reader.labels)
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.header: Dict[str, Any] = {}  # ast 之前的 astver、astname 等
+        self.shared: Dict[str, Any] = {}  # ast 之前用 local 定义的共享命令
+        self.labels: Optional[Dict[str, Table]] = None  # 读完所有块后可用，没有 label 表时为 None
+        self.extra: Dict[str, Any] = {}  # ast 表中块和 label 以外的项
+        self._pos = 0
+        self._line = 1
+        self._line_pos = 0
+
+    def line_of(self, pos: int) -> int:
+        """位置 → 行号（只向后增量计数，整体为线性时间）"""
+        if pos < self._line_pos:
+            return self.text.count("\n", 0, pos) + 1
+        self._line += self.text.count("\n", self._line_pos, pos)
+        self._line_pos = pos
+        return self._line
+
+    def _error(self, message: str, pos: int) -> AstSyntaxError:
+        return AstSyntaxError(message, self.text.count("\n", 0, pos) + 1)
+
+    def _skip(self, pos: int) -> int:
+        return _SKIP.match(self.text, pos).end()
+
+    def _expect(self, char: str, pos: int) -> int:
+        pos = self._skip(pos)
+        if not self.text.startswith(char, pos):
+            found = self.text[pos:pos + 10].split("\n")[0] or "文件结尾"
+            raise self._error(f"应为 {char!r}，实际为 {found!r}", pos)
+        return pos + 1
+
+    def _value(self, pos: int) -> Tuple[Any, int]:
+        pos = self._skip(pos)
+        text = self.text
+        if text.startswith("{", pos):
+            m = _FLAT_TABLE.match(text, pos)
+            if m is not None:
+                items, fields = [], {}
+                for key, token in _FLAT_ITEM.findall(text, pos + 1, m.end() - 1):
+                    if key:
+                        fields[key] = _scalar(token)
+                    else:
+                        items.append(_scalar(token))
+                return Table(items, fields), m.end()
+            return self._table(pos + 1)
+        m = _STRING.match(text, pos) or _NUMBER.match(text, pos)
+        if m is None:
+            m = _NAME.match(text, pos)
+            if m is not None and m.group() in self.shared:
+                return self.shared[m.group()], m.end()
+            if m is None or m.group() not in _CONSTANTS:
+                found = text[pos:pos + 10].split("\n")[0] or "文件结尾"
+                raise self._error(f"无法识别的值 {found!r}", pos)
+        return _scalar(m.group()), m.end()
+
+    def _table(self, pos: int) -> Tuple[Table, int]:
+        """解析 { 之后的表内容，返回 (表, } 之后的位置)"""
+        text = self.text
+        items: List[Any] = []
+        fields: Dict[str, Any] = {}
+        while True:
+            pos = self._skip(pos)
+            if text.startswith("}", pos):
+                return Table(items, fields), pos + 1
+            m = _FIELD_KEY.match(text, pos)
+            if m is None:
+                value, pos = self._value(pos)
+                items.append(value)
+            else:
+                fields[m.group(1)], pos = self._value(m.end())
+            pos = self._skip(pos)
+            if text.startswith(",", pos):
+                pos += 1
+            elif not text.startswith("}", pos):
+                found = text[pos:pos + 10].split("\n")[0] or "文件结尾"
+                raise self._error(f"应为 ',' 或 '}}'，实际为 {found!r}", pos)
+
+    def _links(self, pos: int) -> Tuple[Table, int]:
+        """只取出块的链接字段；块结构超出 _BLOCK_SHAPE 时退回完整解析"""
+        m = _BLOCK_SHAPE.match(self.text, pos)
+        if m is None:
+            table, end = self._value(pos)
+            if not isinstance(table, Table):
+                return table, end
+            return Table([], {key: table.fields[key] for key in _LINK_FIELDS if key in table.fields}), end
+        fields = {key: m.group(key) for key in _LINK_FIELDS if m.group(key) is not None}
+        if "line" in fields:
+            fields["line"] = int(fields["line"])
+        return Table([], fields), m.end()
+
+    def _walk(self, parse_block: Callable[[int], Tuple[Any, int]]) -> Iterator[Block]:
+        text = self.text
+        pos = 0
+        while True:
+            pos = self._skip(pos)
+            m = _LOCAL.match(text, pos)
+            if m is not None:
+                self.shared[m.group(1)], pos = self._value(m.end())
+                continue
+            m = _FIELD_KEY.match(text, pos)
+            if m is None:
+                raise self._error("应为 名称 = 值", pos)
+            if m.group(1) == "ast":
+                break
+            self.header[m.group(1)], pos = self._value(m.end())
+
+        pos = self._expect("{", m.end())
+        while True:
+            pos = self._skip(pos)
+            if text.startswith("}", pos):
+                break
+            m = _FIELD_KEY.match(text, pos)
+            if m is None:
+                raise self._error("ast 表中应为 名称 = 值", pos)
+            key = m.group(1)
+            start = self._skip(m.end())
+            if key.startswith("block_") and text.startswith("{", start):
+                value, pos = parse_block(start)
+                yield Block(key, value, self.line_of(m.start()))
+            else:
+                value, pos = self._value(start)
+                if key == "label" and isinstance(value, Table):
+                    self.labels = {name: entry for name, entry in value.fields.items() if isinstance(entry, Table)}
+                else:
+                    self.extra[key] = value
+            pos = self._skip(pos)
+            if text.startswith(",", pos):
+                pos += 1
+            elif not text.startswith("}", pos):
+                raise self._error("ast 表中应为 ',' 或 '}'", pos)
+
+        if self._skip(pos + 1) != len(text):
+            raise self._error("ast 表之后还有多余的内容", self._skip(pos + 1))
+
+    def blocks(self) -> Iterator[Block]:
+        """按文件中的顺序产出完整解析的各块；遇到语法错误时抛出 AstSyntaxError"""
+        return self._walk(self._value)
+
+    def links(self) -> Iterator[Block]:
+        """
+        按文件中的顺序产出各块，Block.table 只含 linknext/linkback/line 字段
+
+        不展开块内的命令，比 blocks() 快得多；同样会检查语法（但不检查引用的
+        共享命令是否已定义）。
+        """
+        return self._walk(self._links)
+
+
+def read_blocks(path: str) -> Iterator[Block]:
+    """逐块读取 .ast 文件"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    return AstReader(text).blocks()
+
+
+def check_text(text: str, path: str = "<ast>") -> List[Issue]:
+    """检查一个 AST 文本的语法和块之间的链接，返回发现的问题"""
+    reader = AstReader(text)
+    issues: List[Issue] = []
+    lines: Dict[str, int] = {}
+    links: List[Tuple[str, str, str, int]] = []  # (字段, 目标, 所在块, 行号)
+    last_number = -1
+    try:
+        for block in reader.links():
+            if block.name in lines:
+                issues.append(Issue(path, block.line, f"块编号重复: {block.name}（第 {lines[block.name]} 行已定义）"))
+                continue
+            lines[block.name] = block.line
+            m = _BLOCK_NAME.fullmatch(block.name)
+            if m is None:
+                issues.append(Issue(path, block.line, f"块名称格式不符: {block.name}"))
+            else:
+                number = int(m.group(1))
+                if number <= last_number:
+                    issues.append(Issue(path, block.line, f"块顺序错误: {block.name} 出现在 block_{last_number:05d} 之后"))
+                last_number = max(last_number, number)
+            for field in ("linknext", "linkback"):
+                target = block.table.fields.get(field)
+                if target is not None:
+                    links.append((field, target, block.name, block.line))
+    except AstSyntaxError as e:
+        return [Issue(path, e.line, f"语法错误: {e.message}")]
+
+    for field, target, name, line in links:
+        if not isinstance(target, str):
+            issues.append(Issue(path, line, f"{name}.{field} 不是字符串: {target!r}"))
+        elif target not in lines and not (field == "linknext" and target == ""):
+            issues.append(Issue(path, line, f"{name}.{field} 指向不存在的块: {target!r}"))
+    if reader.labels is None:
+        issues.append(Issue(path, 0, "缺少 label 表"))
+    for label, entry in (reader.labels or {}).items():
+        target = entry.fields.get("block")
+        if target not in lines:
+            issues.append(Issue(path, 0, f"label.{label} 指向不存在的块: {target!r}"))
+    return issues
+
+
+def check_file(path: str) -> List[Issue]:
+    with open(path, "r", encoding="utf-8") as f:
+        return check_text(f.read(), path)
+
+
+def find_ast_files(root_dir: str) -> List[str]:
+    return sorted(os.path.join(root, name) for root, _, files in os.walk(root_dir)
+                  for name in files if name.endswith(".ast"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="检查 .ast 文件的语法和块链接完整性")
+    parser.add_argument("path", help=".ast 文件或目录（递归）")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数，0 表示使用全部 CPU 核心")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    paths = [args.path] if os.path.isfile(args.path) else find_ast_files(args.path)
+    bad = 0
+    total = 0
+    for result in run_batch(check_file, [(path,) for path in paths], args.jobs):
+        issues = result.value if result.error is None else [Issue(result.args[0], 0, f"读取失败: {result.error}")]
+        if issues:
+            bad += 1
+            total += len(issues)
+        for issue in issues:
+            print(f"{issue.path}:{issue.line}: {issue.message}")
+    elapsed = time.perf_counter() - start
+    print(f"检查完成：{len(paths)} 个文件，{bad} 个文件共 {total} 个问题，耗时 {elapsed:.2f}s")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+批量任务的进程池执行与吞吐量统计
+
+run_batch() 以有界窗口向进程池提交任务（同时在途的任务数不超过
+window），并按输入顺序逐个产出结果，单个任务的异常会被捕获并随结果
+返回，不会中断整批处理。jobs <= 1 时直接在当前进程中串行执行。
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+
+class BatchResult(NamedTuple):
+    args: Sequence[Any]
+    value: Any
+    error: Optional[BaseException]
+
+
+def resolve_jobs(jobs: int) -> int:
+    """--jobs 0 表示使用全部 CPU 核心"""
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def run_batch(func: Callable[..., Any], arg_list: Iterable[Sequence[Any]],
+              jobs: int = 1, window: Optional[int] = None) -> Iterator[BatchResult]:
+    """
+    对每组参数执行 func(*args)，按输入顺序产出 BatchResult
+
+    Args:
+        func: 模块级函数（需可被 pickle）
+        arg_list: 参数元组序列
+        jobs: 工作进程数，<= 1 时串行执行
+        window: 同时在途的最大任务数，默认 jobs * 2
+    """
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1:
+        for args in arg_list:
+            try:
+                yield BatchResult(args, func(*args), None)
+            except Exception as e:
+                yield BatchResult(args, None, e)
+        return
+
+    window = window or jobs * 2
+    pending_args = iter(arg_list)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        in_flight = deque()
+        for args in pending_args:
+            in_flight.append((args, pool.submit(func, *args)))
+            if len(in_flight) >= window:
+                break
+        while in_flight:
+            args, future = in_flight.popleft()
+            try:
+                result = BatchResult(args, future.result(), None)
+            except Exception as e:
+                result = BatchResult(args, None, e)
+            # 取走一个结果后补充一个任务，保持窗口大小
+            next_args = next(pending_args, None)
+            if next_args is not None:
+                in_flight.append((next_args, pool.submit(func, *next_args)))
+            yield result
+
+
+class Throughput:
+    """累计文件数和字节数，输出 files/s、MB/s"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, nbytes: int) -> None:
+        self.files += 1
+        self.bytes += nbytes
+
+    def summary(self) -> str:
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return (f"{self.files} 个文件 / {self.bytes / 1048576:.2f} MB，耗时 {elapsed:.2f}s，"
+                f"{self.files / elapsed:.1f} 文件/s，{self.bytes / 1048576 / elapsed:.2f} MB/s")
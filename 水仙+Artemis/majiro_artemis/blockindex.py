@@ -0,0 +1,212 @@
+"""
+合并脚本的块偏移索引（.blkidx 附属文件）
+
+块的划分规则与 split_blocks() 相同：每个块以一行 #res：文本> 结束。
+索引只保存每个块在原始 .txt 中的起始字节偏移（array('Q')），
+读取时 mmap 原文件按偏移切片，不复制整个文件，可按编号随机访问任意块。
+
+附属文件格式（小端）:
+    魔数 "MJBI"(4) + 版本 u32 + 源文件大小 u64 + 源文件修改时间 ns u64 + 块数 u64
+    + (块数 + 1) 个 u64 偏移（最后一个为块区结束位置）
+源文件的大小或修改时间变化后索引自动重建。
+
+用法:
+    python -m majiro_artemis.blockindex build mjo原生脚本
+    python -m majiro_artemis.blockindex show mjo原生脚本/decrypted_nar1_00.txt 12
+    python -m majiro_artemis.blockindex check mjo原生脚本
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .blocks import TEXT_MARKER, parse_blocks
+
+INDEX_SUFFIX = ".blkidx"
+INDEX_MAGIC = b"MJBI"
+INDEX_VERSION = 1
+_HEADER = struct.Struct("<4sIQQQ")
+
+# split_blocks() 用 str.strip() 去除行首空白，除 ASCII 空白外还包括全角空格（U+3000）等
+# Unicode 空白；这里列出其中不是换行符的字符（文本模式只把 \r、\n 视为换行）
+_LINE_SPACE = ("\t\x0b\x0c\x1c\x1d\x1e\x1f \x85\xa0\u1680" + "".join(map(chr, range(0x2000, 0x200b)))
+               + "\u2028\u2029\u202f\u205f\u3000")
+_SPACE = b"(?:" + b"|".join(re.escape(ch.encode("utf-8")) for ch in _LINE_SPACE) + b")*"
+
+# 文本行（允许行首空白）连同行尾换行符；匹配结束处即块的结束位置
+_TEXT_LINE = re.compile(rb"(?:\A|(?<=[\r\n]))" + _SPACE + re.escape(TEXT_MARKER.encode("utf-8"))
+                        + rb"[^\r\n]*(?:\r\n|\r|\n)?")
+
+
+def index_path(script_path: str) -> str:
+    """decrypted_nar1_00.txt → decrypted_nar1_00.txt.blkidx"""
+    return script_path + INDEX_SUFFIX
+
+
+def build_offsets(data: bytes) -> array:
+    """扫描脚本内容，返回块边界偏移（块 i 为 data[offsets[i]:offsets[i + 1]]）"""
+    offsets = array("Q", [0])
+    for m in _TEXT_LINE.finditer(data):
+        offsets.append(m.end())
+    if offsets[-1] < len(data):
+        offsets.append(len(data))  # 最后一个 #res： 之后剩余的行单独成块
+    return offsets
+
+
+def write_index(path: str, offsets: array, size: int, mtime_ns: int) -> None:
+    """原子写出附属索引文件"""
+    body = array("Q", offsets)
+    if sys.byteorder != "little":
+        body.byteswap()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, size, mtime_ns, len(offsets) - 1))
+        body.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def read_index(path: str, size: int, mtime_ns: int) -> Optional[array]:
+    """读取附属索引；文件不存在、格式不符或与源文件不一致时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                return None
+            magic, version, src_size, src_mtime, count = _HEADER.unpack(header)
+            if (magic, version, src_size, src_mtime) != (INDEX_MAGIC, INDEX_VERSION, size, mtime_ns):
+                return None
+            offsets = array("Q")
+            offsets.fromfile(f, count + 1)
+    except (OSError, EOFError):
+        return None
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    return offsets
+
+
+def ensure_index(script_path: str) -> array:
+    """
+    返回脚本的块偏移，附属索引缺失或过期时重新生成
+
+    附属索引只是缓存：输入目录只读等原因写不出时只使用内存中的偏移。
+    """
+    st = os.stat(script_path)
+    path = index_path(script_path)
+    offsets = read_index(path, st.st_size, st.st_mtime_ns)
+    if offsets is None:
+        with open(script_path, "rb") as f:
+            offsets = build_offsets(f.read())
+        try:
+            write_index(path, offsets, st.st_size, st.st_mtime_ns)
+        except OSError:
+            pass
+    return offsets
+
+
+def block_text(raw: bytes) -> str:
+    """块的原始字节 → 与 split_blocks() 相同的块内容（各行去除首尾空白）"""
+    # 与文本模式读取相同的换行处理（\r\n、\r 都视为换行）
+    lines = raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    if lines[-1] == "":
+        lines.pop()  # 末尾换行之后没有新的一行
+    return "\n".join(line.strip() for line in lines)
+
+
+class BlockIndex:
+    """
+    通过 mmap 按编号读取合并脚本中的块
+
+    典型用法:
+        with BlockIndex("decrypted_nar1_00.txt") as index:
+            print(len(index), index.text(12))
+    """
+
+    def __init__(self, script_path: str):
+        self.script_path = script_path
+        self.offsets = ensure_index(script_path)
+        self._file = open(script_path, "rb")
+        # 空文件无法 mmap
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def raw(self, number: int) -> memoryview:
+        """第 number 个块的原始字节（零拷贝视图，需在 close() 之前使用）"""
+        if not 0 <= number < len(self):
+            raise IndexError(f"块编号超出范围: {number}（共 {len(self)} 块）")
+        return memoryview(self._data)[self.offsets[number]:self.offsets[number + 1]]
+
+    def text(self, number: int) -> str:
+        """第 number 个块的内容（与 parse_blocks() 的结果相同）"""
+        with self.raw(number) as view:
+            return block_text(bytes(view))
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """按顺序产出 (块编号, 块内容)"""
+        for number in range(len(self)):
+            yield f"{number:05d}", self.text(number)
+
+    def blocks(self) -> Dict[str, str]:
+        """与 parse_blocks() 相同的 {块编号: 块内容}"""
+        return dict(self)
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self) -> "BlockIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="合并脚本的块偏移索引")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="为目录（递归）或单个文件生成 .blkidx")
+    build.add_argument("path")
+    show = commands.add_parser("show", help="显示某个块的内容")
+    show.add_argument("script")
+    show.add_argument("number", type=int)
+    check = commands.add_parser("check", help="检查索引划分的块与 parse_blocks() 是否一致")
+    check.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        with BlockIndex(args.script) as index:
+            print(f"Block {args.number:05d}（共 {len(index)} 块）:")
+            print(index.text(args.number))
+        return 0
+
+    if os.path.isfile(args.path):
+        scripts = [args.path]
+    else:
+        scripts = [os.path.join(root, name) for root, _, files in os.walk(args.path)
+                   for name in sorted(files) if name.endswith(".txt")]
+    if args.command == "check":
+        mismatched = 0
+        for script in scripts:
+            with BlockIndex(script) as index:
+                if index.blocks() != parse_blocks(script):
+                    mismatched += 1
+                    print(f"块划分不一致: {script}")
+        print(f"已检查 {len(scripts)} 个脚本，{mismatched} 个不一致")
+        return 1 if mismatched else 0
+
+    total = 0
+    for script in scripts:
+        total += len(ensure_index(script)) - 1
+    print(f"已生成 {len(scripts)} 个索引，共 {total} 个块")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
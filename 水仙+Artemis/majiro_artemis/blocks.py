@@ -0,0 +1,63 @@
+"""
+按 #res： 文本标记把合并后的 MJO 脚本划分为块
+"""
+
+from typing import Dict, Iterable
+
+# 文本行标记：每个块以一行 #res：文本> 结束
+TEXT_MARKER = "#res："
+
+
+def split_blocks(lines: Iterable[str]) -> Dict[str, str]:
+    """
+    根据 #res： 标记划分块。
+
+    Args:
+        lines: 脚本的各行（可带换行符）。
+
+    Returns:
+        dict: 包含块编号和对应内容的字典。
+    """
+    blocks: Dict[str, str] = {}  # 存储块编号和内容
+    current_block: list[str] = []  # 当前块内容
+    block_number: int = 0  # 块编号
+
+    for line in lines:
+        line = line.strip()
+
+        if line.startswith(TEXT_MARKER):
+            current_block.append(line)  # 先将 #res： 行加入当前块
+            # 保存当前块内容
+            if current_block:
+                block_id = f"{block_number:05d}"
+                blocks[block_id] = '\n'.join(current_block)
+                current_block = []  # 清空当前块
+                block_number += 1  # 块编号递增
+        else:
+            current_block.append(line)  # 添加行到当前块
+
+    # 保存最后一个块
+    if current_block:
+        block_id = f"{block_number:05d}"
+        blocks[block_id] = '\n'.join(current_block)
+
+    return blocks
+
+
+def parse_blocks(file_path: str) -> Dict[str, str]:
+    """
+    解析文件内容并根据 #res： 标记划分块。
+
+    Args:
+        file_path (str): 输入文件路径。
+
+    Returns:
+        dict: 包含块编号和对应内容的字典。
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return split_blocks(file.readlines())
+
+
+def format_blocks(blocks: Dict[str, str]) -> str:
+    """生成 -parsed_blocks.txt 格式的文本（Block NNNNN: 标题 + 块内容）"""
+    return "".join(f"Block {block_id}:\n{content}\n\n" for block_id, content in blocks.items())
@@ -0,0 +1,170 @@
+"""
+基于内容哈希的增量构建缓存
+
+清单文件（默认为输出目录下的 .mjcache.json）按 "阶段 + 输入文件" 记录：
+输入内容哈希、转换器版本、映射配置哈希以及输出文件哈希。
+四者都未变化且输出文件完好时，该文件的这一阶段直接跳过。
+
+为避免每次都重新计算哈希，文件的 (大小, 修改时间) 未变时复用上次的哈希。
+
+用法:
+    python -m majiro_artemis.cache show  转录的Artemis引擎脚本/.mjcache.json
+    python -m majiro_artemis.cache clean 转录的Artemis引擎脚本/.mjcache.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+from . import CONVERTER_VERSION
+
+MANIFEST_NAME = ".mjcache.json"
+MANIFEST_FORMAT = 1
+
+
+def config_digest(config: Any) -> str:
+    """映射配置（任意可 JSON 序列化的对象）的哈希"""
+    if config is None or config == "":
+        return ""
+    text = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class BuildCache:
+    """
+    增量构建清单
+
+    典型用法:
+        cache = BuildCache(os.path.join(output_dir, MANIFEST_NAME))
+        if not cache.fresh("ast", [src], [dest]):
+            ...转换...
+            cache.record("ast", [src], [dest])
+        cache.save()
+    """
+
+    def __init__(self, manifest_path: str, rebuild: bool = False):
+        self.manifest_path = manifest_path
+        self.rebuild = rebuild
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.stats: Dict[str, List[Any]] = {}  # 路径 -> [大小, 修改时间, 哈希]
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("format") == MANIFEST_FORMAT:
+                    self.entries = data.get("entries", {})
+                    self.stats = data.get("stats", {})
+            except (OSError, ValueError):
+                pass  # 清单损坏时按全量重建处理
+
+    def file_digest(self, path: str) -> Optional[str]:
+        """文件内容哈希；文件不存在时返回 None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = os.path.abspath(path)
+        cached = self.stats.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.stats[key] = [st.st_size, st.st_mtime_ns, digest]
+        self._dirty = True
+        return digest
+
+    @staticmethod
+    def _key(stage: str, inputs: Sequence[str]) -> str:
+        return stage + ":" + "|".join(os.path.abspath(p) for p in inputs)
+
+    def fresh(self, stage: str, inputs: Sequence[str], outputs: Sequence[str],
+              config: Any = None) -> bool:
+        """该阶段对这些输入的输出是否仍然有效（同时累计命中/未命中次数）"""
+        entry = None if self.rebuild else self.entries.get(self._key(stage, inputs))
+        valid = (
+            entry is not None
+            and entry.get("version") == CONVERTER_VERSION
+            and entry.get("config") == config_digest(config)
+            and all(entry["inputs"].get(os.path.abspath(p)) == self.file_digest(p) for p in inputs)
+            and all(entry["outputs"].get(os.path.abspath(p)) == self.file_digest(p) for p in outputs)
+            and all(self.file_digest(p) == digest for p, digest in entry["outputs"].items())
+        )
+        if valid:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return valid
+
+    def record(self, stage: str, inputs: Sequence[str], outputs: Sequence[str],
+               config: Any = None) -> None:
+        """在该阶段成功写出输出后记录本次构建"""
+        self.entries[self._key(stage, inputs)] = {
+            "version": CONVERTER_VERSION,
+            "config": config_digest(config),
+            "inputs": {os.path.abspath(p): self.file_digest(p) for p in inputs},
+            "outputs": {os.path.abspath(p): self.file_digest(p) for p in outputs},
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.manifest_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format": MANIFEST_FORMAT, "entries": self.entries, "stats": self.stats},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+
+    def clean(self) -> None:
+        """删除清单，下次运行全量重建"""
+        self.entries.clear()
+        self.stats.clear()
+        self._dirty = False
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"缓存命中 {self.hits} / 未命中 {self.misses}（命中率 {rate:.1%}）"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="增量构建缓存管理")
+    parser.add_argument("action", choices=["show", "clean"], help="show: 查看清单  clean: 删除清单")
+    parser.add_argument("manifest", help=f"清单文件路径或其所在目录（{MANIFEST_NAME}）")
+    args = parser.parse_args(argv)
+
+    path = args.manifest
+    if os.path.isdir(path):
+        path = os.path.join(path, MANIFEST_NAME)
+    cache = BuildCache(path)
+    if args.action == "clean":
+        cache.clean()
+        print(f"已删除缓存清单: {path}")
+        return 0
+
+    stages: Dict[str, int] = {}
+    for key in cache.entries:
+        stage = key.split(":", 1)[0]
+        stages[stage] = stages.get(stage, 0) + 1
+    print(f"缓存清单: {path}")
+    for stage, count in sorted(stages.items()):
+        print(f"  {stage}: {count} 个文件")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,574 @@
+"""
+MJO block 内容 → Artemis AST 转换
+
+Converter 保存单个文件的转换状态（每个文件一个实例），其 map_line() 把一行
+MJO 指令映射为 AST 命令，convert() 按块转换；build_ast() 拼装成完整的 Lua 表，
+iter_ast()/write_ast() 逐块流式输出，内存占用不随脚本长度增长。
+compact=True 时输出不含缩进和注释的紧凑 Lua。
+给出 AssetRenamer 时，bgm/se/vo/bg 的文件名在生成命令时直接按映射表替换，
+没有映射的文件名记录在 Converter.missing 中；所有资源引用（原文件名和所在块）
+记录在 Converter.refs 中，供 assetindex 建立跨脚本的资源索引。
+build_ast_chunks() 把过长的脚本在块边界处拆成多个 .ast 文件，前后文件之间用 jump 衔接；
+紧凑格式下还可以把重复的命令提为 local 变量共享（见 intern 模块）。
+"""
+
+import itertools
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .assets import AssetRenamer
+from .intern import Shared, declare, intern_blocks
+
+# 指令键：文本标记、call/syscall + 8 位哈希、或裸指令名（按前缀匹配）
+_COMMAND_KEY = re.compile(r"#res：|(?:sys)?call<\$[0-9a-f]{8}|pause|cls|exit")
+# 参数表中的第一个字符串参数：('c001a', 1) → c001a
+_STRING_ARG = re.compile(r"\('([^']+)'")
+
+
+def _text(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理文本命令"""
+    text = line.replace("#res：", "").strip(" >")
+    if conv.pending_voice:  # 如果有语音 ID，合并到文本命令中
+        mapped = f'''
+        --------有语音区域对话-----------
+        {{"text"}},
+        text = {{
+            pagebreak = true,
+            vo = {{{{"vo", ch="li", file="{conv.asset("vo", conv.pending_voice)}"}},}},
+            ja = {{{{"{text}"}},}},
+        }}'''
+        conv.pending_voice = None
+        return mapped
+    return f'''
+        --------没有语音区域对话-----------
+        {{"text"}},
+        text = {{
+            pagebreak = true,
+            ja = {{{{"{text}"}},}},
+        }}'''
+
+
+def _bg(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理背景/立绘命令：call<$a4eb1e4c>"""
+    m = _STRING_ARG.search(line, pos)
+    if m:
+        return f'''
+        {{"bg", id=1, lv=5, file="{conv.asset("bg", m.group(1))}", time=800, path=":bg/", sync=0}},
+        {{"ex", time=500, func="wait"}}'''
+    return None
+
+
+def _narration(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理特殊旁白：syscall<$90d5298a> ('n001')"""
+    m = _STRING_ARG.search(line, pos)
+    if m:
+        return f'''
+        -----特殊旁白,默认通道1播放------  
+        {{"se",id=1,file="{conv.asset("se", "voice/" + m.group(1))}",loop=0, time=500, vol=200}}'''
+    return None
+
+
+def _se_stop(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理音频停止命令：call<$5f271e74, 0>"""
+    return '''
+        -----se停止区域------
+        {"se", stop=1, id=1, time=1000},
+        {"se", stop=1, id=2, time=1000},
+        {"se", stop=1, id=3, time=1000},
+        {"se", stop=1, id=4, time=1000},
+        -------------'''
+
+
+def _bgm_stop(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理bgm停止命令：syscall<$cf35f0e3> (800)"""
+    return '''
+        -------bgm停止区域------
+        {"bgm", stop=1, id=0, time=3000},
+        {"se", stop=1, id=5, time=1000},
+        -------------'''
+
+
+def _bgm(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理背景音乐（BGM）通道5-持续播放命令：call<$d334ba75>"""
+    m = _STRING_ARG.search(line, pos)
+    if m:
+        return f'''
+        -----BGM播放区域，默认通道5播放------
+        {{"bgm",id=0,file="{conv.asset("bgm", m.group(1))}",loop=1, time=500, vol=200}}'''
+    return None
+
+
+def _se(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理音效（SE）命令：syscall<$f62e3ca7>"""
+    m = _STRING_ARG.search(line, pos)
+    if m:
+        return f'''
+        -----SE播放区域,默认通道1播放------  
+        {{"se",id=1,file="{conv.asset("se", m.group(1))}",loop=0, time=500, vol=200}}'''
+    return None
+
+
+def _voice(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理语音命令（缓存语音 ID，等待与下一条文本合并）：call<$812afdf0>"""
+    m = _STRING_ARG.search(line, pos)
+    if m:
+        conv.pending_voice = m.group(1)
+    return None
+
+
+# 块之间唯一的状态是暂存的语音：文本行清空它，语音行（带字符串参数时）设置它
+_VOICE_STATE = re.compile(r"^\s*(?:#res：|call<\$812afdf0[^\n]*?\('([^'\n]+)')", re.M)
+
+def voice_after(content: str, voice: Optional[str] = None) -> Optional[str]:
+    """
+    转换完一段块内容后暂存的语音 ID（voice 为转换前的状态）
+
+    只扫描文本行和语音行，不做完整转换；分段并行转换时用它依次求出每段开始时的语音状态。
+    """
+    for m in _VOICE_STATE.finditer(content):
+        voice = m.group(1)
+    return voice
+
+
+def _pause(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理暂停命令"""
+    return '''
+        {"ex", time=400, func="wait"}'''
+
+
+def _cls(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理清屏命令"""
+    return '''
+        --{"msgoff"}, 
+        --{"cgdel",id=-1},
+        --{"fg", mode=-2}'''
+
+
+def _exit(conv: "Converter", line: str, pos: int) -> Optional[str]:
+    """处理退出命令"""
+    return ''''''
+
+
+# 指令键 → 处理函数
+HANDLERS: Dict[str, Callable[["Converter", str, int], Optional[str]]] = {
+    "#res：": _text,
+    "call<$a4eb1e4c": _bg,
+    "syscall<$90d5298a": _narration,
+    "call<$5f271e74": _se_stop,
+    "syscall<$cf35f0e3": _bgm_stop,
+    "call<$d334ba75": _bgm,
+    "syscall<$f62e3ca7": _se,
+    "call<$812afdf0": _voice,
+    "pause": _pause,
+    "cls": _cls,
+    "exit": _exit,
+}
+
+
+# 字符串常量与其余部分；紧凑模式只压缩字符串之外的空白
+_LUA_STRING = re.compile(r'("[^"\n]*")')
+_LUA_SPACE = re.compile(r"\s*([=,{}])\s*")
+
+def compact_command(mapped: str) -> str:
+    """
+    将 map_line() 的输出压缩为单行：去掉缩进、注释行、空白行以及字符串外的空格
+
+    注释只会单独占一行（以 -- 开头），台词总在引号内的同一行中，因此逐行处理
+    不会改动台词本身；引号不成对的行（台词中含未转义的引号）保持原样。
+    """
+    parts = []
+    for line in mapped.split("\n"):
+        line = line.strip()
+        if not line or line.startswith("--"):
+            continue
+        if line.count('"') % 2 == 0:
+            pieces = _LUA_STRING.split(line)
+            pieces[::2] = [_LUA_SPACE.sub(r"\1", piece) for piece in pieces[::2]]
+            line = "".join(pieces)
+        parts.append(line)
+    return "".join(parts).strip(",")
+
+_SE_STOP = compact_command(_se_stop(None, "", 0))
+_BGM_STOP = compact_command(_bgm_stop(None, "", 0))
+
+
+class Converter:
+    """
+    单个文件的转换状态（暂存的语音 ID、没有映射的资源名等）
+
+    每个文件使用一个新的 Converter，语音不会串到下一个文件；不同实例之间
+    不共享任何可变状态，可以在多个线程或进程中同时转换不同的文件。
+
+    典型用法:
+        blocks = Converter().convert(lines)
+    """
+
+    __slots__ = ("compact", "pending_voice", "renamer", "missing", "block", "refs")
+
+    def __init__(self, compact: bool = False, renamer: Optional[AssetRenamer] = None):
+        self.compact = compact  # 输出紧凑格式
+        self.pending_voice: Optional[str] = None  # 用来暂存语音 ID，等待与文本合并
+        self.renamer = renamer  # 资源名映射，None 表示保持原名
+        self.missing: List[Tuple[str, str]] = []  # 没有映射的 (资源类型, 文件名)
+        self.block: Optional[str] = None  # 正在转换的块编号
+        self.refs: List[Tuple[str, str, str]] = []  # 资源引用 (资源类型, 原文件名, 块编号)
+
+    def asset(self, kind: str, name: str) -> str:
+        """记录资源引用并按映射表替换文件名；没有映射时保持原名并记录"""
+        self.refs.append((kind, name, self.block))
+        if self.renamer is None:
+            return name
+        target = self.renamer.lookup(kind, name)
+        if target is None:
+            self.missing.append((kind, name))
+            return name
+        return target
+
+    def map_line(self, line: str) -> Optional[str]:
+        """将一行 MJO block 内的命令映射为 AST 命令（未匹配的命令返回 None）"""
+        line = line.strip()
+        m = _COMMAND_KEY.match(line)
+        if m is None:
+            return None
+        handler = HANDLERS.get(m.group())
+        if handler is None:
+            return None
+        return handler(self, line, m.end())
+
+    def map_block(self, lines: Iterable[str]) -> List[str]:
+        """
+        将一个块内的各行映射为 AST 命令列表
+
+        紧凑模式下省略多余的停止命令：块内自上次 se 停止后没有再播放 se 时，
+        重复的 se 停止序列不再输出；连续的 bgm 停止只保留一次。
+        """
+        mapped_lines: List[str] = []
+        se_stopped = False
+        for line in lines:
+            mapped = self.map_line(line)
+            if not mapped:
+                continue
+            if not self.compact:
+                # 命令模板以换行开头、每行缩进 8 格；去掉开头的换行和首行缩进，
+                # 由 render_block() 在各项之间加上换行和缩进，输出中不会出现空白行
+                mapped_lines.append(mapped.lstrip("\n").lstrip(" "))
+                continue
+            mapped = compact_command(mapped)
+            if mapped == _SE_STOP:
+                if se_stopped:
+                    continue
+                se_stopped = True
+            elif mapped == _BGM_STOP:
+                if mapped_lines and mapped_lines[-1] == _BGM_STOP:
+                    continue
+            elif not mapped:
+                continue
+            elif '{"se",' in mapped:
+                se_stopped = False
+            mapped_lines.append(mapped)
+        return mapped_lines
+
+    def iter_convert(self, lines: Iterable[str]) -> Iterator[Tuple[str, List[str]]]:
+        """逐块转换提取的脚本行，每读完一个块就产出 (块编号, AST 命令列表)"""
+        current_block: Optional[str] = None  # 当前正在处理的块
+        block_lines: List[str] = []
+
+        for line in lines:
+            # 如果是块的起始行，先产出上一个块
+            if line.startswith("Block"):
+                if current_block is not None:
+                    self.block = current_block
+                    yield current_block, self.map_block(block_lines)
+                current_block = line.split()[1].strip(":")
+                block_lines = []
+                continue
+
+            # 收集块内的各行，块结束时映射为 AST 命令
+            if current_block is not None:
+                block_lines.append(line)
+
+        if current_block is not None:
+            self.block = current_block
+            yield current_block, self.map_block(block_lines)
+
+    def convert(self, lines: Iterable[str]) -> Dict[str, List[str]]:
+        """将提取的脚本行（-parsed_blocks.txt 格式）转换为 AST 块"""
+        return dict(self.iter_convert(lines))
+
+    def convert_contents(self, blocks: Dict[str, str]) -> Dict[str, List[str]]:
+        """将 parse_blocks() 得到的 {块编号: 块内容} 直接转换为 AST 块（无需中间文本文件）"""
+        converted = {}
+        for block_id, content in blocks.items():
+            self.block = block_id
+            converted[block_id] = self.map_block(content.split("\n"))
+        return converted
+
+
+def map_line(line: str) -> Optional[str]:
+    """
+    单独映射一行命令（不保留语音状态，语音行与后续文本不会合并）
+
+    需要按文件转换时请使用 Converter。
+    """
+    return Converter().map_line(line)
+
+def iter_convert_blocks(lines: Iterable[str], compact: bool = False) -> Iterator[Tuple[str, List[str]]]:
+    """逐块转换提取的脚本行（每次调用使用独立的 Converter）"""
+    return Converter(compact).iter_convert(lines)
+
+def convert_blocks(lines: Iterable[str], compact: bool = False) -> Dict[str, List[str]]:
+    """将提取的脚本行转换为 AST 块"""
+    return Converter(compact).convert(lines)
+
+def convert_block_contents(blocks: Dict[str, str], compact: bool = False) -> Dict[str, List[str]]:
+    """将 parse_blocks() 得到的 {块编号: 块内容} 直接转换为 AST 块"""
+    return Converter(compact).convert_contents(blocks)
+
+# 拆分后第 2 个及之后的文件：只有表头，没有默认区域
+AST_PROLOGUE = '''astver = 2.0
+astname = "ast"
+ast = {
+'''
+
+# 引擎默认头部信息
+AST_HEADER = '''astver = 2.0
+astname = "ast"
+ast = {
+    block_00000 = {
+        {"savetitle", text="chapter-水仙"},
+        {"user", mode="autosave", no=0},
+        {"eval", exp="g.chap01=1"},
+        {"msgoff"},
+        {"cgdel", id=-1},
+        {"fg", mode=-2},
+        {"bg", id=1, lv=5, file="black", time=1500, path=":bg/", sync=0},
+        {"ex", time=1500, func="wait"},
+        -- 上面是默认区域，不要随便删除，下面开始剧情文字行的第一行消息
+    },
+'''
+
+# 最后一个块结尾：关闭画面和声音后返回
+AST_EPILOGUE = ''',
+        {"msgoff"},
+        {"ex", time=1000, func="wait"},
+        -----声音全部关闭
+        {"se", stop=1, id=1, time=1000},
+        {"se", stop=1, id=2, time=1000},
+        {"se", stop=1, id=3, time=1000},
+        {"se", stop=1, id=4, time=1000},
+        ------------
+        {"bgm", stop=1, id=0, time=1000},
+        -------------
+        {"exreturn"},
+        {"text"}'''
+
+# label 块
+AST_LABELS = '''    label = {
+        z00 = { block="block_00000", label=2 },
+        z01 = { block="block_00000", label=46 },
+        top = { block="block_00000", label=1 },
+    },
+}'''
+
+# 紧凑模式：每个块占一行，不含缩进和注释
+COMPACT_HEAD = 'astver=2.0\nastname="ast"\n'
+COMPACT_PROLOGUE = COMPACT_HEAD + 'ast={\n'
+COMPACT_DEFAULTS = compact_command(AST_HEADER.split("block_00000 = {", 1)[1].rsplit("}", 1)[0])
+COMPACT_EPILOGUE = compact_command(AST_EPILOGUE)
+COMPACT_LABELS = ('label={z00={block="block_00000",label=2},z01={block="block_00000",label=46},'
+                  'top={block="block_00000",label=1}},\n}')
+
+# 拆分后的文件：label 表只有指向本文件第一个块的 top；上一个文件末尾 jump 到这里
+CHUNK_LABELS = '''    label = {{
+        top = {{ block="block_{key}", label=1 }},
+    }},
+}}'''
+COMPACT_CHUNK_LABELS = 'label={{top={{block="block_{key}",label=1}}}},\n}}'
+JUMP_COMMAND = '{{"jump", file="{file}", label="top"}}'
+COMPACT_JUMP_COMMAND = '{{"jump",file="{file}",label="top"}}'
+
+def render_block(key: str, block_lines: List[str], index: int,
+                 prev_key: Optional[str], next_key: Optional[str], jump: Optional[str] = None) -> str:
+    """
+    生成单个块的 Lua 文本；index 为块序号，prev_key/next_key 为前后块编号（没有时为 None）
+
+    jump 为下一个拆分文件的文件名：给出时该块是本文件的最后一块，以 jump 代替结尾的关闭命令。
+    """
+    if jump is not None:
+        block_lines = block_lines + [JUMP_COMMAND.format(file=jump)]
+    if key == "00000":
+        # 将内容追加到 header 的默认区域
+        block_str = ",\n        ".join(block_lines)
+        next_block = f"block_{next_key}" if next_key is not None else ""
+        return AST_HEADER.rstrip("    },\n") + f",\n        {block_str},\n        linknext = \"{next_block}\",\n        line = 96\n    }},\n"
+
+    # 统一缩进为4个空格
+    block_str = f'    block_{key} = {{\n        ' + ",\n        ".join(block_lines)
+    if next_key is None and jump is None:
+        # 特殊处理最后一个块
+        block_str += AST_EPILOGUE
+    # 添加 linkback、linknext 和 line 信息
+    if prev_key is not None:
+        block_str += f',\n        linkback = "block_{prev_key}"'
+    if next_key is not None:
+        block_str += f',\n        linknext = "block_{next_key}"'
+    return block_str + f',\n        line = {96 + index * 2}\n    }},\n'  # 假设每个块的行号递增2
+
+def render_block_compact(key: str, block_lines: List[str], index: int,
+                         prev_key: Optional[str], next_key: Optional[str], jump: Optional[str] = None) -> str:
+    """render_block() 的紧凑版本，块内容须由 compact=True 转换得到"""
+    fields = list(block_lines)
+    if jump is not None:
+        fields.append(COMPACT_JUMP_COMMAND.format(file=jump))
+    if key == "00000":
+        fields.insert(0, COMPACT_DEFAULTS)
+        fields.append(f'linknext="block_{next_key}"' if next_key is not None else 'linknext=""')
+        fields.append("line=96")
+        return "block_00000={" + ",".join(fields) + "},\n"
+
+    if next_key is None and jump is None:
+        fields.append(COMPACT_EPILOGUE)
+    if prev_key is not None:
+        fields.append(f'linkback="block_{prev_key}"')
+    if next_key is not None:
+        fields.append(f'linknext="block_{next_key}"')
+    fields.append(f"line={96 + index * 2}")
+    return f"block_{key}={{" + ",".join(fields) + "},\n"
+
+def iter_ast(blocks: Iterable[Tuple[str, List[str]]], compact: bool = False,
+             start: int = 0, jump: Optional[str] = None, shared: Shared = ()) -> Iterator[str]:
+    """
+    流式生成 AST 文本，每处理完一个块就产出对应的 Lua 片段
+
+    blocks 须按块编号顺序给出。只向前多读一个块（用于确定 linknext），
+    产出的文本不含空白行。
+    compact=True 时输出不含缩进和注释的紧凑格式（块内容也须以 compact=True 转换）。
+
+    生成拆分文件时，start 为第一个块在整个脚本中的序号（> 0 时不输出默认区域，
+    第一个块没有 linkback，label 表只含 top），jump 为下一个文件的文件名。
+    shared 为 intern_blocks() 给出的共享命令，在 ast 表之前定义（仅紧凑格式）。
+    """
+    pending = iter(blocks)
+    current = next(pending, None)
+    first_key = current[0] if current is not None else None
+    yield ast_head(first_key, compact, start, shared)
+    if current is not None:
+        yield from render_blocks(itertools.chain((current,), pending), compact, start, jump=jump)
+    yield ast_tail(first_key, compact, start)
+
+def ast_head(first_key: Optional[str], compact: bool = False, start: int = 0, shared: Shared = ()) -> str:
+    """AST 开头到第一个块之前的部分；first_key 为第一个块的编号（没有块时为 None）"""
+    if compact:
+        head = COMPACT_HEAD + declare(shared) + "ast={\n" if shared else COMPACT_PROLOGUE
+        if start == 0 and first_key != "00000":
+            head += "block_00000={" + COMPACT_DEFAULTS + "},\n"
+        return head
+    if start > 0:
+        return AST_PROLOGUE
+    return AST_HEADER if first_key != "00000" else ""  # 有 00000 块时头部随该块一起生成
+
+def ast_tail(first_key: Optional[str], compact: bool = False, start: int = 0) -> str:
+    """最后一个块之后的 label 表和结尾"""
+    if start > 0 and first_key is not None:
+        return (COMPACT_CHUNK_LABELS if compact else CHUNK_LABELS).format(key=first_key)
+    return COMPACT_LABELS if compact else AST_LABELS
+
+def render_blocks(blocks: Iterable[Tuple[str, List[str]]], compact: bool = False, index: int = 0,
+                  prev_key: Optional[str] = None, after_key: Optional[str] = None,
+                  jump: Optional[str] = None) -> Iterator[str]:
+    """
+    逐块生成一段连续块的 Lua 文本
+
+    index 为第一个块在整个脚本中的序号，prev_key/after_key 为这段块之前、之后紧邻的
+    块编号（没有时为 None），用于首尾两块的 linkback/linknext；分段生成后直接拼接，
+    与整体生成的结果相同。
+    """
+    pending = iter(blocks)
+    current = next(pending, None)
+    while current is not None:
+        following = next(pending, None)
+        key, block_lines = current
+        next_key = following[0] if following is not None else after_key
+        block_jump = jump if following is None else None
+        if compact:
+            yield render_block_compact(key, block_lines, index, prev_key, next_key, block_jump)
+        else:
+            yield render_block(key, block_lines, index, prev_key, next_key, block_jump)
+        prev_key, current = key, following
+        index += 1
+
+def write_ast(blocks: Iterable[Tuple[str, List[str]]], stream: TextIO, compact: bool = False) -> None:
+    """将 iter_ast() 的输出逐块写入文件对象"""
+    for chunk in iter_ast(blocks, compact):
+        stream.write(chunk)
+
+def build_ast(blocks: Dict[str, List[str]], compact: bool = False) -> str:
+    """将所有块拼装为 AST Lua 表"""
+    return "".join(iter_ast(((key, blocks[key]) for key in sorted(blocks.keys())), compact))
+
+def chunk_file_name(ast_name: str, number: int) -> str:
+    """拆分文件名：第 0 个仍为 4novel.ast，之后为 4novel_part01.ast、4novel_part02.ast ..."""
+    if number == 0:
+        return ast_name
+    stem, ext = os.path.splitext(ast_name)
+    return f"{stem}_part{number:02d}{ext}"
+
+def plan_chunks(blocks: List[Tuple[str, List[str]]], chunk_size: int) -> List[List[Tuple[str, List[str]]]]:
+    """
+    按块内容的 UTF-8 字节数在块边界处分组，每组累计不超过 chunk_size
+
+    单个块超过 chunk_size 时独占一组；chunk_size <= 0 表示不拆分。
+    """
+    if chunk_size <= 0:
+        return [blocks]
+    chunks: List[List[Tuple[str, List[str]]]] = [[]]
+    size = 0
+    for block in blocks:
+        block_size = sum(len(line.encode("utf-8")) for line in block[1])
+        if chunks[-1] and size + block_size > chunk_size:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(block)
+        size += block_size
+    return chunks
+
+def build_ast_chunks(blocks: Dict[str, List[str]], ast_name: str, chunk_size: int,
+                     compact: bool = False, intern: bool = False) -> List[Tuple[str, str]]:
+    """
+    将所有块拼装为一个或多个 AST 文件，返回 [(文件名, 内容)]
+
+    每个文件的块内容累计不超过 chunk_size 字节（在块边界处拆分）；前一个文件的
+    最后一块 jump 到下一个文件的 top 标签，行号与不拆分时相同。只有一个文件时
+    内容与 build_ast() 完全相同。
+
+    intern=True 时（须为紧凑格式）每个文件各自共享其中重复的命令。
+    """
+    if intern and not compact:
+        raise ValueError("共享重复命令只适用于紧凑格式")
+    ordered = [(key, blocks[key]) for key in sorted(blocks.keys())]
+    chunks = plan_chunks(ordered, chunk_size)
+    files = []
+    start = 0
+    for number, chunk in enumerate(chunks):
+        jump = chunk_file_name(os.path.basename(ast_name), number + 1) if number + 1 < len(chunks) else None
+        shared: Shared = []
+        if intern:
+            shared, interned = intern_blocks(dict(chunk))
+            chunk = sorted(interned.items())
+        files.append((chunk_file_name(ast_name, number), "".join(iter_ast(chunk, compact, start, jump, shared))))
+        start += len(chunk)
+    return files
+
+def write_ast_chunks(files: List[Tuple[str, str]]) -> None:
+    """写出 build_ast_chunks() 的结果，并删除上次拆分留下、本次已不需要的 _partNN 文件"""
+    for path, text in files:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    remove_stale_chunks(files[0][0], len(files))
+
+def remove_stale_chunks(ast_path: str, count: int) -> None:
+    """删除 ast_path 的第 count 个及之后的拆分文件（之前拆得更多或本次不再拆分时残留的）"""
+    while os.path.exists(chunk_file_name(ast_path, count)):
+        os.remove(chunk_file_name(ast_path, count))
+        count += 1
@@ -0,0 +1,281 @@
+"""
+第 3 步（块提取、AST 生成）的无界面实现
+
+blocks: 合并后的 .txt 脚本 → -parsed_blocks.txt 块文件
+ast:    -parsed_blocks.txt 块文件 → .ast 引擎脚本
+
+不依赖 tkinter，可在无图形界面的服务器上运行；加 --gui 时才导入 tkinter
+并打开原来的图形界面（日志由后台线程分批送到界面）。
+
+用法:
+    python -m majiro_artemis.extract blocks [mjo原生脚本] [mjo原生脚本提取块内容]
+    python -m majiro_artemis.extract ast [mjo原生脚本提取块内容] [转录的Artemis引擎脚本] [--compact]
+        [--map bgm=附加补充脚本/other-list.txt] [--split-size 262144] [--intern]
+    python -m majiro_artemis.extract ast --gui
+"""
+
+import argparse
+import os
+import sys
+import traceback
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .assetindex import AssetIndex, Ref, index_path
+from .assets import AssetRenamer, load_mapping, parse_map_spec, write_reports
+from .blockindex import BlockIndex
+from .blocks import format_blocks, parse_blocks
+from .cache import MANIFEST_NAME, BuildCache
+from .converter import (Converter, build_ast, build_ast_chunks, convert_blocks, remove_stale_chunks,
+                        write_ast, write_ast_chunks)
+
+__all__ = [
+    "parse_blocks", "convert_blocks", "build_ast",
+    "extract_file", "extract_directory", "process_file", "convert_directory", "main",
+]
+
+# 默认目录（相对于当前工作目录，与原 GUI 脚本一致）
+BLOCKS_INPUT_DIR = "mjo原生脚本"
+BLOCKS_OUTPUT_DIR = "mjo原生脚本提取块内容"
+AST_OUTPUT_DIR = "转录的Artemis引擎脚本"
+AST_LOG_NAME = "conversion_log.txt"
+
+# 日志回调：接收一行日志（不含换行符）
+LogFunc = Callable[[str], None]
+
+
+def extract_file(input_file: str, output_file: str) -> None:
+    """
+    解析单个脚本的块并写出 -parsed_blocks.txt
+
+    同时在脚本旁生成块偏移索引（.blkidx），后续工具可据此按编号直接读取任意块；
+    输入目录不可写时不生成索引，块文件照常写出。
+    """
+    with BlockIndex(input_file) as index:
+        blocks = index.blocks()
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(format_blocks(blocks))
+
+
+def extract_directory(input_dir: str, output_dir: str, log: LogFunc = print,
+                      rebuild: bool = False) -> Tuple[int, int]:
+    """
+    批量处理指定目录及其子目录中的所有 .txt 文件
+
+    Returns:
+        (成功数, 失败数)，未变化而跳过的文件不计入
+    """
+    cache = BuildCache(os.path.join(output_dir, MANIFEST_NAME), rebuild=rebuild)
+    done = failed = 0
+    try:
+        for root, _, files in os.walk(input_dir):
+            relative_path = os.path.relpath(root, input_dir)
+            output_subdir = os.path.join(output_dir, relative_path)
+            for file in sorted(files):
+                if not file.endswith(".txt"):
+                    continue
+                input_file = os.path.join(root, file)
+                os.makedirs(output_subdir, exist_ok=True)
+                output_file = os.path.join(output_subdir, f"{os.path.splitext(file)[0]}-parsed_blocks.txt")
+
+                # 内容未变化则跳过
+                if cache.fresh("blocks", [input_file], [output_file]):
+                    continue
+                try:
+                    extract_file(input_file, output_file)
+                except Exception:
+                    failed += 1
+                    log(f"处理文件时出错: {input_file}\n错误信息: {traceback.format_exc()}")
+                    continue
+                cache.record("blocks", [input_file], [output_file])
+                done += 1
+                log(f"解析完成: {input_file} -> {output_file}")
+    finally:
+        cache.save()
+    log(cache.report())
+    return done, failed
+
+
+def ast_file_name(blocks_name: str) -> str:
+    """decrypted_nar1_00-parsed_blocks.txt → nar1_00.ast"""
+    simplified_name = blocks_name.replace("decrypted_", "").replace("-parsed_blocks", "")
+    return os.path.splitext(simplified_name)[0] + ".ast"
+
+
+def process_file(input_file: str, output_file: str, compact: bool = False,
+                 renamer: Optional[AssetRenamer] = None,
+                 refs: Optional[List[Ref]] = None, split_size: int = 0,
+                 outputs: Optional[List[str]] = None, intern: bool = False) -> List[Tuple[str, str]]:
+    """
+    处理单个块文件并生成 AST（逐块读取、转换并写出），返回没有映射的 (资源类型, 文件名)
+
+    给出 refs 时追加该文件的资源引用 (资源类型, 原文件名, 块编号)。
+    split_size 大于 0 或 intern=True（共享重复的命令，须为紧凑格式）时先读入全部块，
+    再在块边界处拆分为多个文件；给出 outputs 时追加写出的所有 .ast 路径。
+    """
+    converter = Converter(compact, renamer)
+    with open(input_file, "r", encoding="utf-8") as src:
+        if split_size > 0 or intern:
+            ast_files = build_ast_chunks(dict(converter.iter_convert(src)), output_file, split_size, compact,
+                                         intern)
+            write_ast_chunks(ast_files)
+            written = [path for path, _ in ast_files]
+        else:
+            with open(output_file, "w", encoding="utf-8") as out:
+                write_ast(converter.iter_convert(src), out, compact)
+            remove_stale_chunks(output_file, 1)
+            written = [output_file]
+    if outputs is not None:
+        outputs.extend(written)
+    if refs is not None:
+        refs.extend(converter.refs)
+    return converter.missing
+
+
+def ast_config(compact: bool = False, renamer: Optional[AssetRenamer] = None,
+               split_size: int = 0, intern: bool = False) -> Optional[Dict[str, object]]:
+    """影响生成的 AST 的转换选项（记入增量构建缓存，选项变化后重新生成）；全为默认值时返回 None"""
+    config: Dict[str, object] = {}
+    if compact:
+        config["compact"] = True
+    if renamer is not None:
+        config["assets"] = renamer.tables
+    if split_size > 0:
+        config["split_size"] = split_size
+    if intern:
+        config["intern"] = True
+    return config or None
+
+
+def convert_directory(input_dir: str, output_dir: str, log: LogFunc = print,
+                      compact: bool = False, rebuild: bool = False,
+                      renamer: Optional[AssetRenamer] = None,
+                      missing: Optional[Dict[str, Set[str]]] = None,
+                      split_size: int = 0, intern: bool = False) -> Tuple[int, int]:
+    """
+    批量将块文件转换为 AST，输出目录保持与输入相同的子目录结构
+
+    给出 renamer 时生成 AST 的同时替换资源文件名，没有映射的文件名按类型加入 missing。
+    同时更新输出目录下的资源引用索引（.mjassets）。split_size、intern 见 process_file()。
+
+    Returns:
+        (成功数, 失败数)，未变化而跳过的文件不计入
+    """
+    cache = BuildCache(os.path.join(output_dir, MANIFEST_NAME), rebuild=rebuild)
+    config = ast_config(compact, renamer, split_size, intern)
+    index = AssetIndex.load(index_path(output_dir))
+    scripts = []
+    done = failed = 0
+    try:
+        for root_dir, _, files in os.walk(input_dir):
+            relative_path = os.path.relpath(root_dir, input_dir)
+            output_subdir = os.path.join(output_dir, relative_path)
+            for file_name in sorted(files):
+                if not file_name.endswith(".txt"):
+                    continue
+                input_file = os.path.join(root_dir, file_name)
+                os.makedirs(output_subdir, exist_ok=True)
+                output_file = os.path.join(output_subdir, ast_file_name(file_name))
+                script = os.path.relpath(output_file, output_dir)
+                scripts.append(script)
+
+                # 块文件和生成的 AST 都未变化、且资源索引中已有记录则跳过
+                if cache.fresh("ast", [input_file], [output_file], config) and script in index:
+                    continue
+                refs: List[Ref] = []
+                outputs: List[str] = []
+                try:
+                    file_missing = process_file(input_file, output_file, compact, renamer, refs,
+                                                split_size, outputs, intern)
+                except Exception:
+                    failed += 1
+                    log(f"处理文件时出错: {input_file}\n错误信息: {traceback.format_exc()}")
+                    continue
+                cache.record("ast", [input_file], outputs, config)
+                index.add(script, refs)
+                if missing is not None:
+                    for kind, name in file_missing:
+                        missing.setdefault(kind, set()).add(name)
+                done += 1
+                log(f"转换完成: {input_file} -> {output_file}")
+    finally:
+        cache.save()
+        index.retain(scripts)
+        index.save(index_path(output_dir))
+    log(cache.report())
+    return done, failed
+
+
+def run_command(args: argparse.Namespace, log: LogFunc) -> Tuple[str, int]:
+    """执行子命令，返回 (完成提示, 失败数)"""
+    if not os.path.exists(args.input):
+        raise FileNotFoundError(f"输入目录不存在: {args.input}")
+    os.makedirs(args.output, exist_ok=True)
+
+    if args.command == "blocks":
+        done, failed = extract_directory(args.input, args.output, log, args.rebuild)
+        return f"所有文件解析完成！成功 {done} 个，失败 {failed} 个", failed
+
+    if args.intern and not args.compact:
+        raise ValueError("--intern 需要与 --compact 一起使用")
+    # 日志同时保存到输出目录的 conversion_log.txt
+    lines: List[str] = []
+
+    def log_and_keep(line: str) -> None:
+        lines.append(line)
+        log(line)
+
+    renamer = None
+    if args.map:
+        renamer = AssetRenamer({kind: load_mapping(path) for kind, path in map(parse_map_spec, args.map)})
+    missing: Dict[str, Set[str]] = {}
+    done, failed = convert_directory(args.input, args.output, log_and_keep, args.compact, args.rebuild,
+                                     renamer, missing, args.split_size, args.intern)
+    for path in write_reports(args.output, missing, []):
+        log_and_keep(f"没有映射的资源名已保存到: {path}")
+    with open(os.path.join(args.output, AST_LOG_NAME), "w", encoding="utf-8") as f:
+        f.write("".join(line + "\n" for line in lines))
+    return f"所有文件处理完成！成功 {done} 个，失败 {failed} 个", failed
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="MJO 块提取 / Artemis AST 生成（无界面）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    blocks = commands.add_parser("blocks", help="合并后的 .txt 脚本 → -parsed_blocks.txt 块文件")
+    blocks.add_argument("input", nargs="?", default=BLOCKS_INPUT_DIR, help="输入目录")
+    blocks.add_argument("output", nargs="?", default=BLOCKS_OUTPUT_DIR, help="输出目录")
+
+    ast = commands.add_parser("ast", help="-parsed_blocks.txt 块文件 → .ast 引擎脚本")
+    ast.add_argument("input", nargs="?", default=BLOCKS_OUTPUT_DIR, help="输入目录")
+    ast.add_argument("output", nargs="?", default=AST_OUTPUT_DIR, help="输出目录")
+    ast.add_argument("--compact", action="store_true", help="输出不含缩进和注释的紧凑 AST")
+    ast.add_argument("--map", action="append", metavar="类型=文件",
+                     help="生成 AST 时替换资源文件名（bgm/se/vo/bg），可重复，例如 --map bgm=other-list.txt")
+    ast.add_argument("--split-size", type=int, default=0, metavar="BYTES",
+                     help="块内容超过该字节数的脚本在块边界处拆分为多个 .ast（默认不拆分）")
+    ast.add_argument("--intern", action="store_true", help="把每个文件中重复的命令提为 local 变量共享（需 --compact）")
+
+    for sub in (blocks, ast):
+        sub.add_argument("--rebuild", action="store_true", help="忽略增量缓存，全部重新处理")
+        sub.add_argument("--gui", action="store_true", help="打开图形界面（需要 tkinter）")
+        sub.add_argument("--title", help="图形界面窗口标题")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.gui:
+        from .gui import run_window  # 只有需要界面时才导入 tkinter
+        return run_window(args, run_command)
+
+    try:
+        message, failed = run_command(args, print)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"错误: {e}")
+        return 1
+    print(message)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
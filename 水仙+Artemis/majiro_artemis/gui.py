@@ -0,0 +1,99 @@
+"""
+extract 命令的图形界面（tkinter）
+
+处理在后台线程中进行，日志先放入队列，由界面定时批量取出后一次性插入文本框，
+处理大量文件时界面不会卡住。只有 majiro_artemis.extract --gui 才会导入本模块。
+"""
+
+import argparse
+import queue
+import threading
+import tkinter as tk
+import traceback
+from tkinter import messagebox, scrolledtext
+from typing import Callable, List, Optional, Tuple
+
+# 界面刷新间隔（毫秒）
+POLL_INTERVAL = 100
+
+WINDOW_TEXT = {
+    "blocks": ("MJO 脚本解析工具", "点击下方按钮开始解析:", "开始解析"),
+    "ast": ("MJO 转换工具", "点击下方按钮选择文件并开始转换:", "选择文件并开始转换"),
+}
+
+RunFunc = Callable[[argparse.Namespace, Callable[[str], None]], Tuple[str, int]]
+
+
+def run_window(args: argparse.Namespace, run: RunFunc) -> int:
+    """打开窗口，点击按钮后在后台线程中执行 run(args, log)，窗口关闭后返回"""
+    title, prompt, button_text = WINDOW_TEXT[args.command]
+    root = tk.Tk()
+    root.title(args.title or title)
+
+    frame = tk.Frame(root)
+    frame.pack(padx=10, pady=10)
+
+    label = tk.Label(frame, text=prompt)
+    label.pack()
+
+    start_button = tk.Button(frame, text=button_text)
+    start_button.pack(pady=5)
+
+    # 紧凑输出：不含缩进和注释，文件更小
+    compact_var: Optional[tk.BooleanVar] = None
+    if hasattr(args, "compact"):
+        compact_var = tk.BooleanVar(value=args.compact)
+        tk.Checkbutton(frame, text="紧凑输出（不含缩进和注释）", variable=compact_var).pack()
+
+    log_widget = scrolledtext.ScrolledText(frame, width=80, height=20, state='normal')
+    log_widget.pack(pady=5)
+
+    log_queue: "queue.Queue[str]" = queue.Queue()
+    # 后台线程结束时放入 (完成提示, 错误信息)
+    finished: "queue.Queue[Tuple[Optional[str], Optional[str]]]" = queue.Queue()
+
+    def worker() -> None:
+        try:
+            message, _ = run(args, log_queue.put)
+            finished.put((message, None))
+        except FileNotFoundError as e:
+            finished.put((None, str(e)))
+        except Exception:
+            finished.put((None, traceback.format_exc()))
+
+    def drain() -> None:
+        """取出队列中积累的全部日志，一次性插入文本框"""
+        lines: List[str] = []
+        while True:
+            try:
+                lines.append(log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            log_widget.insert(tk.END, "".join(line + "\n" for line in lines))
+            log_widget.see(tk.END)
+
+    def poll() -> None:
+        drain()
+        try:
+            message, error = finished.get_nowait()
+        except queue.Empty:
+            root.after(POLL_INTERVAL, poll)
+            return
+        start_button.config(state=tk.NORMAL)
+        if error is None:
+            messagebox.showinfo("完成", message)
+        else:
+            messagebox.showerror("错误", error)
+
+    def start_processing() -> None:
+        if compact_var is not None:
+            args.compact = compact_var.get()
+        log_widget.delete(1.0, tk.END)
+        start_button.config(state=tk.DISABLED)
+        threading.Thread(target=worker, daemon=True).start()
+        root.after(POLL_INTERVAL, poll)
+
+    start_button.config(command=start_processing)
+    root.mainloop()
+    return 0
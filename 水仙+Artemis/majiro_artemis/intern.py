@@ -0,0 +1,99 @@
+"""
+紧凑 AST 中重复命令的共享（local 变量）
+
+map_line() 对同一种指令总是生成相同的命令表，例如 {"ex",time=400,func="wait"}、
+四条 {"se",stop=1,...} 组成的 SE 停止区域、{"text"} 等，在一个脚本中会重复上千次。
+intern_blocks() 统计脚本中每条命令出现的次数，把重复得最多（节省字节最多）的命令
+提到 ast 表之前定义为 local 变量，块中只引用变量名:
+    local c1={"ex",time=400,func="wait"}
+    ast={
+    block_00001={c1,{"text"},text={...},...},
+这样既缩小了文件，引擎加载时这些命令表也只构造一次。多条命令组成的序列
+（如 SE 停止区域）按每条命令分别共享，块仍是平铺的命令列表，结构与原来相同。
+
+Lua 的每个函数最多 200 个 local 变量，每个文件最多共享 MAX_SHARED 条命令。
+各块引用的是同一个表，前提是引擎只读取命令表而不修改它。
+只用于紧凑格式（块内容须由 compact=True 转换得到）。
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# 每个文件最多定义的 local 变量数（Lua 上限为 200，留出余量）
+MAX_SHARED = 180
+
+# 字符串和结构字符；字符串内的 {},= 不参与计数
+_TOKEN = re.compile(r'"[^"\n]*"|[{},]')
+
+# 共享的命令: [(变量名, 命令)]
+Shared = List[Tuple[str, str]]
+
+
+def split_commands(entry: str) -> Optional[List[str]]:
+    """
+    按最外层的逗号把块中的一项拆成各条命令
+
+    {"bg",...},{"ex",...} → ['{"bg",...}', '{"ex",...}']；
+    引号或括号不成对（例如台词中含未转义的引号）时返回 None。
+    """
+    if entry.count('"') % 2:
+        return None
+    commands = []
+    depth = 0
+    start = 0
+    for m in _TOKEN.finditer(entry):
+        token = m.group()
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif token == "," and depth == 0:
+            commands.append(entry[start:m.start()])
+            start = m.end()
+    if depth != 0:
+        return None
+    commands.append(entry[start:])
+    return commands
+
+
+def _saving(command: str, count: int, name: str) -> int:
+    """共享一条命令节省的字节数（减去 local 定义本身的长度）"""
+    return count * (len(command) - len(name)) - len(f"local {name}={command}\n")
+
+
+def intern_blocks(blocks: Dict[str, List[str]],
+                  limit: int = MAX_SHARED) -> Tuple[Shared, Dict[str, List[str]]]:
+    """
+    找出重复的命令并改写各块，返回 (共享的命令, 改写后的块)
+
+    只共享以 { 开头的命令表（text={...} 这类具名项保持原样），按节省的字节数
+    从大到小取前 limit 条，变量名依次为 c1、c2 ...
+    """
+    split = {key: [split_commands(entry) for entry in lines] for key, lines in blocks.items()}
+    counts = Counter(command for entries in split.values() for commands in entries if commands
+                     for command in commands if command.startswith("{"))
+    ranked = sorted((command for command, count in counts.items() if count > 1),
+                    key=lambda command: (-_saving(command, counts[command], "c00"), command))
+    shared: Shared = []
+    for command in ranked[:limit]:
+        name = f"c{len(shared) + 1}"
+        if _saving(command, counts[command], name) <= 0:
+            break
+        shared.append((name, command))
+    if not shared:
+        return shared, blocks
+
+    names = {command: name for name, command in shared}
+    interned = {}
+    for key, lines in blocks.items():
+        interned[key] = [entry if commands is None else ",".join(names.get(command, command) for command in commands)
+                         for entry, commands in zip(lines, split[key])]
+    return shared, interned
+
+
+def declare(shared: Shared) -> str:
+    """共享命令的 local 定义，放在 ast 表之前"""
+    return "".join(f"local {name}={command}\n" for name, command in shared)
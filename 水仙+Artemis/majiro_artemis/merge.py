@@ -0,0 +1,61 @@
+"""
+把 .sjs 资源字符串合并回 .mjs 指令中的 #res<N> 引用
+
+资源表是按资源编号下标访问的列表（缺号处为 None）；替换时对整个文件
+做一次 split/join，不再逐行调用 re.sub。
+"""
+
+import re
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+# 整个 .sjs 文本中的一行资源：<N> 内容（忽略行首尾空白）
+SJS_LINE = re.compile(r'^[^\S\n]*<(\d+)>[^\S\n]*(.*?)[^\S\n]*$', re.MULTILINE)
+RES_REF = re.compile(r'#res<(\d+)>')
+
+# 资源表：下标为资源编号
+ResTable = List[Optional[str]]
+
+
+def parse_sjs_text(text: str) -> ResTable:
+    """解析 .sjs 文本为资源表（保留原始转义字符；编号重复时以后出现的为准）"""
+    entries = [(int(num), content) for num, content in SJS_LINE.findall(text)]
+    table: ResTable = [None] * (max((num for num, _ in entries), default=-1) + 1)
+    for num, content in entries:
+        table[num] = content
+    return table
+
+
+def parse_sjs(sjs_path) -> ResTable:
+    """解析.sjs文件为资源表（保留原始转义字符）"""
+    with open(sjs_path, 'r', encoding='utf-8') as f:
+        return parse_sjs_text(f.read())
+
+
+def merge_res(mjs_text: str, sjs_data: Sequence[Optional[str]], template: str = "#res<{}>") -> str:
+    """
+    替换 mjs 文本中的 #res<N> 引用（资源表中没有的编号保留编号本身）
+
+    Args:
+        template: 替换格式，默认保持 #res<文本>；
+                  传入 "#res：{}>" 可直接得到块划分所用的文本行格式
+    """
+    prefix, suffix = template.split("{}", 1)
+    size = len(sjs_data)
+    parts = RES_REF.split(mjs_text)  # [文本, 编号, 文本, 编号, ..., 文本]
+    for i in range(1, len(parts), 2):
+        num = int(parts[i])
+        content = sjs_data[num] if num < size else None
+        parts[i] = prefix + (parts[i] if content is None else content) + suffix
+    return "".join(parts)
+
+
+def process_mjs(mjs_path, sjs_data: Sequence[Optional[str]], output_dir) -> Path:
+    """处理单个.mjs文件（一次读入、一次写出）"""
+    mjs_path = Path(mjs_path)
+    output_path = Path(output_dir) / (mjs_path.stem + ".txt")
+    with open(mjs_path, 'r', encoding='utf-8') as infile:
+        content = infile.read()
+    with open(output_path, 'w', encoding='utf-8') as outfile:
+        outfile.write(merge_res(content, sjs_data))
+    return output_path
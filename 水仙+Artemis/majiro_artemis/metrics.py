@@ -0,0 +1,146 @@
+"""
+逐阶段计时与指标导出
+
+每个文件的每个阶段（decrypt、disasm、transcode、merge、split、ast、bgm）记录
+墙钟时间、CPU 时间、输入/输出字节数；反汇编阶段额外统计各操作码的指令数。
+可选用 tracemalloc 记录每个阶段的内存分配峰值，或用 cProfile 为每个文件
+生成 .prof 文件。结果写成 JSON，并可输出最慢的 N 个文件。
+
+Metrics 只保存普通的列表和字典，可以从进程池的工作进程返回后合并。
+
+典型用法:
+    metrics = Metrics()
+    with metrics.stage("decrypt", path, len(data)) as record:
+        decrypted = decrypt_mjo(data)
+        record["bytes_out"] = len(decrypted)
+    metrics.write("metrics.json")
+    print(metrics.summary())
+"""
+
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple, Union
+
+METRICS_FORMAT = 1
+
+# 字节数可以直接给出，也可以给出内容本身（文本按 UTF-8 计算）
+Size = Union[int, str, bytes]
+
+
+def _nbytes(value: Size) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(value)
+
+
+class Metrics:
+    """逐阶段指标收集器"""
+
+    def __init__(self, trace_memory: bool = False, profile_dir: Optional[str] = None):
+        self.records: List[Dict[str, Any]] = []
+        self.opcodes: Counter = Counter()
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, file: str, bytes_in: Size = 0) -> Iterator[Dict[str, Any]]:
+        """计时一个阶段；可在 with 块内设置 record["bytes_out"]（字节数或输出内容）"""
+        record: Dict[str, Any] = {"stage": name, "file": file, "bytes_in": bytes_in, "bytes_out": 0}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield record
+        finally:
+            record["cpu"] = time.thread_time() - cpu
+            record["wall"] = time.perf_counter() - wall
+            record["bytes_in"] = _nbytes(record["bytes_in"])
+            record["bytes_out"] = _nbytes(record["bytes_out"])
+            if self.trace_memory:
+                record["peak_alloc"] = tracemalloc.get_traced_memory()[1] - base
+            self.records.append(record)
+
+    @contextmanager
+    def profile(self, file: str) -> Iterator[None]:
+        """设置了 profile_dir 时，用 cProfile 记录整个文件的处理过程"""
+        if not self.profile_dir:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, os.path.basename(file) + ".prof"))
+
+    def count_opcodes(self, counts: Counter) -> None:
+        self.opcodes.update(counts)
+
+    def merge(self, other: "Metrics") -> None:
+        """合并另一个收集器（例如工作进程返回的）"""
+        self.records.extend(other.records)
+        self.opcodes.update(other.opcodes)
+
+    def stage_totals(self) -> Dict[str, Dict[str, float]]:
+        totals: Dict[str, Dict[str, float]] = {}
+        for record in self.records:
+            total = totals.setdefault(record["stage"], {"files": 0, "wall": 0.0, "cpu": 0.0,
+                                                        "bytes_in": 0, "bytes_out": 0})
+            total["files"] += 1
+            for key in ("wall", "cpu", "bytes_in", "bytes_out"):
+                total[key] += record[key]
+        return totals
+
+    def slowest(self, count: int = 10) -> List[Tuple[str, float]]:
+        """各阶段墙钟时间之和最大的 count 个文件"""
+        per_file: Counter = Counter()
+        for record in self.records:
+            per_file[record["file"]] += record["wall"]
+        return per_file.most_common(count)
+
+    def to_dict(self, top: int = 10) -> Dict[str, Any]:
+        return {
+            "format": METRICS_FORMAT,
+            "stages": self.stage_totals(),
+            "slowest": [{"file": file, "wall": wall} for file, wall in self.slowest(top)],
+            "opcodes": {f"0x{opcode:03x}": count for opcode, count in sorted(self.opcodes.items())},
+            "records": self.records,
+        }
+
+    def write(self, path: str, top: int = 10) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(top), f, ensure_ascii=False, indent=1)
+
+    def summary(self, top: int = 10) -> str:
+        lines = ["各阶段耗时："]
+        for name, total in self.stage_totals().items():
+            lines.append(f"  {name:<10}{total['files']:>6} 个文件  墙钟 {total['wall']:8.3f}s  "
+                         f"CPU {total['cpu']:8.3f}s  输入 {total['bytes_in'] / 1048576:8.2f} MB  "
+                         f"输出 {total['bytes_out'] / 1048576:8.2f} MB")
+        slowest = self.slowest(top)
+        if slowest:
+            lines.append(f"最慢的 {len(slowest)} 个文件：")
+            lines.extend(f"  {wall * 1000:9.1f} ms  {file}" for file, wall in slowest)
+        return "\n".join(lines)
+
+
+def measure(metrics: Optional[Metrics], name: str, file: str, bytes_in: Size = 0) -> ContextManager[Dict[str, Any]]:
+    """metrics 为 None 时不计时，with 块内对 record 的赋值被直接丢弃"""
+    if metrics is None:
+        return nullcontext({})
+    return metrics.stage(name, file, bytes_in)
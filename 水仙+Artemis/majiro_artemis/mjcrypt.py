@@ -0,0 +1,151 @@
+"""
+Majiro MJO 脚本解密（纯 Python 实现，替代 mjcrypt.exe）
+
+加密的 .mjo 文件签名为 MajiroObjX1.000，字节码区与 CRC32 查表
+生成的 1024 字节密钥流循环异或；解密后签名改为 MajiroObjV1.000。
+
+用法:
+    python -m majiro_artemis.mjcrypt 原始mjo文件 解密mjo文件
+"""
+
+import argparse
+import os
+import struct
+import sys
+from typing import List, Tuple
+
+SIGNATURE_ENCRYPTED = b"MajiroObjX1.000\x00"
+SIGNATURE_DECRYPTED = b"MajiroObjV1.000\x00"
+SIGNATURE_SIZE = len(SIGNATURE_ENCRYPTED)
+
+KEY_SIZE = 1024
+
+
+def _build_key() -> bytes:
+    """生成 CRC32 查表（多项式 0xEDB88320）并按小端拼成 1024 字节密钥流"""
+    table = []
+    for i in range(256):
+        value = i
+        for _ in range(8):
+            value = (value >> 1) ^ 0xEDB88320 if value & 1 else value >> 1
+        table.append(value)
+    return struct.pack("<256I", *table)
+
+
+# 密钥流只在模块加载时生成一次
+KEY = _build_key()
+
+
+class MjoFormatError(ValueError):
+    """文件不是合法的 MJO 脚本"""
+
+
+def bytecode_offset(data: bytes) -> int:
+    """
+    根据文件头计算字节码区的起始偏移
+
+    文件头结构: 签名(16) + 入口偏移(4) + 行数(4) + 函数数(4)
+               + 函数表(函数数 * 8) + 字节码长度(4)
+    """
+    if len(data) < SIGNATURE_SIZE + 12:
+        raise MjoFormatError("文件过短，缺少 MJO 文件头")
+    (function_count,) = struct.unpack_from("<I", data, SIGNATURE_SIZE + 8)
+    offset = SIGNATURE_SIZE + 12 + function_count * 8
+    if len(data) < offset + 4:
+        raise MjoFormatError(f"函数表越界（函数数 {function_count}）")
+    (size,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    if len(data) < offset + size:
+        raise MjoFormatError(f"字节码长度越界（声明 {size} 字节，实际 {len(data) - offset} 字节）")
+    return offset
+
+
+def xor_keystream(buffer: bytes) -> bytes:
+    """将整段缓冲区与密钥流做一次大整数异或（加密和解密是同一操作）"""
+    size = len(buffer)
+    if not size:
+        return b""
+    stream = (KEY * (size // KEY_SIZE + 1))[:size]
+    value = int.from_bytes(buffer, "little") ^ int.from_bytes(stream, "little")
+    return value.to_bytes(size, "little")
+
+
+def _transform(data: bytes, source_sig: bytes, target_sig: bytes) -> bytes:
+    signature = bytes(data[:SIGNATURE_SIZE])
+    if signature == target_sig:
+        return bytes(data)  # 已经是目标格式，原样返回
+    if signature != source_sig:
+        raise MjoFormatError(f"未知的文件签名: {signature!r}")
+    start = bytecode_offset(data)
+    (size,) = struct.unpack_from("<I", data, start - 4)
+    return b"".join((
+        target_sig,
+        bytes(data[SIGNATURE_SIZE:start]),
+        xor_keystream(bytes(data[start:start + size])),
+        bytes(data[start + size:]),
+    ))
+
+
+def decrypt_mjo(data: bytes) -> bytes:
+    """解密 MJO 数据，已解密的数据原样返回"""
+    return _transform(data, SIGNATURE_ENCRYPTED, SIGNATURE_DECRYPTED)
+
+
+def encrypt_mjo(data: bytes) -> bytes:
+    """加密 MJO 数据，已加密的数据原样返回"""
+    return _transform(data, SIGNATURE_DECRYPTED, SIGNATURE_ENCRYPTED)
+
+
+def decrypt_file(src_path: str, dest_path: str) -> int:
+    """解密单个文件，返回写入的字节数"""
+    with open(src_path, "rb") as f:
+        data = f.read()
+    result = decrypt_mjo(data)
+    with open(dest_path, "wb") as f:
+        f.write(result)
+    return len(result)
+
+
+def decrypt_directory(src_dir: str, dest_dir: str,
+                      prefix: str = "decrypted_") -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    批量解密目录下的所有 .mjo 文件
+
+    Returns:
+        (成功的文件名列表, [(失败的文件名, 错误信息)])
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    files = sorted(f for f in os.listdir(src_dir) if f.lower().endswith(".mjo"))
+    success: List[str] = []
+    failures: List[Tuple[str, str]] = []
+    for filename in files:
+        try:
+            decrypt_file(os.path.join(src_dir, filename),
+                         os.path.join(dest_dir, f"{prefix}{filename}"))
+            success.append(filename)
+        except (OSError, MjoFormatError) as e:
+            failures.append((filename, str(e)))
+    return success, failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Majiro MJO 批量解密（纯 Python）")
+    parser.add_argument("source", help="原始 .mjo 文件或目录")
+    parser.add_argument("dest", help="输出文件或目录")
+    parser.add_argument("--prefix", default="decrypted_", help="批量模式下输出文件名前缀")
+    args = parser.parse_args(argv)
+
+    if os.path.isfile(args.source):
+        decrypt_file(args.source, args.dest)
+        print(f"解密完成: {args.source} -> {args.dest}")
+        return 0
+
+    success, failures = decrypt_directory(args.source, args.dest, args.prefix)
+    print(f"处理完成：{len(success)} 成功 / {len(failures)} 失败")
+    for filename, error in failures:
+        print(f"  {filename}: {error}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""
+Majiro MJO 字节码反汇编（纯 Python 实现，替代 mjdisasm.exe）
+
+按操作码表在 memoryview 上逐条解码指令，直接在内存中生成
+与 mjdisasm.exe 相同风格的 .mjs 指令文本和 .sjs 资源字符串表：
+    call<$a4eb1e4c, 0> ('b')
+    #res<12>
+    pause
+
+用法:
+    python -m majiro_artemis.mjdisasm mjo temp
+"""
+
+import argparse
+import os
+import struct
+import sys
+from collections import Counter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .mjcrypt import SIGNATURE_ENCRYPTED, SIGNATURE_SIZE, MjoFormatError, bytecode_offset, decrypt_mjo
+
+# 资源字符串编码（游戏本体使用 cp932，即 Shift-JIS 的微软扩展）
+TEXT_ENCODING = "cp932"
+
+# 操作数格式 ==========================================================
+#   ""  无操作数              "i" int32            "f" float32
+#   "s" 字符串(u16长度+数据)  "v" 变量(flags,hash,offset)
+#   "c" call(hash,offset,argc) "y" syscall(hash,argc)
+#   "t" 类型列表(u16长度+数据) "j" 跳转(int32 相对偏移)
+#   "l" 行号(u16)             "w" switch(u16个数+int32偏移表)
+OPERAND_FORMATS: Dict[int, str] = {}
+
+# 运算和赋值指令的每种运算占 8 个编号，低 3 位为操作数类型，只有列出的类型有效:
+#   0 int  1 float  2 string  3-5 int/float/string 数组
+_INT, _NUM, _STR, _ALL = (0,), (0, 1), (0, 1, 2), (0, 1, 2, 3, 4, 5)
+
+# 0x100-0x1a1: 算术/比较/逻辑运算（无操作数）
+_OPERATORS = {
+    0x100: _NUM, 0x108: _NUM, 0x110: _INT,  # mul div rem
+    0x118: _STR, 0x120: _NUM,  # add（string 为连接） sub
+    0x128: _INT, 0x130: _INT,  # shr shl
+    0x138: _STR, 0x140: _STR, 0x148: _STR, 0x150: _STR,  # cle clt cge cgt
+    0x158: _ALL, 0x160: _ALL,  # ceq cne
+    0x168: _INT, 0x170: _INT, 0x178: _INT, 0x180: _INT, 0x188: _INT,  # xor andl orl and or
+    0x190: _INT, 0x198: _INT, 0x1a0: _NUM,  # notl not neg
+}
+for _base, _types in _OPERATORS.items():
+    for _type in _types:
+        OPERAND_FORMATS[_base + _type] = ""
+
+# 0x1b0-0x320: 赋值类指令（操作数为变量），st / stp / stelem / stelemp 四组，每组 0x60 个编号；
+# 组内依次为 = *= /= %= += -= <<= >>= &= ^= |=，"=" 的类型在 stelem / stelemp 中只有 0-2
+_ASSIGNMENTS = (None, _NUM, _NUM, _INT, _STR, _NUM, _INT, _INT, _INT, _INT, _INT)
+for _group, _store_types in ((0x1b0, _ALL), (0x210, _ALL), (0x270, _STR), (0x2d0, _STR)):
+    for _number, _types in enumerate(_ASSIGNMENTS):
+        for _type in _types or _store_types:
+            OPERAND_FORMATS[_group + _number * 8 + _type] = "v"
+
+OPERAND_FORMATS.update({
+    0x800: "i", 0x801: "s", 0x802: "v", 0x803: "f",
+    0x80f: "c", 0x810: "c",
+    0x829: "t", 0x82b: "", 0x82c: "j", 0x82d: "j", 0x82e: "j", 0x82f: "",
+    0x830: "j", 0x831: "j",
+    0x834: "y", 0x835: "y", 0x836: "t", 0x837: "v",
+    0x838: "j", 0x839: "j", 0x83a: "l", 0x83b: "j", 0x83c: "j", 0x83d: "j",
+    0x83e: "", 0x83f: "",
+    0x840: "s", 0x841: "", 0x842: "s", 0x843: "j", 0x844: "", 0x845: "j", 0x846: "j", 0x847: "",
+    0x850: "w",
+})
+
+# 会把结果压栈的指令（反汇编时折叠进后续调用的参数列表）
+VALUE_OPCODES = frozenset((0x800, 0x801, 0x802, 0x803, 0x80f, 0x834, 0x837))
+
+# 文本控制指令名称: 控制字符 -> 输出名
+CONTROL_NAMES = {"p": "pause", "r": "cls", "n": "newline", "w": "wait"}
+
+_INT32 = struct.Struct("<i")
+_UINT16 = struct.Struct("<H")
+_FLOAT = struct.Struct("<f")
+_CALL = struct.Struct("<IhH")
+_SYSCALL = struct.Struct("<IH")
+
+
+class Instruction(NamedTuple):
+    """
+    一条已解码的指令（offset 为相对字节码区起点的偏移）
+
+    变量类操作数("v")保留原始 8 字节，输出为 op###[#hex]。
+    """
+    offset: int
+    opcode: int
+    operand: object
+
+
+class Function(NamedTuple):
+    hash: int
+    offset: int
+
+
+class Disassembly(NamedTuple):
+    """反汇编结果: .mjs 指令行和 .sjs 资源字符串表"""
+    lines: List[str]
+    resources: List[str]
+
+    def mjs(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+    def sjs(self) -> str:
+        return "".join(f"<{i}> {escape_text(text)}\n" for i, text in enumerate(self.resources))
+
+
+def escape_text(text: str) -> str:
+    """资源字符串写入 .sjs 时转义换行，保证一条资源占一行"""
+    return text.replace("\\", "\\\\").replace("\r", "\\r").replace("\n", "\\n")
+
+
+def _read_string(code: memoryview, pos: int) -> Tuple[bytes, int]:
+    (size,) = _UINT16.unpack_from(code, pos)
+    pos += 2
+    return bytes(code[pos:pos + size]).rstrip(b"\x00"), pos + size
+
+
+def read_header(data: bytes) -> Tuple[int, List[Function], memoryview]:
+    """解析文件头，返回 (入口偏移, 函数表, 字节码 memoryview)"""
+    if bytes(data[:SIGNATURE_SIZE]) == SIGNATURE_ENCRYPTED:
+        data = decrypt_mjo(data)
+    start = bytecode_offset(data)
+    entry, _, count = struct.unpack_from("<III", data, SIGNATURE_SIZE)
+    functions = [Function(*struct.unpack_from("<II", data, SIGNATURE_SIZE + 12 + i * 8))
+                 for i in range(count)]
+    (size,) = struct.unpack_from("<I", data, start - 4)
+    return entry, functions, memoryview(data)[start:start + size]
+
+
+def iter_instructions(code: memoryview) -> Iterator[Instruction]:
+    """在字节码上逐条解码指令（跳转目标已换算为绝对偏移）"""
+    code = bytes(code)  # bytes 上的 unpack_from 比 memoryview 更快
+    pos = 0
+    end = len(code)
+    formats = OPERAND_FORMATS
+    read_u16 = _UINT16.unpack_from
+    while pos < end:
+        offset = pos
+        (opcode,) = read_u16(code, pos)
+        pos += 2
+        fmt = formats.get(opcode)
+        if fmt is None:
+            raise MjoFormatError(f"未知操作码 0x{opcode:03x}（偏移 0x{offset:x}）")
+        operand: object = None
+        if fmt == "":
+            pass
+        elif fmt == "c":
+            operand = _CALL.unpack_from(code, pos)
+            pos += 8
+        elif fmt == "s":
+            operand, pos = _read_string(code, pos)
+        elif fmt == "t":
+            (size,) = _UINT16.unpack_from(code, pos)
+            operand = bytes(code[pos + 2:pos + 2 + size])
+            pos += 2 + size
+        elif fmt == "v":
+            operand = code[pos:pos + 8]
+            pos += 8
+        elif fmt == "y":
+            operand = _SYSCALL.unpack_from(code, pos)
+            pos += 6
+        elif fmt == "i":
+            (operand,) = _INT32.unpack_from(code, pos)
+            pos += 4
+        elif fmt == "j":
+            (delta,) = _INT32.unpack_from(code, pos)
+            pos += 4
+            operand = pos + delta
+        elif fmt == "l":
+            (operand,) = _UINT16.unpack_from(code, pos)
+            pos += 2
+        elif fmt == "f":
+            (operand,) = _FLOAT.unpack_from(code, pos)
+            pos += 4
+        elif fmt == "w":
+            (count,) = _UINT16.unpack_from(code, pos)
+            pos += 2
+            targets = []
+            for _ in range(count):
+                (delta,) = _INT32.unpack_from(code, pos)
+                pos += 4
+                targets.append(pos + delta)
+            operand = tuple(targets)
+        if pos > end:
+            raise MjoFormatError(f"指令越界（偏移 0x{offset:x}）")
+        yield Instruction(offset, opcode, operand)
+
+
+def _literal(text: str) -> str:
+    return "'" + text.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def disassemble(data: bytes, opcode_counts: Optional[Counter] = None) -> Disassembly:
+    """
+    反汇编 MJO 数据（加密的数据会先自动解密）
+
+    相邻的压栈指令会折叠为调用参数，例如 push 'b' + call → call<...> ('b')；
+    文本指令写入资源表并以 #res<N> 引用。
+    传入 opcode_counts 时按操作码累计指令数。
+    """
+    entry, functions, code = read_header(data)
+    instructions = list(iter_instructions(code))
+    if opcode_counts is not None:
+        opcode_counts.update(ins.opcode for ins in instructions)
+
+    # 第一遍: 收集跳转目标并按偏移编号
+    targets = set()
+    for ins in instructions:
+        if OPERAND_FORMATS[ins.opcode] == "j":
+            targets.add(ins.operand)
+        elif ins.opcode == 0x850:
+            targets.update(ins.operand)
+    labels = {offset: f"@{i}" for i, offset in enumerate(sorted(targets), 1)}
+    starts = {f.offset: f.hash for f in functions}
+
+    lines: List[str] = []
+    resources: List[str] = []
+    pending: List[str] = []  # 尚未被消费的压栈值
+    emit = lines.append
+
+    def flush() -> None:
+        for value in pending:
+            emit(f"push {value}")
+        pending.clear()
+
+    def take(count: int) -> str:
+        if count <= 0 or count > len(pending):
+            return ""
+        args = pending[-count:]
+        del pending[-count:]
+        return f" ({', '.join(args)})"
+
+    for ins in instructions:
+        opcode = ins.opcode
+        if ins.offset in starts:
+            flush()
+            kind = "#entrypoint" if ins.offset == entry else "#function"
+            emit("")
+            emit(f"{kind} ${starts[ins.offset]:08x}")
+        if ins.offset in labels:
+            flush()
+            emit("")
+            emit(f"  {labels[ins.offset]}")
+
+        if opcode == 0x83a or opcode == 0x841:  # 行号、文本处理：不输出
+            continue
+        if opcode in VALUE_OPCODES:
+            if opcode == 0x800:
+                pending.append(str(ins.operand))
+            elif opcode == 0x801:
+                pending.append(_literal(ins.operand.decode(TEXT_ENCODING, "replace")))
+            elif opcode == 0x803:
+                pending.append(repr(ins.operand))
+            elif opcode == 0x80f:
+                func_hash, var_offset, argc = ins.operand
+                args = take(argc)
+                pending.append(f"call<${func_hash:08x}, {var_offset}>{args}")
+            elif opcode == 0x834:
+                func_hash, argc = ins.operand
+                args = take(argc)
+                pending.append(f"syscall<${func_hash:08x}>{args}")
+            else:
+                pending.append(f"op{opcode:03x}[#{ins.operand.hex()}]")
+            continue
+
+        if opcode == 0x810:
+            func_hash, var_offset, argc = ins.operand
+            args = take(argc)
+            flush()
+            emit(f"call<${func_hash:08x}, {var_offset}>{args}")
+        elif opcode == 0x835:
+            func_hash, argc = ins.operand
+            args = take(argc)
+            flush()
+            emit(f"syscall<${func_hash:08x}>{args}")
+        elif opcode == 0x840:
+            flush()
+            emit(f"#res<{len(resources)}>")
+            resources.append(ins.operand.decode(TEXT_ENCODING, "replace"))
+        elif opcode == 0x842:
+            control = ins.operand.decode(TEXT_ENCODING, "replace")
+            name = CONTROL_NAMES.get(control)
+            if name is not None:
+                flush()
+                emit(name)
+            else:
+                args = take(len(pending))
+                name = "text_control_" + "".join(f"{ord(c):02x}" for c in control)
+                emit(f"{name}{args}")
+        elif opcode == 0x82b:
+            emit(f"exit{take(len(pending))}")
+        elif opcode == 0x82f and pending:
+            emit(pending.pop())  # 丢弃返回值的调用，按语句输出
+        elif OPERAND_FORMATS[opcode] == "j":
+            flush()
+            emit(f"jmp{opcode:03x} {labels[ins.operand]}")
+        elif opcode == 0x850:
+            flush()
+            emit("switch " + ", ".join(labels[t] for t in ins.operand))
+        else:
+            flush()
+            if isinstance(ins.operand, bytes):
+                emit(f"op{opcode:03x}[{'#' + ins.operand.hex() if ins.operand else ''}]")
+            else:
+                emit(f"op{opcode:03x}")
+    flush()
+    return Disassembly(lines, resources)
+
+
+def disassemble_file(mjo_path: str, output_dir: str,
+                     sjs_encoding: str = TEXT_ENCODING) -> Tuple[str, str]:
+    """
+    反汇编单个 .mjo，在 output_dir 下写出同名 .mjs(UTF-8) 和 .sjs
+
+    .sjs 默认按 Shift-JIS(cp932) 写出，与 mjdisasm.exe 的输出保持一致，
+    以便后续的 sjs 转码步骤直接处理。
+    """
+    with open(mjo_path, "rb") as f:
+        result = disassemble(f.read())
+    base = os.path.join(output_dir, os.path.splitext(os.path.basename(mjo_path))[0])
+    with open(base + ".mjs", "w", encoding="utf-8") as f:
+        f.write(result.mjs())
+    with open(base + ".sjs", "w", encoding=sjs_encoding, errors="replace") as f:
+        f.write(result.sjs())
+    return base + ".mjs", base + ".sjs"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Majiro MJO 反汇编（纯 Python）")
+    parser.add_argument("source", help=".mjo 文件或目录")
+    parser.add_argument("output_dir", help=".mjs/.sjs 输出目录")
+    args = parser.parse_args(argv)
+
+    if os.path.isfile(args.source):
+        files = [args.source]
+    else:
+        files = sorted(os.path.join(args.source, f) for f in os.listdir(args.source)
+                       if f.lower().endswith(".mjo"))
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    failed = 0
+    for path in files:
+        try:
+            disassemble_file(path, args.output_dir)
+            print(f"✓ {os.path.basename(path)}")
+        except (OSError, MjoFormatError, struct.error) as e:
+            print(f"✗ {os.path.basename(path)}: {e}")
+            failed += 1
+    print(f"处理完成：成功 {len(files) - failed} 个，失败 {failed} 个")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
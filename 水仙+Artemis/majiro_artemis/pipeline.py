@@ -0,0 +1,383 @@
+"""
+.mjo → .ast 单遍转换流水线
+
+每个文件在内存中依次完成：解密 → 反汇编 → #res 合并 → 块划分 → AST 生成，
+只写出最终的 .ast；各阶段的中间结果可通过 --debug-dir 另行输出以便排查。
+给出 --map 时在生成 AST 的同时替换资源文件名，不再需要事后改写整个输出目录。
+转换时顺带更新输出目录下的资源引用索引（.mjassets），可用 majiro_artemis.assetindex 查询。
+给出 --split-size 时，过长的脚本在块边界处拆成 nar1_00.ast、nar1_00_part01.ast ... 多个文件。
+--compact --intern 时把每个文件中重复的命令提为 local 变量共享，进一步缩小输出。
+不小于 --shard-size 的 .mjo 先逐个处理，每个文件在块边界处分段、用全部 --jobs 个进程
+并行转换（见 shard 模块），其余文件再按文件并行，单个大文件不再拖慢整批。
+给出 --overlap 时改用阶段图调度（见 stagegraph 模块）：读文件 → 解码 → 生成 AST（同时替换
+资源名）→ 写文件 各自排队，读写在线程中、解码和生成在进程池中，不同文件同时处于不同阶段。
+
+用法:
+    python -m majiro_artemis.pipeline 原始mjo文件 转录的Artemis引擎脚本 [--debug-dir 中间文件] [--jobs 4] [--compact]
+        [--metrics metrics.json] [--profile 性能分析] [--trace-memory] [--top 10]
+        [--map bgm=附加补充脚本/other-list.txt] [--report-dir 附加补充脚本] [--split-size 262144] [--intern]
+        [--shard-size 131072] [--overlap]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+from collections import Counter
+from contextlib import nullcontext
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .assetindex import AssetIndex, Ref, index_path
+from .assets import AssetRenamer, load_mapping, parse_map_spec, write_reports
+from .batch import BatchResult, Throughput, resolve_jobs, run_batch
+from .blocks import TEXT_MARKER, format_blocks, split_blocks
+from .cache import MANIFEST_NAME, BuildCache
+from .converter import Converter, build_ast_chunks, write_ast_chunks
+from .merge import merge_res
+from .metrics import Metrics, measure
+from .mjcrypt import decrypt_mjo
+from .mjdisasm import disassemble, escape_text
+from .shard import convert_sharded
+from .stagegraph import Stage, StageGraph
+
+# 中间结果输出回调: (文件后缀, 内容)
+DumpFunc = Callable[[str, Union[str, bytes]], None]
+
+
+def convert_mjo(data: bytes, dump: Optional[DumpFunc] = None, compact: bool = False,
+                metrics: Optional[Metrics] = None, name: str = "",
+                renamer: Optional[AssetRenamer] = None,
+                missing: Optional[List[Tuple[str, str]]] = None,
+                refs: Optional[List[Ref]] = None, ast_file: str = "",
+                split_size: int = 0, intern: bool = False, shard_jobs: int = 1) -> List[Tuple[str, str]]:
+    """
+    将一个 .mjo 文件的内容转换为 AST 文本，返回 [(文件名, 内容)]（不拆分时只有一项）
+
+    Args:
+        data: .mjo 原始数据（加密或已解密均可）
+        dump: 可选回调，接收各阶段的中间结果
+        compact: 输出不含缩进和注释的紧凑 AST
+        metrics: 可选的指标收集器，记录各阶段耗时和字节数
+        name: 记录指标时使用的文件名
+        renamer: 可选的资源名映射，生成 AST 时直接替换文件名
+        missing: 可选列表，追加没有映射的 (资源类型, 文件名)
+        refs: 可选列表，追加资源引用 (资源类型, 原文件名, 块编号)
+        ast_file: 输出的 .ast 文件名，拆分后的文件以此命名
+        split_size: 大于 0 时按块内容的字节数在块边界处拆分为多个文件
+        intern: 把重复的命令提为 local 变量共享（须与 compact 一起使用）
+        shard_jobs: 大于 1 时在块边界处分段，用这么多个进程并行转换（结果不变）
+    """
+    blocks = decode_mjo(data, dump, metrics, name)
+    return emit_ast(blocks, ast_file, compact, metrics, name, renamer, missing, refs, split_size, intern, shard_jobs)
+
+
+def decode_mjo(data: bytes, dump: Optional[DumpFunc] = None, metrics: Optional[Metrics] = None,
+               name: str = "") -> Dict[str, str]:
+    """convert_mjo() 的前半部分：解密 → 反汇编 → #res 合并 → 块划分，返回 {块编号: 块内容}"""
+    with measure(metrics, "decrypt", name, len(data)) as record:
+        decrypted = decrypt_mjo(data)
+        record["bytes_out"] = len(decrypted)
+    opcodes = Counter() if metrics is not None else None
+    with measure(metrics, "disasm", name, len(decrypted)) as record:
+        listing = disassemble(decrypted, opcodes)
+        mjs_text = listing.mjs()
+        sjs_data = [escape_text(text) for text in listing.resources]
+        record["bytes_out"] = mjs_text
+    with measure(metrics, "merge", name, mjs_text) as record:
+        merged = merge_res(mjs_text, sjs_data, TEXT_MARKER + "{}>")
+        record["bytes_out"] = merged
+    with measure(metrics, "split", name, merged) as record:
+        blocks = split_blocks(merged.split("\n"))
+        if metrics is not None:
+            record["bytes_out"] = sum(len(content.encode("utf-8")) for content in blocks.values())
+    if metrics is not None:
+        metrics.count_opcodes(opcodes)
+
+    if dump is not None:
+        dump(".mjo", decrypted)
+        dump(".mjs", mjs_text)
+        dump(".sjs", listing.sjs())
+        dump(".txt", merged)
+        dump("-parsed_blocks.txt", format_blocks(blocks))
+    return blocks
+
+
+def emit_ast(blocks: Dict[str, str], ast_file: str = "", compact: bool = False,
+             metrics: Optional[Metrics] = None, name: str = "",
+             renamer: Optional[AssetRenamer] = None,
+             missing: Optional[List[Tuple[str, str]]] = None,
+             refs: Optional[List[Ref]] = None, split_size: int = 0, intern: bool = False,
+             shard_jobs: int = 1) -> List[Tuple[str, str]]:
+    """convert_mjo() 的后半部分：块 → AST 文本（参数含义同 convert_mjo()）"""
+    block_bytes = sum(len(content.encode("utf-8")) for content in blocks.values()) if metrics is not None else 0
+    with measure(metrics, "ast", name, block_bytes) as record:
+        converter = Converter(compact, renamer)
+        if shard_jobs > 1:
+            converted, ast_text = convert_sharded(converter, blocks, shard_jobs, render=split_size <= 0 and not intern)
+        else:
+            converted, ast_text = converter.convert_contents(blocks), None
+        if ast_text is not None:
+            ast_files = [(ast_file, ast_text)]
+        else:
+            ast_files = build_ast_chunks(converted, ast_file, split_size, compact, intern)
+        if metrics is not None:
+            record["bytes_out"] = sum(len(text.encode("utf-8")) for _, text in ast_files)
+    if missing is not None:
+        missing.extend(converter.missing)
+    if refs is not None:
+        refs.extend(converter.refs)
+    return ast_files
+
+
+def make_dump(mjo_path: str, debug_dir: Optional[str]) -> Optional[DumpFunc]:
+    """把中间结果写到 debug_dir 下与 .mjo 同名的文件中；没有给出 debug_dir 时返回 None"""
+    if not debug_dir:
+        return None
+    os.makedirs(debug_dir, exist_ok=True)
+    stem = os.path.join(debug_dir, os.path.splitext(os.path.basename(mjo_path))[0])
+
+    def dump(suffix: str, content: Union[str, bytes]) -> None:
+        if isinstance(content, bytes):
+            with open(stem + suffix, "wb") as f:
+                f.write(content)
+        else:
+            with open(stem + suffix, "w", encoding="utf-8") as f:
+                f.write(content)
+    return dump
+
+
+def ast_name(mjo_name: str) -> str:
+    """decrypted_nar1_00.mjo → nar1_00.ast"""
+    return os.path.splitext(mjo_name.replace("decrypted_", ""))[0] + ".ast"
+
+
+def convert_file(mjo_path: str, ast_path: str, debug_dir: Optional[str] = None,
+                 compact: bool = False, metrics: Optional[Metrics] = None,
+                 renamer: Optional[AssetRenamer] = None,
+                 missing: Optional[List[Tuple[str, str]]] = None,
+                 refs: Optional[List[Ref]] = None, split_size: int = 0,
+                 outputs: Optional[List[str]] = None, intern: bool = False, shard_jobs: int = 1) -> int:
+    """转换单个文件，返回读取的字节数；给出 outputs 时追加写出的所有 .ast 路径"""
+    with open(mjo_path, "rb") as f:
+        data = f.read()
+
+    ast_files = convert_mjo(data, make_dump(mjo_path, debug_dir), compact, metrics, mjo_path, renamer, missing, refs, ast_path, split_size,
+                            intern, shard_jobs)
+    write_ast_chunks(ast_files)
+    if outputs is not None:
+        outputs.extend(path for path, _ in ast_files)
+    return len(data)
+
+
+class FileResult(NamedTuple):
+    nbytes: int  # 读取的字节数
+    missing: List[Tuple[str, str]]  # 没有映射的 (资源类型, 文件名)
+    refs: List[Ref]  # 资源引用，用于更新资源索引
+    outputs: List[str]  # 写出的 .ast（拆分时不止一个）
+    metrics: Optional[Metrics]  # 该文件的指标（未要求收集时为 None）
+
+
+def run_file(mjo_path: str, ast_path: str, debug_dir: Optional[str] = None,
+             compact: bool = False, renamer: Optional[AssetRenamer] = None,
+             collect_metrics: bool = False, trace_memory: bool = False,
+             profile_dir: Optional[str] = None, split_size: int = 0, intern: bool = False,
+             shard_jobs: int = 1) -> FileResult:
+    """供进程池调用的 convert_file()，把没有映射的资源名、资源引用和指标一并返回给主进程"""
+    metrics = Metrics(trace_memory, profile_dir) if collect_metrics else None
+    missing: List[Tuple[str, str]] = []
+    refs: List[Ref] = []
+    outputs: List[str] = []
+    with metrics.profile(mjo_path) if metrics is not None else nullcontext():
+        nbytes = convert_file(mjo_path, ast_path, debug_dir, compact, metrics, renamer, missing, refs,
+                              split_size, outputs, intern, shard_jobs)
+    return FileResult(nbytes, missing, refs, outputs, metrics)
+
+
+class FileTask(NamedTuple):
+    """一个 .mjo 的转换任务；字段顺序与 run_file() 的参数相同，可直接作为 run_batch() 的参数"""
+    mjo_path: str
+    ast_path: str
+    debug_dir: Optional[str] = None
+    compact: bool = False
+    renamer: Optional[AssetRenamer] = None
+    collect_metrics: bool = False
+    trace_memory: bool = False
+    profile_dir: Optional[str] = None
+    split_size: int = 0
+    intern: bool = False
+    shard_jobs: int = 1
+
+
+# --overlap 的各阶段（不支持 profile_dir 和 shard_jobs）
+
+def read_stage(task: FileTask) -> bytes:
+    with open(task.mjo_path, "rb") as f:
+        return f.read()
+
+
+def decode_stage(task: FileTask, data: bytes) -> Tuple[Dict[str, str], int, Optional[Metrics]]:
+    metrics = Metrics(task.trace_memory) if task.collect_metrics else None
+    blocks = decode_mjo(data, make_dump(task.mjo_path, task.debug_dir), metrics, task.mjo_path)
+    return blocks, len(data), metrics
+
+
+def emit_stage(task: FileTask, decoded: Tuple[Dict[str, str], int, Optional[Metrics]]) -> Tuple[List[Tuple[str, str]], FileResult]:
+    blocks, nbytes, metrics = decoded
+    missing: List[Tuple[str, str]] = []
+    refs: List[Ref] = []
+    ast_files = emit_ast(blocks, task.ast_path, task.compact, metrics, task.mjo_path, task.renamer, missing, refs,
+                         task.split_size, task.intern)
+    return ast_files, FileResult(nbytes, missing, refs, [path for path, _ in ast_files], metrics)
+
+
+def write_stage(task: FileTask, emitted: Tuple[List[Tuple[str, str]], FileResult]) -> FileResult:
+    ast_files, result = emitted
+    write_ast_chunks(ast_files)
+    return result
+
+
+def overlap_graph(jobs: int) -> StageGraph:
+    """读写各 2 个线程，解码和生成 AST 各有 jobs 个任务在进程池中"""
+    return StageGraph([
+        Stage("read", read_stage, workers=2),
+        Stage("decode", decode_stage, ("read",), cpu=True),
+        Stage("emit", emit_stage, ("decode",), cpu=True),
+        Stage("write", write_stage, ("emit",), workers=2),
+    ], jobs)
+
+
+def collect_tasks(source_dir: str, output_dir: str,
+                  debug_dir: Optional[str] = None,
+                  compact: bool = False) -> List[FileTask]:
+    """递归收集 .mjo 文件，输出目录保持与输入相同的子目录结构（其余选项为默认值）"""
+    tasks = []
+    for root_dir, _, files in os.walk(source_dir):
+        relative_path = os.path.relpath(root_dir, source_dir)
+        output_subdir = os.path.join(output_dir, relative_path)
+        for file_name in sorted(files):
+            if not file_name.lower().endswith(".mjo"):
+                continue
+            os.makedirs(output_subdir, exist_ok=True)
+            tasks.append(FileTask(
+                os.path.join(root_dir, file_name),
+                os.path.join(output_subdir, ast_name(file_name)),
+                os.path.join(debug_dir, relative_path) if debug_dir else None,
+                compact,
+            ))
+    return tasks
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=".mjo → .ast 单遍转换")
+    parser.add_argument("source", help=".mjo 输入目录")
+    parser.add_argument("output", help=".ast 输出目录")
+    parser.add_argument("--debug-dir", help="输出中间结果（解密 mjo、mjs、sjs、合并 txt、块文件）的目录")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数，0 表示使用全部 CPU 核心")
+    parser.add_argument("--compact", action="store_true", help="输出不含缩进和注释的紧凑 AST（默认输出可读格式）")
+    parser.add_argument("--rebuild", action="store_true", help="忽略增量缓存，全部重新转换")
+    parser.add_argument("--clean", action="store_true", help="删除增量缓存清单后退出")
+    parser.add_argument("--metrics", help="把各阶段的耗时、字节数和操作码统计写入该 JSON 文件")
+    parser.add_argument("--profile", metavar="DIR", help="用 cProfile 为每个文件生成 .prof 文件到该目录")
+    parser.add_argument("--trace-memory", action="store_true", help="用 tracemalloc 记录各阶段的内存分配峰值（较慢）")
+    parser.add_argument("--top", type=int, default=10, help="输出最慢的 N 个文件（需 --metrics），默认 10")
+    parser.add_argument("--map", action="append", metavar="类型=文件",
+                        help="生成 AST 时替换资源文件名（bgm/se/vo/bg），可重复，例如 --map bgm=other-list.txt")
+    parser.add_argument("--report-dir", help="<类型>_not_found.txt 的输出目录，默认为输出目录"
+                                             "（增量跳过的文件不计入，需要完整报告时加 --rebuild）")
+    parser.add_argument("--split-size", type=int, default=0, metavar="BYTES",
+                        help="块内容超过该字节数的脚本在块边界处拆分为多个 .ast，前后文件用 jump 衔接（默认不拆分）")
+    parser.add_argument("--intern", action="store_true", help="把每个文件中重复的命令提为 local 变量共享（需 --compact）")
+    parser.add_argument("--shard-size", type=int, default=0, metavar="BYTES",
+                        help="不小于该大小的 .mjo 单独分段、用全部 --jobs 个进程并行转换（默认不分段）")
+    parser.add_argument("--overlap", action="store_true",
+                        help="按阶段调度：读写文件与解码、生成 AST 重叠进行（不能与 --profile、--shard-size 同用）")
+    args = parser.parse_args(argv)
+    if args.intern and not args.compact:
+        parser.error("--intern 需要与 --compact 一起使用")
+    if args.overlap and (args.profile or args.shard_size > 0):
+        parser.error("--overlap 不能与 --profile、--shard-size 同时使用")
+
+    cache = BuildCache(os.path.join(args.output, MANIFEST_NAME), rebuild=args.rebuild)
+    if args.clean:
+        cache.clean()
+        print(f"已删除缓存清单: {cache.manifest_path}")
+        return 0
+
+    renamer = None
+    if args.map:
+        try:
+            specs = [parse_map_spec(spec) for spec in args.map]
+        except ValueError as e:
+            parser.error(str(e))
+        renamer = AssetRenamer({kind: load_mapping(path) for kind, path in specs})
+
+    # 输入、转换器版本和配置（包括映射表内容）都未变化的文件直接跳过（需要中间结果时不跳过）
+    config = {}
+    if args.compact:
+        config["compact"] = True
+    if renamer is not None:
+        config["assets"] = renamer.tables
+    if args.split_size > 0:
+        config["split_size"] = args.split_size
+    if args.intern:
+        config["intern"] = True
+    config = config or None
+    collect_metrics = bool(args.metrics or args.profile or args.trace_memory)
+    metrics = Metrics() if collect_metrics else None
+    # 资源索引中还没有记录的脚本即使输出未变化也重新转换一次
+    index = AssetIndex.load(index_path(args.output))
+    all_tasks = collect_tasks(args.source, args.output, args.debug_dir, args.compact)
+    index.retain(os.path.relpath(task.ast_path, args.output) for task in all_tasks)
+    tasks = [task._replace(renamer=renamer, collect_metrics=collect_metrics, trace_memory=args.trace_memory,
+                           profile_dir=args.profile, split_size=args.split_size, intern=args.intern)
+             for task in all_tasks
+             if args.debug_dir or not cache.fresh("pipeline", [task.mjo_path], [task.ast_path], config)
+             or os.path.relpath(task.ast_path, args.output) not in index]
+    # 大文件在主进程中逐个分段并行，其余文件按文件并行（--jobs 0 先换算成 CPU 核心数）
+    shard_jobs = resolve_jobs(args.jobs)
+    large = [task._replace(shard_jobs=shard_jobs) for task in tasks
+             if args.shard_size > 0 and os.path.getsize(task.mjo_path) >= args.shard_size]
+    small = [task for task in tasks if args.shard_size <= 0 or os.path.getsize(task.mjo_path) < args.shard_size]
+    missing = {kind: set() for kind in renamer.tables} if renamer is not None else {}
+    throughput = Throughput()
+    failed = 0
+    graph = overlap_graph(args.jobs) if args.overlap else None
+    if graph is not None:
+        results = (BatchResult(r.item, r.values.get("write"), r.error) for r in graph.run(small))
+    else:
+        results = itertools.chain(run_batch(run_file, large, 1), run_batch(run_file, small, args.jobs))
+    try:
+        for result in results:
+            if result.error is None:
+                throughput.add(result.value.nbytes)
+                for kind, name in result.value.missing:
+                    missing[kind].add(name)
+                index.add(os.path.relpath(result.args.ast_path, args.output), result.value.refs)
+                if metrics is not None:
+                    metrics.merge(result.value.metrics)
+                cache.record("pipeline", [result.args.mjo_path], result.value.outputs, config)
+                print(f"✓ {result.args.mjo_path} -> {result.args.ast_path}")
+            else:
+                failed += 1
+                print(f"✗ {result.args.mjo_path}: {result.error}")
+    finally:
+        cache.save()
+        index.save(index_path(args.output))
+
+    print(f"处理完成：成功 {len(tasks) - failed} 个，失败 {failed} 个")
+    print(f"吞吐量：{throughput.summary()}")
+    if graph is not None:
+        print(graph.summary())
+    print(cache.report())
+    for path in write_reports(args.report_dir or args.output, missing, []):
+        print(f"没有映射的资源名已保存到: {path}")
+    if metrics is not None:
+        print(metrics.summary(args.top))
+        if args.metrics:
+            metrics.write(args.metrics, args.top)
+            print(f"指标已保存: {args.metrics}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+单个大脚本的分段并行转换
+
+按文件并行时，一个特别长的脚本（如 额外-零/decrypted_4novel.txt）决定了整批的耗时。
+convert_sharded() 把一个脚本的块按编号顺序在块边界处分成若干段，在进程池中
+分别转换并生成 Lua 文本，再按顺序拼接:
+    - 每段的首尾两块由主进程告知相邻的块编号，linkback/linknext 正确衔接
+    - 每段带上在整个脚本中的起始序号，line 与串行转换相同
+    - 块之间唯一的状态是暂存的语音（语音行之后的第一条文本才带上语音），
+      主进程先用 voice_after() 依次扫描出每段开始时的语音状态再交给工作进程
+输出与 Converter.convert_contents() + build_ast() 串行转换的结果逐字节相同。
+
+典型用法:
+    converter = Converter(compact)
+    converted, ast_text = convert_sharded(converter, blocks, jobs=4)
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .assets import AssetRenamer
+from .batch import resolve_jobs, run_batch
+from .converter import Converter, ast_head, ast_tail, build_ast, render_blocks, voice_after
+
+# 每段至少包含的块内容字符数，段太小时进程间传递数据的开销超过转换本身
+SHARD_MIN_SIZE = 32768
+
+
+class ShardResult(NamedTuple):
+    blocks: List[Tuple[str, List[str]]]  # (块编号, AST 命令列表)
+    text: str  # 该段各块的 Lua 文本（render=False 时为空）
+    missing: List[Tuple[str, str]]
+    refs: List[Tuple[str, str, str]]
+
+
+def plan_shards(blocks: Dict[str, str], count: int, min_size: int = SHARD_MIN_SIZE) -> List[List[str]]:
+    """按块内容的长度把块编号（按顺序）分成不超过 count 段，每段大致相同"""
+    keys = list(blocks)
+    total = sum(len(content) for content in blocks.values())
+    count = max(1, min(count, total // max(min_size, 1), len(keys)))
+    shards: List[List[str]] = [[]]
+    size = 0
+    for key in keys:
+        # 累计长度超过下一个等分点时开始新的一段
+        if shards[-1] and size * count >= total * len(shards) and len(shards) < count:
+            shards.append([])
+        shards[-1].append(key)
+        size += len(blocks[key])
+    return shards
+
+
+def convert_shard(items: List[Tuple[str, str]], compact: bool, renamer: Optional[AssetRenamer],
+                  voice: Optional[str], index: int, prev_key: Optional[str], after_key: Optional[str],
+                  render: bool) -> ShardResult:
+    """转换一段连续的块（供进程池调用）；voice 为该段开始时暂存的语音"""
+    converter = Converter(compact, renamer)
+    converter.pending_voice = voice
+    converted = []
+    for key, content in items:
+        converter.block = key
+        converted.append((key, converter.map_block(content.split("\n"))))
+    text = "".join(render_blocks(converted, compact, index, prev_key, after_key)) if render else ""
+    return ShardResult(converted, text, converter.missing, converter.refs)
+
+
+def convert_sharded(converter: Converter, blocks: Dict[str, str], jobs: int = 0,
+                    render: bool = True) -> Tuple[Dict[str, List[str]], Optional[str]]:
+    """
+    分段并行地转换一个脚本，返回 (转换后的块, AST 文本)
+
+    结果与 converter.convert_contents(blocks) 和 build_ast() 相同，没有映射的资源名、
+    资源引用和最后的语音状态也照常记录在 converter 中。render=False 时不生成 AST 文本
+    （例如还要拆分文件或共享命令时）。块编号不是按顺序给出，或脚本太短不值得分段时
+    直接串行转换。
+    """
+    keys = list(blocks)
+    shards = plan_shards(blocks, resolve_jobs(jobs))
+    if len(shards) <= 1 or keys != sorted(keys):
+        converted = converter.convert_contents(blocks)
+        return converted, build_ast(converted, converter.compact) if render else None
+
+    tasks = []
+    voice = converter.pending_voice
+    index = 0
+    for number, shard in enumerate(shards):
+        prev_key = shards[number - 1][-1] if number > 0 else None
+        after_key = shards[number + 1][0] if number + 1 < len(shards) else None
+        tasks.append(([(key, blocks[key]) for key in shard], converter.compact, converter.renamer,
+                      voice, index, prev_key, after_key, render))
+        voice = voice_after("\n".join(blocks[key] for key in shard), voice)
+        index += len(shard)
+
+    converted: Dict[str, List[str]] = {}
+    texts = [ast_head(keys[0], converter.compact)]
+    for result in run_batch(convert_shard, tasks, jobs):
+        if result.error is not None:
+            raise result.error
+        converted.update(result.value.blocks)
+        texts.append(result.value.text)
+        converter.missing.extend(result.value.missing)
+        converter.refs.extend(result.value.refs)
+    texts.append(ast_tail(keys[0], converter.compact))
+    converter.pending_voice = voice
+    converter.block = keys[-1]
+    return converted, "".join(texts) if render else None
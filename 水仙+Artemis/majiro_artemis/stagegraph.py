@@ -0,0 +1,233 @@
+"""
+按阶段图调度批量任务（阶段之间用有界队列衔接）
+
+run_batch() 把一个文件的所有阶段放在同一个任务里执行，读文件时 CPU 空闲，
+转换时磁盘空闲。StageGraph 把各阶段建模为有向无环图，每个阶段有自己的
+有界输入队列和工作线程:
+    - I/O 阶段（读写文件）直接在线程中执行
+    - CPU 阶段（解码、生成 AST）由线程提交到共享的进程池，在途任务数等于该阶段的线程数
+    - 某个文件的一个阶段完成后，依赖它的阶段的所有前置阶段都完成时才把该文件放入其队列；
+      队列满时上游阶段阻塞等待（背压），内存占用不随文件数增长
+不同文件可以同时处于不同阶段，整批的墙钟时间趋近于最慢的阶段，而不是各阶段之和。
+
+典型用法:
+    graph = StageGraph([
+        Stage("read", read_file, workers=2),
+        Stage("parse", parse, ("read",), cpu=True),
+        Stage("write", write_file, ("parse",), workers=2),
+    ], jobs=4)
+    for result in graph.run(paths):
+        print(result.item, result.values["write"], result.error)
+    print(graph.summary())
+
+阶段函数为 func(item, *前置阶段的结果)，没有前置阶段的为 func(item)；
+CPU 阶段的函数、item 和结果都需要可被 pickle。
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .batch import resolve_jobs
+
+
+class Stage(NamedTuple):
+    name: str
+    func: Callable[..., Any]
+    deps: Tuple[str, ...] = ()  # 前置阶段
+    cpu: bool = False  # True 时在进程池中执行
+    workers: int = 0  # 线程数（CPU 阶段即在途任务数），0 表示 I/O 阶段 1 个、CPU 阶段等于进程数
+
+
+class ItemResult(NamedTuple):
+    item: Any
+    values: Dict[str, Any]  # 末端阶段（没有后续阶段的）的结果
+    error: Optional[BaseException]
+    stage: Optional[str]  # 出错的阶段
+
+
+class _Item:
+    """一个输入在各阶段之间流转时的状态"""
+
+    __slots__ = ("item", "values", "waiting", "sinks_left", "done")
+
+    def __init__(self, item: Any, waiting: Dict[str, int], sinks: int):
+        self.item = item
+        self.values: Dict[str, Any] = {}
+        self.waiting = waiting  # 阶段 → 还没完成的前置阶段数
+        self.sinks_left = sinks
+        self.done = False
+
+
+_STOP = object()
+
+
+class StageGraph:
+    def __init__(self, stages: Sequence[Stage], jobs: int = 0, queue_size: int = 4):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"阶段名称重复: {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"阶段 {stage.name} 依赖不存在的阶段: {dep}")
+        self.order = self._sort()
+        self.dependents = {name: [s.name for s in stages if name in s.deps] for name in self.stages}
+        self.sources = [name for name in self.order if not self.stages[name].deps]
+        self.sinks = [name for name in self.order if not self.dependents[name]]
+        self.jobs = resolve_jobs(jobs)
+        self.queue_size = max(1, queue_size)
+        self.busy = {name: 0.0 for name in self.stages}  # 各阶段的累计处理时间
+        self.counts = {name: 0 for name in self.stages}
+        self.wall = 0.0
+
+    def _sort(self) -> List[str]:
+        """拓扑排序；有环时抛出 ValueError"""
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 = 访问中，2 = 已完成
+
+        def visit(name: str) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"阶段图中有环: {name}")
+            state[name] = 1
+            for dep in self.stages[name].deps:
+                visit(dep)
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def _workers(self, stage: Stage) -> int:
+        if stage.workers > 0:
+            return stage.workers
+        return self.jobs if stage.cpu else 1
+
+    def run(self, items: Iterable[Any]) -> Iterator[ItemResult]:
+        """处理所有输入，按完成顺序产出结果；某个阶段出错的输入不再进入后续阶段"""
+        queues = {name: queue.Queue(self.queue_size) for name in self.stages}
+        results: "queue.Queue[Any]" = queue.Queue()
+        lock = threading.Lock()
+        stopping = threading.Event()
+        use_pool = self.jobs > 1 and any(stage.cpu for stage in self.stages.values())
+        executor = ProcessPoolExecutor(self.jobs) if use_pool else None
+
+        def finish(entry: _Item, error: Optional[BaseException] = None, stage: Optional[str] = None) -> None:
+            with lock:
+                if entry.done:
+                    return
+                entry.done = True
+                values = {name: entry.values[name] for name in self.sinks if name in entry.values}
+                entry.values = {}
+            results.put(ItemResult(entry.item, values, error, stage))
+
+        def deliver(entry: _Item, name: str, value: Any) -> None:
+            ready = []
+            with lock:
+                if entry.done:
+                    return
+                entry.values[name] = value
+                for dependent in self.dependents[name]:
+                    entry.waiting[dependent] -= 1
+                    if entry.waiting[dependent] == 0:
+                        ready.append(dependent)
+                if not self.dependents[name]:
+                    entry.sinks_left -= 1
+                    complete = entry.sinks_left == 0
+                else:
+                    complete = False
+            if complete:
+                finish(entry)
+            for dependent in ready:
+                queues[dependent].put(entry)  # 队列满时阻塞（背压）
+
+        def work(name: str) -> None:
+            stage = self.stages[name]
+            inbox = queues[name]
+            while True:
+                entry = inbox.get()
+                if entry is _STOP:
+                    return
+                if entry.done or stopping.is_set():
+                    continue
+                args = [entry.values[dep] for dep in stage.deps]
+                start = time.perf_counter()
+                try:
+                    if stage.cpu and executor is not None:
+                        value = executor.submit(stage.func, entry.item, *args).result()
+                    else:
+                        value = stage.func(entry.item, *args)
+                except Exception as e:
+                    finish(entry, e, name)
+                    continue
+                finally:
+                    with lock:
+                        self.busy[name] += time.perf_counter() - start
+                        self.counts[name] += 1
+                deliver(entry, name, value)
+
+        def feed() -> None:
+            count = 0
+            try:
+                for item in items:
+                    if stopping.is_set():
+                        break
+                    waiting = {name: len(stage.deps) for name, stage in self.stages.items()}
+                    entry = _Item(item, waiting, len(self.sinks))
+                    count += 1
+                    for name in self.sources:
+                        queues[name].put(entry)
+            except Exception as e:
+                results.put((_STOP, count, e))
+                return
+            results.put((_STOP, count, None))
+
+        threads = [threading.Thread(target=work, args=(name,), daemon=True)
+                   for name in self.order for _ in range(self._workers(self.stages[name]))]
+        threads.append(threading.Thread(target=feed, daemon=True))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        total: Optional[int] = None
+        finished = 0
+        completed = False
+        try:
+            while total is None or finished < total:
+                result = results.get()
+                if isinstance(result, tuple) and result and result[0] is _STOP:
+                    _, total, error = result
+                    if error is not None:
+                        raise error
+                    continue
+                finished += 1
+                yield result
+            completed = True
+        finally:
+            self.wall += time.perf_counter() - start
+            stopping.set()
+            if completed:
+                # 所有输入都已完成，队列为空，放入结束标记后等待线程退出
+                for name in self.order:
+                    for _ in range(self._workers(self.stages[name])):
+                        queues[name].put(_STOP)
+                for thread in threads:
+                    thread.join()
+            if executor is not None:
+                executor.shutdown(wait=completed, cancel_futures=True)
+
+    def summary(self) -> str:
+        """各阶段的处理数和累计处理时间；墙钟时间接近最忙的阶段时说明各阶段充分重叠"""
+        lines = [f"阶段调度：墙钟 {self.wall:.3f}s"]
+        for name in self.order:
+            stage = self.stages[name]
+            kind = "CPU" if stage.cpu else "I/O"
+            lines.append(f"  {name:<10}{kind:<5}{self.counts[name]:>6} 个  累计 {self.busy[name]:8.3f}s"
+                         f"  （{self._workers(stage)} 个线程）")
+        return "\n".join(lines)
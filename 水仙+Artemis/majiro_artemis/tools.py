@@ -0,0 +1,219 @@
+"""
+外部工具 mjcrypt.exe / mjdisasm.exe 的异步批量调用
+
+纯 Python 的 mjcrypt/mjdisasm 模块尚未覆盖的游戏版本仍需调用原工具。ToolRunner 用
+asyncio.create_subprocess_exec 并发启动子进程:
+    - 信号量限制同时运行的进程数
+    - 每次调用有超时，超时的进程被结束；超时或返回码非 0 时按设定的次数重试
+    - mjdisasm 在每个任务自己的临时工作目录中运行（生成的 .mjs/.sjs 先写到工作目录，
+      再移动到输出目录），并行时不会像共用 mjdisasm_work_dir 那样互相覆盖
+工具命令可以配置，例如 "wine mjcrypt.exe"，或测试时换成本地的替代脚本。
+
+用法:
+    python -m majiro_artemis.tools decrypt 原始mjo文件 解密mjo文件 --tool 1.majiro-解密mjo/mjcrypt.exe
+    python -m majiro_artemis.tools disasm 解密mjo文件 temp --tool "wine 2.majiro-mjo脚本解析/mjdisasm.exe"
+        [--jobs 4] [--timeout 60] [--retries 2]
+"""
+
+import argparse
+import asyncio
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .batch import Throughput, resolve_jobs
+
+# 工具输出（日文 Windows 程序）的编码
+TOOL_ENCODING = "shift_jis"
+
+
+class ToolError(RuntimeError):
+    """工具返回码非 0、超时或没有生成预期的文件"""
+
+    def __init__(self, message: str, returncode: Optional[int] = None, stderr: str = ""):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class ToolResult(NamedTuple):
+    returncode: int
+    stdout: str
+    stderr: str
+    attempts: int  # 实际尝试的次数（含重试）
+    seconds: float
+
+
+def tool_command(tool: str) -> List[str]:
+    """--tool 参数 → 命令前缀；带空格的路径按 shell 规则加引号，如 "wine 'C:/水仙/mjcrypt.exe'" """
+    if os.path.exists(tool):
+        return [tool]
+    return shlex.split(tool, posix=os.name != "nt")
+
+
+class ToolRunner:
+    """
+    限制并发、带超时和重试的子进程执行器
+
+    典型用法:
+        runner = ToolRunner(concurrency=4, timeout=60, retries=2)
+        result = await runner.run(["mjcrypt.exe", src, dest])
+    """
+
+    def __init__(self, concurrency: int = 0, timeout: Optional[float] = 60.0, retries: int = 1,
+                 encoding: str = TOOL_ENCODING):
+        if retries < 0:
+            raise ValueError(f"重试次数不能为负数: {retries}")
+        self.concurrency = resolve_jobs(concurrency)
+        self.timeout = timeout
+        self.retries = retries
+        self.encoding = encoding
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _once(self, argv: Sequence[str], cwd: Optional[str]) -> Tuple[int, str, str]:
+        kwargs = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        proc = await asyncio.create_subprocess_exec(*argv, cwd=cwd, stdin=asyncio.subprocess.DEVNULL,
+                                                    stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.PIPE, **kwargs)
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        return (proc.returncode, stdout.decode(self.encoding, "replace"),
+                stderr.decode(self.encoding, "replace"))
+
+    def slot(self) -> asyncio.Semaphore:
+        """
+        限制并发的信号量
+
+        任务在运行工具前还要准备资源（如临时目录）时，先 async with runner.slot()，
+        在其中调用 run(..., acquire=False)，资源只在占用名额期间存在。
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)  # 在事件循环中创建
+        return self._semaphore
+
+    async def run(self, argv: Sequence[str], cwd: Optional[str] = None, acquire: bool = True) -> ToolResult:
+        """运行一次命令（失败时重试），返回码仍非 0 或仍超时时抛出 ToolError"""
+        if acquire:
+            async with self.slot():
+                return await self.run(argv, cwd, acquire=False)
+        start = time.perf_counter()
+        error: Optional[ToolError] = None
+        for attempt in range(1, self.retries + 2):
+            try:
+                returncode, stdout, stderr = await self._once(argv, cwd)
+            except asyncio.TimeoutError:
+                error = ToolError(f"超时（{self.timeout}s）: {os.path.basename(argv[0])}")
+                continue
+            if returncode == 0:
+                return ToolResult(returncode, stdout, stderr, attempt, time.perf_counter() - start)
+            error = ToolError(f"[{returncode}] {stderr.strip() or stdout.strip() or '未知错误'}",
+                              returncode, stderr)
+        raise error
+
+
+async def run_mjcrypt(runner: ToolRunner, tool: Sequence[str], src_path: str, dest_path: str) -> ToolResult:
+    """mjcrypt.exe 源文件 目标文件"""
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+    result = await runner.run([*tool, os.path.abspath(src_path), os.path.abspath(dest_path)])
+    if not os.path.exists(dest_path):
+        raise ToolError(f"没有生成 {dest_path}")
+    return result
+
+
+async def run_mjdisasm(runner: ToolRunner, tool: Sequence[str], mjo_path: str, output_dir: str,
+                       work_root: Optional[str] = None) -> ToolResult:
+    """
+    mjdisasm.exe 文件.mjo，在独立的临时工作目录中运行，再把 .mjs/.sjs 移动到 output_dir
+
+    mjdisasm 把结果写到当前工作目录；每次调用使用新建的目录，结束后删除。
+    目录在取得并发名额后才创建，同时存在的临时目录不超过并发数。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(mjo_path))[0]
+    async with runner.slot():
+        work_dir = tempfile.mkdtemp(prefix=base_name + ".", dir=work_root)
+        try:
+            result = await runner.run([*tool, os.path.abspath(mjo_path)], cwd=work_dir, acquire=False)
+            missing = [ext for ext in (".mjs", ".sjs")
+                       if not os.path.exists(os.path.join(work_dir, base_name + ext))]
+            if missing:
+                raise ToolError(f"缺少生成文件: {', '.join(base_name + ext for ext in missing)}")
+            for ext in (".mjs", ".sjs"):
+                shutil.move(os.path.join(work_dir, base_name + ext), os.path.join(output_dir, base_name + ext))
+            return result
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+async def _in_order(jobs: Iterable[Awaitable[ToolResult]]) -> List[Tuple[Optional[ToolResult], Optional[BaseException]]]:
+    """同时启动所有任务（并发数由 ToolRunner 限制），按输入顺序等待并返回 (结果, 异常)"""
+    tasks = [asyncio.ensure_future(job) for job in jobs]
+    results = []
+    for task in tasks:
+        try:
+            results.append((await task, None))
+        except Exception as e:
+            results.append((None, e))
+    return results
+
+
+def run_tool_batch(command: str, paths: List[str], output_dir: str, tool: str, jobs: int = 0,
+                   timeout: Optional[float] = 60.0, retries: int = 1,
+                   work_root: Optional[str] = None) -> List[Tuple[Optional[ToolResult], Optional[BaseException]]]:
+    """对每个 .mjo 调用 decrypt（mjcrypt）或 disasm（mjdisasm），按输入顺序返回 (结果, 异常)"""
+    runner = ToolRunner(jobs, timeout, retries)
+    prefix = tool_command(tool)
+    if command == "decrypt":
+        jobs_ = (run_mjcrypt(runner, prefix, path, os.path.join(output_dir, "decrypted_" + os.path.basename(path)))
+                 for path in paths)
+    else:
+        jobs_ = (run_mjdisasm(runner, prefix, path, output_dir, work_root) for path in paths)
+    return asyncio.run(_in_order(jobs_))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="并发调用 mjcrypt.exe / mjdisasm.exe")
+    parser.add_argument("command", choices=("decrypt", "disasm"), help="decrypt 调用 mjcrypt，disasm 调用 mjdisasm")
+    parser.add_argument("input", help=".mjo 输入目录")
+    parser.add_argument("output", help="输出目录")
+    parser.add_argument("--tool", required=True, help='工具路径或命令，例如 mjcrypt.exe 或 "wine mjdisasm.exe"')
+    parser.add_argument("--jobs", type=int, default=0, help="同时运行的进程数，0 表示 CPU 核心数")
+    parser.add_argument("--timeout", type=float, default=60.0, help="每次调用的超时秒数，默认 60")
+    parser.add_argument("--retries", type=int, default=1, help="超时或失败后的重试次数，默认 1")
+    parser.add_argument("--work-dir", help="mjdisasm 临时工作目录的上级目录，默认为系统临时目录")
+    args = parser.parse_args(argv)
+    if args.retries < 0:
+        parser.error("--retries 不能为负数")
+
+    paths = sorted(os.path.join(args.input, name) for name in os.listdir(args.input)
+                   if name.lower().endswith(".mjo"))
+    throughput = Throughput()
+    failed = 0
+    results = run_tool_batch(args.command, paths, args.output, args.tool, args.jobs,
+                             args.timeout, args.retries, args.work_dir)
+    for path, (result, error) in zip(paths, results):
+        if error is None:
+            throughput.add(os.path.getsize(path))
+            retried = f"（第 {result.attempts} 次成功）" if result.attempts > 1 else ""
+            print(f"✓ {path}  {result.seconds:.2f}s{retried}")
+        else:
+            failed += 1
+            print(f"✗ {path}: {error}")
+    print(f"处理完成：成功 {len(paths) - failed} 个，失败 {failed} 个")
+    print(f"吞吐量：{throughput.summary()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
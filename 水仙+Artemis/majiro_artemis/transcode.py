@@ -0,0 +1,161 @@
+"""
+.sjs 资源文件 Shift-JIS → UTF-8 原地转码
+
+按固定大小分块增量解码，先写入同目录的临时文件，完成后原子替换原文件，
+中途出错不会留下半截文件。已经是 UTF-8（或纯 ASCII）的文件直接跳过，
+重复运行不会把 UTF-8 再当作 Shift-JIS 解码。多个文件在线程池中并行处理。
+
+用法:
+    python -m majiro_artemis.transcode temp [--jobs 0] [--codec shift_jis --codec cp932] [--metrics metrics.json]
+"""
+
+import argparse
+import codecs
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+from .batch import resolve_jobs
+from .metrics import Metrics, measure
+
+# 依次尝试的源编码：mjdisasm 以 cp932 写出 .sjs，其中的 NEC/IBM 扩展字符不在 shift_jis 内
+DEFAULT_CODECS = ("shift_jis", "cp932")
+CHUNK_SIZE = 1 << 20
+
+# transcode_file() 返回值：文件已是 UTF-8，未改动
+SKIPPED = "skipped"
+
+
+class TranscodeResult(NamedTuple):
+    path: str
+    status: Optional[str]  # 使用的源编码或 SKIPPED；失败时为 None
+    error: Optional[str]
+
+
+def is_utf8(path: str, chunk_size: int = CHUNK_SIZE) -> bool:
+    """
+    文件能否按 UTF-8 完整解码（纯 ASCII 也算）
+
+    Shift-JIS 的日文文本几乎不可能恰好是合法的 UTF-8，遇到第一个非法字节即返回，
+    所以对未转码的文件只需读第一个块。
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _transcode_to(src_path: str, tmp_path: str, codec: str, chunk_size: int) -> None:
+    decoder = codecs.getincrementaldecoder(codec)()
+    with open(src_path, "rb") as src, open(tmp_path, "wb") as dst:
+        for chunk in iter(lambda: src.read(chunk_size), b""):
+            dst.write(decoder.decode(chunk).encode("utf-8"))
+        dst.write(decoder.decode(b"", final=True).encode("utf-8"))
+
+
+def transcode_file(path: str, source_codecs: Sequence[str] = DEFAULT_CODECS,
+                   chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    将单个文件原地转码为 UTF-8
+
+    Returns:
+        实际使用的源编码；文件已是 UTF-8 时返回 SKIPPED
+    Raises:
+        UnicodeDecodeError: 所有源编码都无法解码
+    """
+    if is_utf8(path, chunk_size):
+        return SKIPPED
+
+    # 临时文件名各不相同，同一目录上同时运行的多个进程不会互相覆盖或删除临时文件
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    error: Optional[UnicodeDecodeError] = None
+    try:
+        for codec in source_codecs:
+            try:
+                _transcode_to(path, tmp_path, codec, chunk_size)
+            except UnicodeDecodeError as e:
+                error = e
+                continue
+            shutil.copymode(path, tmp_path)  # mkstemp 创建的文件只有属主可读写
+            os.replace(tmp_path, path)
+            return codec
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if error is None:
+        raise ValueError("未指定源编码")
+    raise error
+
+
+def _transcode_one(path: str, source_codecs: Sequence[str], chunk_size: int,
+                   metrics: Optional[Metrics] = None) -> TranscodeResult:
+    try:
+        with measure(metrics, "transcode", path, os.path.getsize(path) if metrics else 0) as record:
+            status = transcode_file(path, source_codecs, chunk_size)
+            if metrics is not None:
+                record["bytes_out"] = os.path.getsize(path)
+        return TranscodeResult(path, status, None)
+    except UnicodeDecodeError as e:
+        return TranscodeResult(path, None, f"编码解析失败：{e}")
+    except OSError as e:
+        return TranscodeResult(path, None, f"读写失败：{e}")
+
+
+def transcode_directory(directory: str, jobs: int = 0,
+                        source_codecs: Sequence[str] = DEFAULT_CODECS,
+                        chunk_size: int = CHUNK_SIZE,
+                        metrics: Optional[Metrics] = None) -> Iterator[TranscodeResult]:
+    """并行转码目录下的所有 .sjs 文件，按文件名顺序产出结果；给出 metrics 时记录 transcode 阶段"""
+    paths = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+             if name.lower().endswith(".sjs")]
+    with ThreadPoolExecutor(max_workers=resolve_jobs(jobs)) as pool:
+        yield from pool.map(lambda p: _transcode_one(p, source_codecs, chunk_size, metrics), paths)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=".sjs 文件 Shift-JIS → UTF-8 原地转码")
+    parser.add_argument("directory", help=".sjs 所在目录")
+    parser.add_argument("--jobs", type=int, default=0, help="并行线程数，0 表示使用全部 CPU 核心")
+    parser.add_argument("--codec", action="append", dest="codecs",
+                        help=f"源编码，可重复指定，按顺序尝试（默认 {' → '.join(DEFAULT_CODECS)}）")
+    parser.add_argument("--metrics", help="把每个文件的转码耗时和字节数写入该 JSON 文件")
+    args = parser.parse_args(argv)
+    for codec in args.codecs or ():
+        try:
+            codecs.lookup(codec)
+        except LookupError:
+            parser.error(f"未知编码: {codec}")
+
+    metrics = Metrics() if args.metrics else None
+    converted = skipped = 0
+    failed = []
+    for result in transcode_directory(args.directory, args.jobs, args.codecs or DEFAULT_CODECS,
+                                      metrics=metrics):
+        if result.error is not None:
+            failed.append(result)
+        elif result.status == SKIPPED:
+            skipped += 1
+        else:
+            converted += 1
+    print(f"处理完成：转换 {converted} 个，已是 UTF-8 跳过 {skipped} 个，失败 {len(failed)} 个")
+    for result in failed:
+        print(f"  {os.path.basename(result.path)}: {result.error}")
+    if metrics is not None:
+        print(metrics.summary())
+        metrics.write(args.metrics)
+        print(f"指标已保存: {args.metrics}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
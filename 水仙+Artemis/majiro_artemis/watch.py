@@ -0,0 +1,388 @@
+"""
+监视合并后的 .txt 脚本，修改后立即重新生成对应的 .ast
+
+翻译修改 #res： 行后不必再点一次按钮重新生成整个 转录的Artemis引擎脚本 目录:
+    - Linux 上用 inotify（通过 ctypes 调用，不需要额外的包）等待文件保存，其他系统或
+      加 --poll 时定时比较文件的大小和修改时间
+    - 编辑器保存时常有一连串事件（写临时文件、改名、修改属性），收到事件后等到
+      --debounce 秒内没有新事件再统一处理，同一个文件只转换一次
+    - 每个脚本的块及其转换结果保存在内存中，以 (块内容, 块开始时暂存的语音) 为键；
+      重新划分块后只有内容变化的块（以及语音状态随之变化的块）重新转换，其余直接复用，
+      再拼装并写出该脚本的 .ast（先写临时文件再替换，引擎不会读到写了一半的文件）
+输出与 pipeline / extract ast 的结果逐字节相同；同时更新输出目录下的资源引用索引（.mjassets）
+和没有映射的资源名列表。启动时只写出脚本或转换选项变化过的 .ast（记录在增量构建缓存中）。
+
+用法:
+    python -m majiro_artemis.watch [mjo原生脚本] [转录的Artemis引擎脚本] [--compact]
+        [--map bgm=附加补充脚本/other-list.txt] [--split-size 262144] [--intern]
+        [--poll] [--debounce 0.1] [--rebuild]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+import traceback
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .assetindex import AssetIndex, index_path
+from .assets import AssetRenamer, load_mapping, parse_map_spec, write_reports
+from .blocks import parse_blocks
+from .cache import MANIFEST_NAME, BuildCache
+from .converter import Converter, build_ast, build_ast_chunks, remove_stale_chunks
+from .extract import AST_OUTPUT_DIR, BLOCKS_INPUT_DIR, LogFunc, ast_config, ast_file_name
+
+# 收到事件后等待的静默时间（秒），期间的新事件合并为一批
+DEBOUNCE = 0.1
+# 轮询间隔（秒）
+POLL_INTERVAL = 0.2
+
+
+def is_script(name: str) -> bool:
+    """合并后的脚本：.txt，不含编辑器的隐藏临时文件"""
+    return name.endswith(".txt") and not name.startswith(".")
+
+
+def scan_scripts(input_dir: str) -> List[str]:
+    """输入目录及其子目录中的所有脚本"""
+    paths = []
+    for root, _, files in os.walk(input_dir):
+        paths.extend(os.path.join(root, name) for name in sorted(files) if is_script(name))
+    return paths
+
+
+class PollingWatcher:
+    """定时比较各脚本的 (大小, 修改时间)，适用于所有系统"""
+
+    def __init__(self, input_dir: str, interval: float = POLL_INTERVAL):
+        self.input_dir = input_dir
+        self.interval = interval
+        self.state = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        for path in scan_scripts(self.input_dir):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            state[path] = (st.st_size, st.st_mtime_ns)
+        return state
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """等待到有脚本被修改、新增或删除（或超时），返回这些路径"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state = self._snapshot()
+            changed = {path for path in state.keys() | self.state.keys()
+                       if state.get(path) != self.state.get(path)}
+            self.state = state
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            time.sleep(max(delay, 0))
+
+    def close(self) -> None:
+        pass
+
+
+# inotify 事件（<sys/inotify.h>）
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """Linux inotify：监视输入目录及其子目录（新建的子目录自动加入）"""
+
+    def __init__(self, input_dir: str):
+        self.input_dir = input_dir
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self.dirs: Dict[int, str] = {}  # 监视描述符 → 目录
+        for root, _, _ in os.walk(input_dir):
+            self._add(root)
+
+    def _add(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"无法监视目录: {directory}")
+        self.dirs[wd] = directory
+
+    def _read(self) -> Set[str]:
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0"))
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    # 事件队列溢出，无法知道丢了哪些事件，按全部脚本都有变化处理
+                    changed.update(scan_scripts(self.input_dir))
+                    continue
+                directory = self.dirs.get(wd)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO) and os.path.isdir(path):
+                        # 新目录：加入监视，并处理加入监视前已写入的脚本
+                        for root, _, _ in os.walk(path):
+                            self._add(root)
+                        changed.update(scan_scripts(path))
+                elif is_script(name) and mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE):
+                    changed.add(path)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """等待到有脚本被写入、改名或删除（或超时），返回这些路径"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            changed = self._read() if ready else set()
+            if changed or not ready:
+                return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(input_dir: str, poll: bool = False, interval: float = POLL_INTERVAL):
+    """Linux 上优先使用 inotify，不可用时退回轮询"""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(input_dir)
+        except (OSError, AttributeError):
+            pass  # 如 inotify 监视数达到上限
+    return PollingWatcher(input_dir, interval)
+
+
+class _Block(NamedTuple):
+    commands: List[str]  # AST 命令列表
+    refs: Tuple[Tuple[str, str], ...]  # (资源类型, 原文件名)，块编号在使用时补上
+    missing: Tuple[Tuple[str, str], ...]
+    voice: Optional[str]  # 块结束时暂存的语音
+
+
+class WatchSession:
+    """
+    内存中的各脚本块及其转换结果
+
+    典型用法:
+        session = WatchSession(input_dir, output_dir, compact=True)
+        session.load()
+        session.run(make_watcher(input_dir))
+    """
+
+    def __init__(self, input_dir: str, output_dir: str, compact: bool = False,
+                 renamer: Optional[AssetRenamer] = None, split_size: int = 0, intern: bool = False,
+                 log: LogFunc = print):
+        if intern and not compact:
+            raise ValueError("--intern 需要与 --compact 一起使用")
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.compact = compact
+        self.renamer = renamer
+        self.split_size = split_size
+        self.intern = intern
+        self.log = log
+        self.scripts: Dict[str, Dict[Tuple[str, Optional[str]], _Block]] = {}  # 脚本路径 → 块缓存
+        self.missing: Dict[str, Set[Tuple[str, str]]] = {}  # .ast 相对路径 → 没有映射的资源名
+        self.index = AssetIndex.load(index_path(output_dir))
+        self.cache = BuildCache(os.path.join(output_dir, MANIFEST_NAME))
+        self.config = ast_config(compact, renamer, split_size, intern)
+
+    def output_path(self, path: str) -> str:
+        relative_dir = os.path.relpath(os.path.dirname(path), self.input_dir)
+        return os.path.normpath(os.path.join(self.output_dir, relative_dir, ast_file_name(os.path.basename(path))))
+
+    def convert(self, path: str, write: bool = True) -> Tuple[int, int]:
+        """
+        重新划分脚本的块并转换，写出 .ast，返回 (重新转换的块数, 总块数)
+
+        块内容和开始时暂存的语音都与上次相同的块直接复用上次的结果；
+        write=False 时只更新内存中的结果。
+        """
+        # 不使用 BlockIndex（.blkidx）：每次保存后脚本的大小和修改时间都会变化，附属索引必然过期，
+        # 而这里需要所有块的内容来比较哪些块变化了；重建索引再逐块解码比 parse_blocks() 一次读完更慢
+        blocks = parse_blocks(path)
+        previous = self.scripts.get(path, {})
+        cache: Dict[Tuple[str, Optional[str]], _Block] = {}
+        converter = Converter(self.compact, self.renamer)
+        converted: Dict[str, List[str]] = {}
+        refs: List[Tuple[str, str, str]] = []
+        missing: Set[Tuple[str, str]] = set()
+        voice: Optional[str] = None
+        fresh = 0
+        for key, content in blocks.items():
+            state = (content, voice)
+            block = cache.get(state) or previous.get(state)
+            if block is None:
+                converter.pending_voice = voice
+                converter.block = key
+                ref_start, missing_start = len(converter.refs), len(converter.missing)
+                commands = converter.map_block(content.split("\n"))
+                block = _Block(commands, tuple((kind, name) for kind, name, _ in converter.refs[ref_start:]),
+                               tuple(converter.missing[missing_start:]), converter.pending_voice)
+                fresh += 1
+            cache[state] = block
+            converted[key] = block.commands
+            refs.extend((kind, name, key) for kind, name in block.refs)
+            missing.update(block.missing)
+            voice = block.voice
+        self.scripts[path] = cache
+
+        output_file = self.output_path(path)
+        script = os.path.relpath(output_file, self.output_dir)
+        self.index.add(script, refs)
+        self.missing[script] = missing
+        if write:
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            if self.split_size > 0 or self.intern:
+                files = build_ast_chunks(converted, output_file, self.split_size, self.compact, self.intern)
+            else:
+                files = [(output_file, build_ast(converted, self.compact))]
+            for file_path, text in files:
+                tmp_path = file_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_path, file_path)
+            remove_stale_chunks(output_file, len(files))
+            self.cache.record("watch", [path], [file_path for file_path, _ in files], self.config)
+        return fresh, len(blocks)
+
+    def forget(self, path: str) -> None:
+        """脚本被删除或改名：丢弃内存中的结果（已生成的 .ast 保留）"""
+        self.scripts.pop(path, None)
+        script = os.path.relpath(self.output_path(path), self.output_dir)
+        self.missing.pop(script, None)
+        self.index.retain(name for name in self.index.scripts if name != script)
+
+    def save_reports(self) -> None:
+        """更新资源引用索引、增量构建缓存和 <类型>_not_found.txt"""
+        self.index.save(index_path(self.output_dir))
+        self.cache.save()
+        if self.renamer is not None:
+            missing: Dict[str, Set[str]] = {}
+            for names in self.missing.values():
+                for kind, name in names:
+                    missing.setdefault(kind, set()).add(name)
+            write_reports(self.output_dir, missing, [])
+
+    def load(self, rebuild: bool = False) -> None:
+        """
+        读入并转换所有脚本
+
+        只写出脚本、转换选项（--compact、--map、--split-size、--intern）或 .ast 本身
+        与上次写出时不同的文件，rebuild=True 时全部写出。
+        """
+        start = time.perf_counter()
+        paths = scan_scripts(self.input_dir)
+        written = 0
+        for path in paths:
+            output_file = self.output_path(path)
+            stale = rebuild or not self.cache.fresh("watch", [path], [output_file], self.config)
+            try:
+                self.convert(path, stale)
+            except Exception:
+                self.log(f"处理文件时出错: {path}\n错误信息: {traceback.format_exc()}")
+                continue
+            if stale:
+                written += 1
+                self.log(f"转换完成: {path} -> {output_file}")
+        self.save_reports()
+        self.log(f"已载入 {len(self.scripts)} 个脚本，写出 {written} 个，耗时 {time.perf_counter() - start:.2f}s")
+
+    def update(self, paths: Set[str]) -> None:
+        """处理一批有变化的脚本"""
+        for path in sorted(paths):
+            start = time.perf_counter()
+            if not os.path.exists(path):
+                self.forget(path)
+                self.log(f"脚本已删除: {path}（保留 {self.output_path(path)}）")
+                continue
+            try:
+                fresh, total = self.convert(path)
+            except Exception:
+                self.log(f"处理文件时出错: {path}\n错误信息: {traceback.format_exc()}")
+                continue
+            self.log(f"已更新: {self.output_path(path)}（重新转换 {fresh}/{total} 块，"
+                     f"{(time.perf_counter() - start) * 1000:.0f} ms）")
+        self.save_reports()
+
+    def run(self, watcher, debounce: float = DEBOUNCE) -> None:
+        """持续监视，直到 Ctrl+C"""
+        try:
+            while True:
+                changed = watcher.wait()
+                # 合并编辑器保存时的一连串事件
+                while True:
+                    more = watcher.wait(debounce)
+                    if not more:
+                        break
+                    changed |= more
+                self.update(changed)
+        except KeyboardInterrupt:
+            self.log("已停止监视")
+        finally:
+            watcher.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="监视合并后的 .txt 脚本，修改后重新生成对应的 .ast")
+    parser.add_argument("input", nargs="?", default=BLOCKS_INPUT_DIR, help="合并后的 .txt 脚本目录")
+    parser.add_argument("output", nargs="?", default=AST_OUTPUT_DIR, help="输出目录")
+    parser.add_argument("--compact", action="store_true", help="输出不含缩进和注释的紧凑 AST")
+    parser.add_argument("--map", action="append", metavar="类型=文件",
+                        help="生成 AST 时替换资源文件名（bgm/se/vo/bg），可重复，例如 --map bgm=other-list.txt")
+    parser.add_argument("--split-size", type=int, default=0, metavar="BYTES",
+                        help="块内容超过该字节数的脚本在块边界处拆分为多个 .ast（默认不拆分）")
+    parser.add_argument("--intern", action="store_true", help="把每个文件中重复的命令提为 local 变量共享（需 --compact）")
+    parser.add_argument("--poll", action="store_true", help="不使用 inotify，定时检查文件的修改时间")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help=f"轮询间隔秒数，默认 {POLL_INTERVAL}")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE,
+                        help=f"收到修改后等待的静默秒数，期间的修改合并处理，默认 {DEBOUNCE}")
+    parser.add_argument("--rebuild", action="store_true", help="启动时重新写出所有 .ast")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input):
+        print(f"错误: 输入目录不存在: {args.input}")
+        return 1
+    renamer = None
+    if args.map:
+        renamer = AssetRenamer({kind: load_mapping(path) for kind, path in map(parse_map_spec, args.map)})
+    try:
+        session = WatchSession(args.input, args.output, args.compact, renamer, args.split_size, args.intern)
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    session.load(args.rebuild)
+    watcher = make_watcher(args.input, args.poll, args.interval)
+    kind = "轮询" if isinstance(watcher, PollingWatcher) else "inotify"
+    print(f"正在监视 {args.input}（{kind}），按 Ctrl+C 停止")
+    session.run(watcher, args.debounce)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+分段并行转换（shard.convert_sharded）与串行转换逐字节相同
+
+用法:
+    python -m pytest tests
+"""
+
+import os
+import re
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from majiro_artemis.blocks import parse_blocks  # noqa: E402
+from majiro_artemis.converter import Converter, build_ast, voice_after  # noqa: E402
+from majiro_artemis.shard import convert_sharded, plan_shards  # noqa: E402
+
+NOVEL = os.path.join(ROOT, "..", "备份文件", "10周年完美脚本", "额外-零", "decrypted_4novel.txt")
+JOBS = 4
+
+_VOICE_LINE = re.compile(r"^call<\$812afdf0[^\n]*\n", re.M)
+
+
+def novel_blocks():
+    """
+    decrypted_4novel.txt 的块，并把第二段开头块中的语音行移到第一段最后一块的末尾，
+    使暂存的语音跨过分段边界（语料中的语音行都与其文本在同一块内）
+    """
+    blocks = parse_blocks(NOVEL)
+    shards = plan_shards(blocks, JOBS)
+    last, first = shards[0][-1], shards[1][0]
+    voice_line = _VOICE_LINE.search(blocks[first]).group(0)
+    blocks[first] = blocks[first].replace(voice_line, "", 1)
+    blocks[last] += "\n" + voice_line.rstrip("\n")
+    return blocks, last
+
+
+@unittest.skipUnless(os.path.exists(NOVEL), "缺少语料 decrypted_4novel.txt")
+class ConvertShardedTest(unittest.TestCase):
+    def setUp(self):
+        self.blocks, self.boundary = novel_blocks()
+
+    def test_voice_crosses_shard_boundary(self):
+        shards = plan_shards(self.blocks, JOBS)
+        self.assertGreater(len(shards), 1)
+        self.assertEqual(shards[0][-1], self.boundary)
+        self.assertIsNotNone(voice_after(self.blocks[self.boundary]))
+
+    def assert_same_as_serial(self, compact):
+        serial = Converter(compact)
+        serial_blocks = serial.convert_contents(self.blocks)
+        serial_text = build_ast(serial_blocks, compact)
+
+        sharded = Converter(compact)
+        sharded_blocks, sharded_text = convert_sharded(sharded, self.blocks, JOBS)
+
+        self.assertEqual(sharded_text.encode("utf-8"), serial_text.encode("utf-8"))
+        self.assertEqual(sharded_blocks, serial_blocks)
+        self.assertEqual(sharded.missing, serial.missing)
+        self.assertEqual(sharded.refs, serial.refs)
+        self.assertEqual(sharded.pending_voice, serial.pending_voice)
+
+    def test_readable(self):
+        self.assert_same_as_serial(compact=False)
+
+    def test_compact(self):
+        self.assert_same_as_serial(compact=True)
+
+    def test_unrendered(self):
+        serial_blocks = Converter().convert_contents(self.blocks)
+        sharded_blocks, text = convert_sharded(Converter(), self.blocks, JOBS, render=False)
+        self.assertIsNone(text)
+        self.assertEqual(sharded_blocks, serial_blocks)
+
+
+if __name__ == "__main__":
+    unittest.main()